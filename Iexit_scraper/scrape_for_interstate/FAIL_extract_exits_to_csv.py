@@ -6,8 +6,18 @@ import requests
 import time
 import json
 import subprocess
+import sys
 from urllib.parse import urljoin
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from pipeline_tools.fetch_scheduler import FetchScheduler
+from pipeline_tools.instrumentation import METRICS, stage, timed_request
+from pipeline_tools.page_archive import PageArchive
+
+# Raw iExit pages are kept so the extraction can be re-run without re-fetching;
+# copies older than 30 days are fetched again since businesses at exits change
+PAGE_ARCHIVE = PageArchive(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'page_archive'), max_age=30 * 86400)
+
 def extract_exit_info_with_js_scraper(url, output_csv_path):
     """
     Use the JavaScript scraper to get exit information directly from the specific URL
@@ -147,12 +157,18 @@ def extract_exit_info_from_direct_url(url, output_csv_path):
     }
     
     try:
-        response = requests.get(url, headers=headers, timeout=30)
+        # The scheduler retries a 429/5xx after backoff, honoring Retry-After
+        with timed_request('iexit') as call, FetchScheduler(max_concurrency=1) as scheduler:
+            call.response = PAGE_ARCHIVE.fetch(url, session=scheduler, headers=headers, timeout=30)
+        response = call.response
         response.raise_for_status()
         html_content = response.text
         soup = BeautifulSoup(html_content, 'html.parser')
         
-        print("✅ Successfully fetched HTML content from URL")
+        if getattr(response, 'from_archive', False):
+            print(f"✅ Using archived HTML content from {response.fetched_at}")
+        else:
+            print("✅ Successfully fetched HTML content from URL")
         
         # Continue with the existing extraction logic
         return extract_exit_info_from_soup(soup, html_content, output_csv_path)
@@ -171,6 +187,25 @@ def extract_exit_info_from_soup(soup, html_content, output_csv_path):
         output_csv_path (str): Path for the output CSV file
     """
     
+    with stage('extract_exit_info_from_soup') as stage_record:
+        exits = extract_exits_from_soup(soup, html_content)
+        stage_record.rows = len(exits)
+    
+    write_exits_csv(exits, output_csv_path)
+    return exits
+
+def extract_exits_from_soup(soup, html_content):
+    """
+    Parse exit rows and their coordinates out of an iExit exits page
+    
+    Args:
+        soup: BeautifulSoup object of the HTML
+        html_content (str): Raw HTML content
+        
+    Returns:
+        list: One dict per exit
+    """
+    
     # Extract direction from the HTML
     print("Extracting direction information...")
     direction = extract_direction_from_html(soup, "web_url")
@@ -264,6 +299,17 @@ def extract_exit_info_from_soup(soup, html_content, output_csv_path):
         if exit_info.get('exit_name') and exit_info['exit_name']:
             exits.append(exit_info)
     
+    return exits
+
+def write_exits_csv(exits, output_csv_path):
+    """
+    Write extracted exits to CSV and print a short preview
+    
+    Args:
+        exits (list): Exit dicts from extract_exits_from_soup
+        output_csv_path (str): Path for the output CSV file
+    """
+    
     # Write to CSV
     if exits:
         fieldnames = ['exit_name', 'exit_description', 'exit_location', 'iexit_detail_link', 'latitude', 'longitude', 'google_maps_link', 'direction']
@@ -293,8 +339,6 @@ def extract_exit_info_from_soup(soup, html_content, output_csv_path):
             
     else:
         print("No exit data found in the HTML file")
-    
-    return exits
 
 def extract_coordinates_from_javascript(html_content):
     """
@@ -562,7 +606,9 @@ def main():
         print("🔧 Note: This will open a browser window and may require manual CAPTCHA solving")
         print("🔧 You will be prompted to provide cURL headers for authentication")
         logger.info(f"JavaScript scraper extraction from: {url}")
-        exits = extract_exit_info_with_js_scraper(url, output_csv)
+        with stage('extract_exit_info_with_js_scraper') as stage_record:
+            exits = extract_exit_info_with_js_scraper(url, output_csv)
+            stage_record.rows = len(exits) if exits else 0
         
         # Results summary
         print(f"\n✅ Extraction complete! CSV file saved at: {output_csv}")
@@ -610,6 +656,9 @@ def main():
             print("🔧 CAPTCHA encountered - manual intervention may be required")
         else:
             print("🔧 For help, check the log file: iexit_scraper.log")
+    finally:
+        METRICS.print_summary()
+        METRICS.write_json_report(os.path.join(os.path.dirname(__file__), 'iexit_run_report.json'))
 
 if __name__ == "__main__":
     main()
@@ -7,6 +7,11 @@ import os
 import random
 from functools import partial
 import urllib.parse
+import sys
+sys.path.append(r'C:\Users\clint\Desktop\Geocoding_Task')
+from pipeline_tools.verifier_store import VerifierStore
+
+VERIFIER_STATES = ['CA', 'UT', 'NV', 'AZ']
 
 class ManualVerifier:
     def __init__(self, root):
@@ -67,38 +72,37 @@ class ManualVerifier:
         self.auto_save_threshold = 3
     
     def load_data(self):
-        """Load the dataset from CSV file"""
+        """Load the selected states from the state-partitioned store (built from the CSV on first run)"""
         try:
             # Check if Manual_Verified.csv exists
             verified_path = r'C:\Users\clint\Desktop\Geocoding_Task\Matching_WebScrape\Manual_Verified.csv'
             original_path = r'C:\Users\clint\Desktop\Geocoding_Task\Matching_WebScrape\8.csv'
+            store_dir = r'C:\Users\clint\Desktop\Geocoding_Task\Matching_WebScrape\verifier_store'
             
-            if os.path.exists(verified_path):
-                self.df = pd.read_csv(verified_path)
-                print("Loaded previously verified data")
-            else:
-                self.df = pd.read_csv(original_path)
-                print("Loaded original data file")
-            
-            # Filter for states
-            self.df = self.df[self.df['OCR_state'].isin(['CA', 'UT', 'NV', 'AZ'])]
+            source_path = verified_path if os.path.exists(verified_path) else original_path
             
-            # Initialize verification columns if they don't exist
-            if 'Manually_Verified' not in self.df.columns:
-                self.df['Manually_Verified'] = 'no'
-            if 'Manual_Verification_Result' not in self.df.columns:
-                self.df['Manual_Verification_Result'] = ''
-            if 'Manual_Verification_Reason' not in self.df.columns:
-                self.df['Manual_Verification_Reason'] = ''
+            # Only the filter/list columns of the selected states are read here;
+            # the comparison columns are fetched per record in current_record
+            self.store = VerifierStore.open(source_path, store_dir)
+            self.df = self.store.load(states=VERIFIER_STATES)
+            print(f"Loaded {len(self.df)} records from {store_dir} (source: {os.path.basename(source_path)})")
             
             # Initialize filtered dataframe
             self.filtered_df = self.df.copy()
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load data: {str(e)}")
+            self.store = None
             self.df = None
             self.filtered_df = None
     
+    def current_record(self):
+        """Current filtered row merged with its full stored record"""
+        row = self.filtered_df.iloc[self.current_index]
+        record = dict(self.store.record(self.filtered_df.index[self.current_index], row['OCR_state']))
+        record.update(row.to_dict())
+        return pd.Series(record)
+    
     def setup_verification_tab(self, parent):
         """Set up the verification tab with all components"""
         # Top section - Category buttons & navigation tools
@@ -110,7 +114,7 @@ class ManualVerifier:
         category_frame.pack(side=tk.LEFT, padx=5)
         
         if self.df is not None:
-            categories = self.df['Flag_Category'].unique()
+            categories = [c for c in self.store.counts('Flag_Category', VERIFIER_STATES) if c]
             for category in categories:
                 btn = ttk.Button(category_frame, text=category, 
                                  command=lambda c=category: self.select_category(c))
@@ -131,7 +135,7 @@ class ManualVerifier:
         
         # Get unique values for Flag_Reason
         if self.df is not None and 'Flag_Reason' in self.df.columns:
-            reasons = ['All'] + list(self.df['Flag_Reason'].dropna().unique())
+            reasons = ['All'] + [r for r in self.store.counts('Flag_Reason', VERIFIER_STATES) if r]
             self.reason_dropdown = ttk.Combobox(reason_filter_frame, 
                                               textvariable=self.reason_filter_var,
                                               values=reasons,
@@ -172,6 +176,7 @@ class ManualVerifier:
         ttk.Button(tools_frame, text="Google Search", command=self.google_search).pack(side=tk.LEFT, padx=5, pady=5)
         ttk.Button(tools_frame, text="Undo Last Action", command=self.undo_action).pack(side=tk.RIGHT, padx=5, pady=5)
         ttk.Button(tools_frame, text="Save Now", command=self.save_data).pack(side=tk.RIGHT, padx=5, pady=5)
+        ttk.Button(tools_frame, text="Export CSV", command=self.export_csv).pack(side=tk.RIGHT, padx=5, pady=5)
         
         # Main comparison area
         comparison_frame = ttk.LabelFrame(parent, text="Data Comparison")
@@ -358,7 +363,7 @@ class ManualVerifier:
         if self.current_index >= len(self.filtered_df) or self.current_index < 0:
             self.current_index = 0
         
-        record = self.filtered_df.iloc[self.current_index]
+        record = self.current_record()
         
         # Add Flag_Reason at the top of the table
         if 'Flag_Reason' in record and pd.notnull(record['Flag_Reason']):
@@ -535,7 +540,7 @@ class ManualVerifier:
         if self.filtered_df is None or self.filtered_df.empty or self.current_index >= len(self.filtered_df):
             return
         
-        record = self.filtered_df.iloc[self.current_index]
+        record = self.current_record()
         url = record.get('Scraped_full_url', '')
         
         if url and isinstance(url, str):
@@ -548,7 +553,7 @@ class ManualVerifier:
         if self.filtered_df is None or self.filtered_df.empty or self.current_index >= len(self.filtered_df):
             return
         
-        record = self.filtered_df.iloc[self.current_index]
+        record = self.current_record()
         
         # Combine information for search
         search_terms = []
@@ -567,15 +572,24 @@ class ManualVerifier:
             messagebox.showinfo("Search", "No search terms found for this record")
     
     def save_data(self):
-        """Save the dataframe to CSV"""
+        """Save the verification columns to the store (export_csv writes the full Manual_Verified.csv)"""
         try:
-            output_path = r'C:\Users\clint\Desktop\Geocoding_Task\Matching_WebScrape\Manual_Verified.csv'
-            self.df.to_csv(output_path, index=False)
-            self.update_status(f"Data saved to {output_path}")
+            self.store.save_verifications(self.df)
+            self.update_status(f"Verifications saved to {self.store.verifications_path}")
             self.records_since_save = 0
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save data: {str(e)}")
     
+    def export_csv(self):
+        """Write every record with its verification to a CSV (all states, all columns)"""
+        try:
+            self.save_data()
+            output_path = r'C:\Users\clint\Desktop\Geocoding_Task\Matching_WebScrape\Manual_Verified_Export.csv'
+            self.store.export_csv(output_path)
+            self.update_status(f"Data exported to {output_path}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export data: {str(e)}")
+    
     def update_results_view(self):
         """Update the results tab view with filtered results"""
         # Clear existing data
@@ -1,34 +1,96 @@
+import os
+import sys
+
 import streamlit as st
 import pandas as pd
+import pyarrow.parquet as pq
 
-# Load CSV
-df = pd.read_csv(r'C:\Users\clint\Desktop\Geocoding_Task\Yelp_Lookup\10.csv')
+sys.path.append(r'C:\Users\clint\Desktop\Geocoding_Task')
+from pipeline_tools.match_outcomes import parse_match_rate
 
-# Filter based on combined condition
-enhanced_combined_condition = (
-    (df['Scraped_phone_match_rate'] == True) |
-    (df['Scraped_zipcode_to_label_match_rate'] == '6/6 successful match') |
-    (df['Scraped_zipcode_to_label_match_rate'] == '7/6 successful match') |
-    (df['Yelp_phone_match_rate'] == True)
-)
+CSV_PATH = r'C:\Users\clint\Desktop\Geocoding_Task\Yelp_Lookup\10.csv'
+# Columnar copy of 10.csv, rebuilt automatically whenever the CSV is newer
+PARQUET_PATH = os.path.splitext(CSV_PATH)[0] + '_review.parquet'
+
+MATCH_RATE_COL = 'Scraped_zipcode_to_label_match_rate'
+DISPLAY_COLUMN_COUNT = 30
+PAGE_SIZE = 200
+
+
+def build_columnar_copy(csv_path=CSV_PATH, parquet_path=PARQUET_PATH):
+    """
+    Convert 10.csv into a Parquet file holding only the rows and columns the app shows
+
+    The "already matched" condition is evaluated once here instead of on every
+    Streamlit rerun, and the match rate is stored as a categorical so the
+    dropdown filter is an integer comparison on its codes.
+    """
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+        return parquet_path
+
+    header = pd.read_csv(csv_path, nrows=0).columns
+    filter_columns = ['Scraped_phone_match_rate', MATCH_RATE_COL, 'Yelp_phone_match_rate']
+    display_columns = list(header[:DISPLAY_COLUMN_COUNT])
+    usecols = list(dict.fromkeys(display_columns + filter_columns))
+
+    df = pd.read_csv(csv_path, usecols=usecols, low_memory=False)
+
+    # Filter based on combined condition ("6/6" and "7/6 successful match" are full matches)
+    match_rate = parse_match_rate(df[MATCH_RATE_COL])
+    enhanced_combined_condition = (
+        (df['Scraped_phone_match_rate'] == True) |
+        (match_rate['matched'] >= match_rate['total']).fillna(False).to_numpy() |
+        (df['Yelp_phone_match_rate'] == True)
+    )
+    df = df.loc[~enhanced_combined_condition & df[MATCH_RATE_COL].notna(), display_columns + [MATCH_RATE_COL]]
+    df = df.loc[:, ~df.columns.duplicated()]
 
-filtered_df = df[~enhanced_combined_condition]
+    df[MATCH_RATE_COL] = df[MATCH_RATE_COL].astype('category')
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].astype('string')
+
+    df.to_parquet(parquet_path, index=False)
+    return parquet_path
+
+
+@st.cache_resource
+def load_review_table(parquet_path, mtime):
+    """Load the review rows once per process; mtime busts the cache when the file changes"""
+    table = pq.read_table(parquet_path)
+    df = table.to_pandas()
+    df[MATCH_RATE_COL] = df[MATCH_RATE_COL].astype('category')
+
+    # Row positions per match-rate code, so a selection is a single take()
+    codes = df[MATCH_RATE_COL].cat.codes.to_numpy()
+    positions = {code: (codes == code).nonzero()[0] for code in range(len(df[MATCH_RATE_COL].cat.categories))}
+    return df, positions
+
+
+parquet_path = build_columnar_copy()
+filtered_df, positions_by_code = load_review_table(parquet_path, os.path.getmtime(parquet_path))
+display_columns = [c for c in filtered_df.columns][:DISPLAY_COLUMN_COUNT]
+categories = filtered_df[MATCH_RATE_COL].cat.categories
 
 # Dropdown for distinct entries
 option = st.selectbox(
     "Select match rate:",
-    filtered_df['Scraped_zipcode_to_label_match_rate'].dropna().unique()
+    categories
 )
 
 # Filter by selection
-selected_df = filtered_df[
-    filtered_df['Scraped_zipcode_to_label_match_rate'] == option
-]
+selected_positions = positions_by_code[categories.get_loc(option)]
+
+page_count = max(1, -(-len(selected_positions) // PAGE_SIZE))
+page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+st.caption(f"{len(selected_positions):,} rows")
+
+page_positions = selected_positions[(page - 1) * PAGE_SIZE: page * PAGE_SIZE]
+selected_df = filtered_df.take(page_positions)
 
 # Show columns 1 to 30
 st.dataframe(
-    selected_df.iloc[:, :30],
+    selected_df[display_columns],
     use_container_width=True,
     hide_index=True
 )
-
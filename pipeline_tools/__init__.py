@@ -0,0 +1,9 @@
+"""
+Shared helpers for the Geocoding_Task notebooks.
+
+Notebooks import these modules after adding the project root to the path:
+
+    import sys
+    sys.path.append(r'C:\\Users\\clint\\Desktop\\Geocoding_Task')
+    from pipeline_tools.search_pool import SearchBrowserPool
+"""
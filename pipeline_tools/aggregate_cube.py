@@ -0,0 +1,278 @@
+"""
+Materialized aggregate cube for the analysis notebooks.
+
+API_Attempt/4.ipynb, Web_Scraping/3.ipynb, Cleaned_Code/Add_4/Add_5 and the
+Yelp_Lookup analysis notebooks each re-read a full CSV and re-aggregate it for
+every chart (crosstabs, groupby().apply, assign_region via .apply, lat/lon bins
+with pd.cut).  build_cube aggregates a table once, in one vectorized groupby,
+to counts and sums over
+
+    state, region, chain, precision, match_tier, phone_match, year, lat_bin, lon_bin
+
+Every chart in those notebooks is a roll-up of that cube (a groupby over a few
+thousand rows instead of the data), and the measures are additive, so
+AggregateCube.add / remove keep it current as rows are added, dropped or
+changed without re-reading anything.
+
+    cube = build_cube(df, columns={'match_tier': 'Success_Match_Rate'})
+    cube.save(r'...\\analysis_cube.parquet')
+    cube.crosstab('state', 'precision', normalize='index')     # = pd.crosstab(df.state, df.precision_level, normalize='index') * 100
+    cube.rollup(['lat_bin', 'lon_bin'], measure='mean_precision_score')
+    cube.update(old_rows, new_rows)                           # incremental refresh
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ['state', 'region', 'chain', 'precision', 'match_tier', 'phone_match', 'year', 'lat_bin', 'lon_bin']
+MEASURES = ['count', 'lat_sum', 'lon_sum', 'scored', 'precision_score_sum']
+
+# Source column for each dimension; override per table with build_cube(columns=...)
+DEFAULT_COLUMNS = {
+    'state': 'state',
+    'chain': 'chain',
+    'precision': 'precision_level',
+    'match_tier': 'Flag_Category',
+    'phone_match': 'has_phone_match',
+    'year': 'year',
+    'latitude': 'latitude',
+    'longitude': 'longitude',
+}
+
+# Same scores as precision_encoding in API_Attempt/4.ipynb
+PRECISION_SCORES = {'ROOFTOP': 4, 'RANGE_INTERPOLATED': 3, 'GEOMETRIC_CENTER': 2, 'APPROXIMATE': 1}
+
+MISSING = 'Unknown'
+MISSING_YEAR = -1
+
+# assign_region (Web_Scraping/3.ipynb), keyed by full name and by postal abbreviation
+_REGION_STATES = {
+    'Northeast': {'Connecticut': 'CT', 'Maine': 'ME', 'Massachusetts': 'MA', 'New Hampshire': 'NH', 'New Jersey': 'NJ',
+                  'New York': 'NY', 'Pennsylvania': 'PA', 'Rhode Island': 'RI', 'Vermont': 'VT'},
+    'Midwest': {'Illinois': 'IL', 'Indiana': 'IN', 'Iowa': 'IA', 'Kansas': 'KS', 'Michigan': 'MI', 'Minnesota': 'MN',
+                'Missouri': 'MO', 'Nebraska': 'NE', 'North Dakota': 'ND', 'Ohio': 'OH', 'South Dakota': 'SD',
+                'Wisconsin': 'WI'},
+    'South': {'Alabama': 'AL', 'Arkansas': 'AR', 'Delaware': 'DE', 'Florida': 'FL', 'Georgia': 'GA', 'Kentucky': 'KY',
+              'Louisiana': 'LA', 'Maryland': 'MD', 'Mississippi': 'MS', 'North Carolina': 'NC', 'Oklahoma': 'OK',
+              'South Carolina': 'SC', 'Tennessee': 'TN', 'Texas': 'TX', 'Virginia': 'VA', 'West Virginia': 'WV'},
+    'West': {'Alaska': 'AK', 'Arizona': 'AZ', 'California': 'CA', 'Colorado': 'CO', 'Hawaii': 'HI', 'Idaho': 'ID',
+             'Montana': 'MT', 'Nevada': 'NV', 'New Mexico': 'NM', 'Oregon': 'OR', 'Utah': 'UT', 'Washington': 'WA',
+             'Wyoming': 'WY'},
+    'Canada': {'Alberta': 'AB', 'British Columbia': 'BC', 'Manitoba': 'MB', 'New Brunswick': 'NB',
+               'Newfoundland and Labrador': 'NL', 'Nova Scotia': 'NS', 'Ontario': 'ON', 'Prince Edward Island': 'PE',
+               'Quebec': 'QC', 'Saskatchewan': 'SK', 'Yukon': 'YT'},
+}
+STATE_REGIONS = {key: region for region, states in _REGION_STATES.items()
+                 for name, abbr in states.items() for key in (name, abbr)}
+
+
+def assign_regions(states):
+    """Vectorized assign_region: region for a column of state names or abbreviations ('Other' if unknown)"""
+    states = pd.Series(states, copy=False).astype('string').str.strip()
+    return states.map(STATE_REGIONS).fillna('Other').astype(str)
+
+
+def _dimension(df, column):
+    if column is None or column not in df.columns:
+        return pd.Series(MISSING, index=df.index)
+    values = df[column].astype('string').str.strip()
+    return values.mask(values.isna() | (values == ''), MISSING).astype(str)
+
+
+def cube_rows(df, columns=None, bin_size=1.0):
+    """
+    The dimension values and measures of every row, before aggregation
+
+    Args:
+        df: Source table
+        columns: Overrides of DEFAULT_COLUMNS (dimension -> source column, None to leave out)
+        bin_size: Lat/lon bin size in degrees
+
+    Returns:
+        DataFrame with DIMENSIONS and MEASURES, one row per input row
+    """
+    columns = {**DEFAULT_COLUMNS, **(columns or {})}
+    lat = pd.to_numeric(df[columns['latitude']], errors='coerce') if columns['latitude'] in df.columns else pd.Series(np.nan, index=df.index)
+    lon = pd.to_numeric(df[columns['longitude']], errors='coerce') if columns['longitude'] in df.columns else pd.Series(np.nan, index=df.index)
+    has_coords = lat.notna() & lon.notna()
+
+    rows = pd.DataFrame({dim: _dimension(df, columns.get(dim))
+                         for dim in ['state', 'chain', 'precision', 'match_tier', 'phone_match']}, index=df.index)
+    rows.insert(1, 'region', assign_regions(rows['state']).to_numpy())
+    year = pd.to_numeric(df[columns['year']], errors='coerce') if columns.get('year') in df.columns else pd.Series(np.nan, index=df.index)
+    rows['year'] = year.astype('Int16').fillna(MISSING_YEAR)
+    # Bin = lower edge of the cell, so bins from separate builds line up
+    rows['lat_bin'] = (np.floor(lat / bin_size) * bin_size).where(has_coords)
+    rows['lon_bin'] = (np.floor(lon / bin_size) * bin_size).where(has_coords)
+
+    score = rows['precision'].map(PRECISION_SCORES)
+    rows['count'] = 1
+    rows['lat_sum'] = lat.where(has_coords, 0.0)
+    rows['lon_sum'] = lon.where(has_coords, 0.0)
+    rows['scored'] = score.notna().astype(np.int64)
+    rows['precision_score_sum'] = score.fillna(0).astype(np.int64)
+    return rows
+
+
+def _aggregate(rows):
+    return rows.groupby(DIMENSIONS, dropna=False, sort=False, observed=True)[MEASURES].sum().reset_index()
+
+
+class AggregateCube:
+    """Counts and sums over DIMENSIONS; every query is a roll-up of this table"""
+
+    def __init__(self, table, columns=None, bin_size=1.0):
+        """
+        Args:
+            table: Aggregated DataFrame with DIMENSIONS and MEASURES
+            columns: Source column mapping used to build it (reused by add/remove)
+            bin_size: Lat/lon bin size in degrees
+        """
+        self.table = table
+        self.columns = dict(columns or {})
+        self.bin_size = bin_size
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def total(self):
+        return int(self.table['count'].sum())
+
+    # ---- incremental maintenance ----------------------------------------------
+
+    def _merge(self, delta):
+        merged = _aggregate(pd.concat([self.table, delta], ignore_index=True))
+        self.table = merged[merged['count'] != 0].reset_index(drop=True)
+
+    def add(self, df):
+        """Fold new source rows into the cube"""
+        self._merge(_aggregate(cube_rows(df, self.columns, self.bin_size)))
+
+    def remove(self, df):
+        """Take source rows (as they were when added) out of the cube"""
+        delta = _aggregate(cube_rows(df, self.columns, self.bin_size))
+        delta[MEASURES] = -delta[MEASURES]
+        self._merge(delta)
+
+    def update(self, old_rows, new_rows):
+        """Replace changed rows: old_rows are their previous values, new_rows the current ones"""
+        delta_old = _aggregate(cube_rows(old_rows, self.columns, self.bin_size))
+        delta_old[MEASURES] = -delta_old[MEASURES]
+        self._merge(pd.concat([delta_old, _aggregate(cube_rows(new_rows, self.columns, self.bin_size))],
+                              ignore_index=True))
+
+    # ---- queries ----------------------------------------------------------------
+
+    def _filtered(self, where):
+        table = self.table
+        for dim, value in (where or {}).items():
+            if isinstance(value, (list, tuple, set, pd.Index)):
+                table = table[table[dim].isin(list(value))]
+            else:
+                table = table[table[dim] == value]
+        return table
+
+    @staticmethod
+    def _drop_missing(table, dimensions):
+        """Rows whose value is known in every one of dimensions (like pd.crosstab dropping NaN)"""
+        known = pd.Series(True, index=table.index)
+        for dim in dimensions:
+            if dim == 'year':
+                known &= table[dim] != MISSING_YEAR
+            elif dim in ('lat_bin', 'lon_bin'):
+                known &= table[dim].notna()
+            else:
+                known &= table[dim] != MISSING
+        return table[known]
+
+    def rollup(self, by, measure='count', where=None, include_missing=False):
+        """
+        Aggregate the cube to the given dimensions
+
+        Args:
+            by: Dimension or list of dimensions
+            measure: 'count', a MEASURES column, 'mean_lat', 'mean_lon' or 'mean_precision_score'
+            where: {dimension: value or list of values} filter
+            include_missing: Keep rows whose value is missing in one of the by
+                dimensions (the 'Unknown' / year -1 / NaN bin groups); by default
+                they are left out, as pandas groupby and crosstab drop NaN
+
+        Returns:
+            Series indexed by the dimensions
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        table = self._filtered(where)
+        if not include_missing:
+            table = self._drop_missing(table, by)
+        grouped = table.groupby(by, dropna=False, sort=True)[MEASURES].sum()
+        if measure == 'mean_lat':
+            return grouped['lat_sum'] / grouped['count']
+        if measure == 'mean_lon':
+            return grouped['lon_sum'] / grouped['count']
+        if measure == 'mean_precision_score':
+            return grouped['precision_score_sum'] / grouped['scored'].replace(0, np.nan)
+        return grouped[measure]
+
+    def crosstab(self, index, columns, normalize=False, where=None, include_missing=False):
+        """
+        pd.crosstab(df[index], df[columns]) from the cube
+
+        Args:
+            normalize: False for counts, 'index' / 'columns' / 'all' for percentages
+                (the notebooks' crosstab(..., normalize=...) * 100)
+            include_missing: Add the 'Unknown' row/column; pd.crosstab drops
+                missing values, so it is left out by default
+        """
+        table = self.rollup([index, columns], where=where, include_missing=include_missing).unstack(fill_value=0)
+        table.index.name, table.columns.name = index, columns
+        if normalize == 'index':
+            return table.div(table.sum(axis=1), axis=0) * 100
+        if normalize == 'columns':
+            return table.div(table.sum(axis=0), axis=1) * 100
+        if normalize == 'all':
+            return table / table.to_numpy().sum() * 100
+        return table
+
+    def top(self, dimension, n=10, where=None, include_missing=False):
+        """The n most frequent values of a dimension (value_counts().head(n).index)"""
+        counts = self.rollup(dimension, where=where, include_missing=include_missing)
+        return counts.sort_values(ascending=False, kind='stable').head(n).index
+
+    # ---- persistence ------------------------------------------------------------
+
+    def save(self, path):
+        self.table.to_parquet(path, index=False)
+        with open(path + '.meta.json', 'w', encoding='utf-8') as f:
+            json.dump({'columns': self.columns, 'bin_size': self.bin_size}, f)
+        print(f"💾 Saved cube: {len(self.table)} cells covering {self.total} rows -> {path}")
+
+    @classmethod
+    def load(cls, path):
+        with open(path + '.meta.json', encoding='utf-8') as f:
+            meta = json.load(f)
+        table = pd.read_parquet(path)
+        # Cubes saved before a dimension existed hold it as missing
+        for dim in DIMENSIONS:
+            if dim not in table.columns:
+                table.insert(DIMENSIONS.index(dim), dim, MISSING)
+        return cls(table, columns=meta['columns'], bin_size=meta['bin_size'])
+
+
+def build_cube(df, columns=None, bin_size=1.0):
+    """
+    Aggregate a table into an AggregateCube in one pass
+
+    Args:
+        df: Source table (2.csv, Add_4.csv, 8.csv, ...)
+        columns: Overrides of DEFAULT_COLUMNS, e.g. {'match_tier': 'Success_Match_Rate', 'state': 'OCR_state'}
+        bin_size: Lat/lon bin size in degrees
+
+    Returns:
+        AggregateCube
+    """
+    cube = AggregateCube(_aggregate(cube_rows(df, columns, bin_size)), columns=columns, bin_size=bin_size)
+    print(f"🧊 Cube: {len(df)} rows -> {len(cube)} cells over {', '.join(DIMENSIONS)}")
+    return cube
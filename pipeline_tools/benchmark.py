@@ -0,0 +1,313 @@
+"""
+Benchmark harness for the cleaning and matching stages on synthetic data.
+
+Every (stage, size) case runs in a fresh process so its peak RSS is not polluted
+by earlier cases.  Data generation happens before the timer starts; the reported
+numbers are wall time, rows/s and the case process's peak RSS.  That peak is a
+lifetime high-water mark, so it includes the synthetic inputs: setup_rss_mb is
+the mark before the stage ran, and a stage that allocates less than the setup
+did reports the same number for both.  Results can be saved as a baseline and
+later runs are compared against it.
+
+    python -m pipeline_tools.benchmark --sizes 10k,100k
+    python -m pipeline_tools.benchmark --sizes 10k --stages normalization --save-baseline
+    python -m pipeline_tools.benchmark --sizes 10k,100k,1m,10m --no-caps
+
+Exit status is 1 when any case regressed beyond the tolerance.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+# The notebook implementations scale badly; by default skip sizes that would take hours
+DEFAULT_MAX_ROWS = {
+    'normalization': None,
+    'candidate_generation': 100_000,
+    'determine_match_success': 100_000,
+    'comprehensive_matching_logic': 10_000,
+}
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'benchmark_baseline.json')
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB (None where neither resource nor psutil is available)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS reports bytes
+        return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return getattr(info, 'peak_wset', info.rss) / 1024 / 1024
+
+
+def _round_mb(value):
+    return round(value, 1) if value is not None else None
+
+
+################################################################################
+# STAGES: setup(n_rows, ref_rows, seed) builds inputs, run(inputs) is timed
+################################################################################
+
+def _setup_tables(n_rows, ref_rows, seed):
+    from .synthetic_data import generate_scraped_reference, generate_ocr_directory, reference_table
+    reference = generate_scraped_reference(ref_rows, seed=seed)
+    directory = generate_ocr_directory(n_rows, reference, seed=seed)
+    return directory, reference_table(reference)
+
+
+def _run_normalization(inputs):
+    from . import matching as m
+    directory, reference = inputs
+    directory['phone'].apply(m.clean_phone_number)
+    directory['zip_code'].apply(m.clean_zip_code)
+    directory['zip_code'].apply(m.normalize_zip_code)
+    directory['state'].apply(m.clean_state)
+    directory['city'].apply(m.clean_city)
+    directory['Exit_Number'].apply(m.extract_exit_numbers)
+    directory['Main_Road'].apply(m.extract_road_tokens)
+    directory['chain'].apply(m.standardize_chain)
+    directory['label'].apply(m.extract_label_words)
+    directory['label'].apply(m.filter_meaningful_words)
+    reference['Postal Code'].apply(m.normalize_zip_code)
+    reference['Phone'].apply(m.clean_phone_number)
+    reference['Exit'].apply(m.extract_exit_numbers)
+    reference['Highway'].apply(m.extract_road_tokens)
+    reference['Chain'].apply(m.standardize_chain)
+    reference['name'].apply(m.filter_meaningful_words)
+    return len(directory)
+
+
+def _run_candidate_generation(inputs):
+    from .matching import generate_candidates
+    directory, reference = inputs
+    return len(generate_candidates(directory, reference))
+
+
+def _setup_match_success(n_rows, ref_rows, seed):
+    from .matching import generate_candidates
+    directory, reference = _setup_tables(n_rows, ref_rows, seed)
+    candidates = generate_candidates(directory, reference)
+    for col in [c for c in candidates.columns if c.endswith('_scraped_matches_row_ids')]:
+        candidates[col + '_parsed'] = candidates[col]
+    return candidates
+
+
+def _run_match_success(candidates):
+    from .matching import determine_match_success
+    return len(candidates.apply(determine_match_success, axis=1))
+
+
+def _setup_comprehensive(n_rows, ref_rows, seed):
+    from .synthetic_data import generate_scraped_reference, generate_ocr_directory, to_combined_frame, reference_table
+    reference = generate_scraped_reference(ref_rows, seed=seed)
+    directory = generate_ocr_directory(n_rows, reference, seed=seed)
+    return to_combined_frame(directory, reference), reference_table(reference)
+
+
+def _run_comprehensive(inputs):
+    from .matching import comprehensive_matching_logic
+    combined, reference = inputs
+    comprehensive_matching_logic(combined, reference, verbose=False)
+    return len(combined)
+
+
+STAGES = {
+    'normalization': (_setup_tables, _run_normalization),
+    'candidate_generation': (_setup_tables, _run_candidate_generation),
+    'determine_match_success': (_setup_match_success, _run_match_success),
+    'comprehensive_matching_logic': (_setup_comprehensive, _run_comprehensive),
+}
+
+
+def _run_case(stage, n_rows, ref_rows, seed, result_queue):
+    """Child-process entry point for one (stage, size) case"""
+    try:
+        setup, run = STAGES[stage]
+        inputs = setup(n_rows, ref_rows, seed)
+        setup_rss = _peak_rss_mb()
+        start = time.perf_counter()
+        rows = run(inputs)
+        seconds = time.perf_counter() - start
+        result_queue.put({
+            'seconds': round(seconds, 4),
+            'rows': rows,
+            'rows_per_sec': round(rows / seconds, 1) if seconds else None,
+            'setup_rss_mb': _round_mb(setup_rss),
+            'peak_rss_mb': _round_mb(_peak_rss_mb()),
+        })
+    except Exception as e:
+        result_queue.put({'error': f"{type(e).__name__}: {e}"})
+
+
+def run_case(stage, n_rows, ref_ratio=0.1, seed=0, timeout=None):
+    """
+    Run one benchmark case in a separate process
+
+    Args:
+        stage: Key of STAGES
+        n_rows: Directory rows
+        ref_ratio: Reference rows as a share of directory rows (at least 1000)
+        seed: Synthetic data seed
+        timeout: Seconds before the case is killed (None: no limit)
+
+    Returns:
+        dict with seconds, rows, rows_per_sec, setup_rss_mb, peak_rss_mb (or error,
+        also when the child dies without reporting, e.g. killed for running out of memory)
+    """
+    ref_rows = max(1000, int(n_rows * ref_ratio))
+    ctx = multiprocessing.get_context('spawn')
+    result_queue = ctx.Queue()
+    proc = ctx.Process(target=_run_case, args=(stage, n_rows, ref_rows, seed, result_queue))
+    proc.start()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    result = None
+    while result is None:
+        try:
+            result = result_queue.get(timeout=1)
+        except queue.Empty:
+            if not proc.is_alive():
+                # The child may have put its result just before exiting
+                try:
+                    result = result_queue.get(timeout=1)
+                except queue.Empty:
+                    result = {'error': f"exit code {proc.exitcode}"}
+            elif deadline is not None and time.monotonic() > deadline:
+                proc.kill()
+                result = {'error': f"timed out after {timeout}s"}
+    proc.join()
+    result.update({'stage': stage, 'n_rows': n_rows, 'ref_rows': ref_rows})
+    return result
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    """
+    Flag cases that got slower or bigger than the baseline by more than tolerance
+
+    Returns:
+        list of (case_key, message) for every regression
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base or 'error' in result or 'error' in base:
+            continue
+        if base.get('rows_per_sec') and result.get('rows_per_sec'):
+            change = result['rows_per_sec'] / base['rows_per_sec'] - 1
+            result['rows_per_sec_change'] = round(change, 3)
+            if change < -tolerance:
+                regressions.append((key, f"rows/s {base['rows_per_sec']:,.0f} -> {result['rows_per_sec']:,.0f} ({change:+.0%})"))
+        if base.get('peak_rss_mb') and result.get('peak_rss_mb'):
+            change = result['peak_rss_mb'] / base['peak_rss_mb'] - 1
+            result['peak_rss_change'] = round(change, 3)
+            if change > tolerance:
+                regressions.append((key, f"peak RSS {base['peak_rss_mb']:,.0f} MB -> {result['peak_rss_mb']:,.0f} MB ({change:+.0%})"))
+    return regressions
+
+
+def run_benchmarks(sizes=('10k',), stages=None, ref_ratio=0.1, seed=0, caps=True, timeout=None,
+                   baseline_path=DEFAULT_BASELINE, save_baseline=False, output_path=None, tolerance=0.2):
+    """
+    Run every requested stage at every requested size and compare with the baseline
+
+    Returns:
+        tuple: (results dict keyed "stage@size", list of regressions)
+    """
+    stages = stages or list(STAGES)
+    results = {}
+
+    print(f"{'case':42s} {'seconds':>9s} {'rows/s':>12s} {'proc peak MB':>12s}")
+    print("-" * 78)
+    for stage in stages:
+        for size in sizes:
+            n_rows = SIZES[size] if size in SIZES else int(size)
+            key = f"{stage}@{size}"
+            cap = DEFAULT_MAX_ROWS.get(stage) if caps else None
+            if cap is not None and n_rows > cap:
+                results[key] = {'stage': stage, 'n_rows': n_rows, 'skipped': f"over default cap of {cap:,} rows"}
+                print(f"{key:42s} skipped (cap {cap:,}; use --no-caps)")
+                continue
+            result = run_case(stage, n_rows, ref_ratio=ref_ratio, seed=seed, timeout=timeout)
+            results[key] = result
+            if 'error' in result:
+                print(f"{key:42s} ❌ {result['error']}")
+            else:
+                peak = f"{result['peak_rss_mb']:12,.0f}" if result['peak_rss_mb'] is not None else f"{'n/a':>12s}"
+                print(f"{key:42s} {result['seconds']:9.2f} {result['rows_per_sec']:12,.0f} {peak}")
+
+    regressions = []
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare_to_baseline(results, baseline, tolerance)
+        print(f"\nCompared against baseline: {baseline_path}")
+        if regressions:
+            for key, message in regressions:
+                print(f"  ⚠️  {key}: {message}")
+        else:
+            print("  ✅ No regressions")
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'ref_ratio': ref_ratio,
+        'seed': seed,
+        'results': results,
+    }
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to: {output_path}")
+    if save_baseline:
+        merged = {}
+        if os.path.exists(baseline_path):
+            with open(baseline_path, encoding='utf-8') as f:
+                merged = json.load(f)['results']
+        merged.update({k: v for k, v in results.items() if 'error' not in v and 'skipped' not in v})
+        report['results'] = merged
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to: {baseline_path}")
+
+    return results, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the cleaning and matching stages on synthetic data")
+    parser.add_argument('--sizes', default='10k', help="Comma-separated sizes: 10k,100k,1m,10m or row counts")
+    parser.add_argument('--stages', default=','.join(STAGES), help="Comma-separated stage names")
+    parser.add_argument('--ref-ratio', type=float, default=0.1, help="Reference rows per directory row")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-caps', action='store_true', help="Run every size even for the slow stages")
+    parser.add_argument('--timeout', type=float, default=None, help="Seconds per case")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative slowdown / memory growth")
+    parser.add_argument('--output', default=None, help="Write this run's results to a JSON file")
+    args = parser.parse_args(argv)
+
+    _, regressions = run_benchmarks(
+        sizes=[s.strip().lower() for s in args.sizes.split(',') if s.strip()],
+        stages=[s.strip() for s in args.stages.split(',') if s.strip()],
+        ref_ratio=args.ref_ratio, seed=args.seed, caps=not args.no_caps, timeout=args.timeout,
+        baseline_path=args.baseline, save_baseline=args.save_baseline, output_path=args.output,
+        tolerance=args.tolerance,
+    )
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""
+Shared brand/chain dictionary compiled into one Aho-Corasick automaton.
+
+Chain and category detection in the notebooks loops over alias lists with
+substring checks: standardize_chain (Add_3) tries every canonical x variation,
+extract_chain_from_label (API_Attempt/3_2_2) every fuel chain, clean_chain_name
+(4_7) a ladder of string comparisons, and search_place_nearby_search (2_2) its
+food / gas / store keyword buckets.  That is O(aliases x text) per row.
+BrandDictionary compiles every alias into a single automaton, so one pass over a
+string finds every brand and category keyword in it, and adding aliases does
+not slow the scan down.
+
+Matches obey a boundary rule per alias:
+
+    'word'   the alias is a whole word or phrase ("bp" in "BP #12", not in "BPX")
+    'start'  the alias starts a word ("mcdonald" in "McDonald's")
+    'none'   plain substring, the notebooks' `alias in text`
+
+    brands = BrandDictionary()
+    brands.first_chain("SHELL FOOD MART #12")          # 'Shell'
+    brands.categories("Starbucks Coffee")               # {'restaurant'}
+    tags = brands.tag(df['label'])                      # chain, chains, category per row
+    infer_place_type("Pilot Travel Center")             # 'establishment', as in 2_2
+"""
+
+from collections import deque, namedtuple
+
+import pandas as pd
+
+BrandMatch = namedtuple('BrandMatch', ['start', 'end', 'alias', 'canonical', 'kind'])
+
+BOUNDARIES = ('word', 'start', 'none')
+
+# canonical -> (category, aliases); the canonical name is always an alias too.
+# Collected from extract_chain_from_label (3_2_2), clean_chain_name (4_7) and
+# CHAIN_MAPPINGS (Add_3), in extract_chain_from_label's priority order first.
+BRANDS = {
+    'Shell': ('gas_station', ['shell']),
+    'Chevron': ('gas_station', ['chevron']),
+    'Mobil': ('gas_station', ['mobil']),
+    'Exxon': ('gas_station', ['exxon', 'exxonmobil', 'exxon mobil']),
+    'BP': ('gas_station', ['bp', 'amoco']),
+    'Texaco': ('gas_station', ['texaco']),
+    'Sinclair': ('gas_station', ['sinclair', 'sinclair oil']),
+    'Valero': ('gas_station', ['valero']),
+    '76': ('gas_station', ['76', 'union 76', '76 gas', '76gas']),
+    'Citgo': ('gas_station', ['citgo']),
+    'Marathon': ('gas_station', ['marathon']),
+    'Speedway': ('gas_station', ['speedway', 'speedwaygas']),
+    'Phillips 66': ('gas_station', ['phillips 66', 'phillips66', '66 gas', '66gas']),
+    'Conoco': ('gas_station', ['conoco']),
+    'Sunoco': ('gas_station', ['sunoco']),
+    'Arco': ('gas_station', ['arco', 'am pm', 'ampm']),
+    'Hess': ('gas_station', ['hess']),
+    'Murphy': ('gas_station', ['murphy usa', 'murphy express', 'murphy']),
+    "Casey's": ('gas_station', ["casey's", 'caseys', 'casey s']),
+    'Gulf': ('gas_station', ['gulf', 'gulf oil']),
+    'Tesoro': ('gas_station', ['tesoro']),
+    'Shamrock': ('gas_station', ['shamrock']),
+    'Circle K': ('gas_station', ['circle k', 'circle_k', 'circlek']),
+    "Love's": ('gas_station', ["love's", 'loves', 'love s']),
+    'Pilot': ('gas_station', ['pilot', 'pilot travel center']),
+    'Flying J': ('gas_station', ['flying j', 'flying-j', 'flyingj']),
+    # No bare 'ta': matching is case-insensitive and "Ta" is a word in too many labels
+    'TravelCenters': ('gas_station', ['travelcenters', 'travel centers of america', 'taexpress', 'ta express',
+                                      'ta travel center', 'petro stopping center', 'petro']),
+    'Kwik Trip': ('gas_station', ['kwik trip', 'kwik star']),
+    'Maverik': ('gas_station', ['maverik']),
+    'QuikTrip': ('gas_station', ['quiktrip', 'qt']),
+    'Wawa': ('gas_station', ['wawa']),
+    'Sheetz': ('gas_station', ['sheetz']),
+    '7-Eleven': ('store', ['7-eleven', '7 eleven', '7eleven', '7-11', 'seven eleven']),
+    "McDonald's": ('restaurant', ["mcdonald's", 'mcdonalds']),
+    'Subway': ('restaurant', ['subway']),
+    'Starbucks': ('restaurant', ['starbucks']),
+    'KFC': ('restaurant', ['kfc', 'kentucky fried chicken']),
+    'Taco Bell': ('restaurant', ['taco bell']),
+    'Walmart': ('store', ['walmart', 'wal-mart']),
+    'Target': ('store', ['target']),
+}
+
+# search_place_nearby_search (2_2) keyword buckets, in its priority order
+CATEGORY_KEYWORDS = {
+    'restaurant': ['mcdonald', 'burger', 'pizza', 'restaurant', 'cafe', 'coffee', 'starbucks', 'subway', 'kfc', 'taco'],
+    'gas_station': ['shell', 'exxon', 'bp', 'chevron', 'mobil', 'gas', 'station'],
+    'store': ['walmart', 'target', 'store', 'market', 'shop'],
+}
+
+
+class AhoCorasick:
+    """Multi-pattern automaton over lowercase text; patterns carry an arbitrary payload"""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._own = [[]]
+        self._fail = None
+        self._out = None
+
+    def __len__(self):
+        return sum(len(own) for own in self._own)
+
+    def add(self, pattern, payload):
+        """Add a pattern (matched case-insensitively); the automaton recompiles on next search"""
+        node = 0
+        for char in pattern.lower():
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._own.append([])
+            node = nxt
+        self._own[node].append((len(pattern), payload))
+        self._fail = None
+
+    def _compile(self):
+        """Breadth-first failure links; each node's output also holds those of its failure chain"""
+        self._fail = [0] * len(self._goto)
+        self._out = [list(own) for own in self._own]
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0) if node else 0
+                self._out[child] += self._out[self._fail[child]]
+                queue.append(child)
+
+    def iter(self, text):
+        """Yield (start, end, payload) for every pattern occurrence in text, in order of end position"""
+        if self._fail is None:
+            self._compile()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for end, char in enumerate(text.lower(), 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, payload in out[node]:
+                yield end - length, end, payload
+
+
+def _is_word_char(char):
+    return char.isalnum()
+
+
+class BrandDictionary:
+    """Brands and category keywords behind one automaton, with per-alias boundary rules"""
+
+    def __init__(self, brands=BRANDS, categories=CATEGORY_KEYWORDS, boundary='word', category_boundary='start'):
+        """
+        Args:
+            brands: {canonical: (category, aliases)}
+            categories: {category: keywords}, in priority order
+            boundary: Boundary rule for brand aliases ('word', 'start' or 'none')
+            category_boundary: Boundary rule for category keywords
+        """
+        self.automaton = AhoCorasick()
+        self.brand_category = {}
+        self.brand_order = {}
+        self.category_order = {}
+        for canonical, (category, aliases) in (brands or {}).items():
+            self.add_brand(canonical, aliases, category=category, boundary=boundary)
+        for category, keywords in (categories or {}).items():
+            self.add_keywords(category, keywords, boundary=category_boundary)
+        self._cache = {}
+
+    @classmethod
+    def from_aliases(cls, mapping, boundary='none'):
+        """
+        Dictionary of {canonical: aliases} without categories (e.g. matching.CHAIN_MAPPINGS)
+
+        Only the listed aliases match, not the canonical keys themselves.
+        """
+        dictionary = cls(brands={}, categories={})
+        for canonical, aliases in mapping.items():
+            dictionary.add_brand(canonical, aliases, boundary=boundary, match_canonical=False)
+        return dictionary
+
+    def add_brand(self, canonical, aliases, category=None, boundary='word', match_canonical=True):
+        """Register a brand; unless match_canonical is False the canonical name itself also matches"""
+        if boundary not in BOUNDARIES:
+            raise ValueError(f"boundary must be one of {BOUNDARIES}, got {boundary!r}")
+        self.brand_order.setdefault(canonical, len(self.brand_order))
+        if category is not None:
+            self.brand_category[canonical] = category
+        names = ([canonical] if match_canonical else []) + list(aliases)
+        for alias in dict.fromkeys(a.lower() for a in names):
+            self.automaton.add(alias, (alias, canonical, 'brand', boundary))
+        self._cache = {}
+
+    def add_keywords(self, category, keywords, boundary='start'):
+        """Register category keywords"""
+        if boundary not in BOUNDARIES:
+            raise ValueError(f"boundary must be one of {BOUNDARIES}, got {boundary!r}")
+        self.category_order.setdefault(category, len(self.category_order))
+        for keyword in keywords:
+            self.automaton.add(keyword.lower(), (keyword.lower(), category, 'category', boundary))
+        self._cache = {}
+
+    # ---- matching ---------------------------------------------------------------
+
+    def find(self, text):
+        """
+        Every brand alias and category keyword in text that satisfies its boundary rule
+
+        Returns:
+            list of BrandMatch(start, end, alias, canonical, kind), ordered by position;
+            kind is 'brand' or 'category' (canonical is then the category name)
+        """
+        if text is None or (not isinstance(text, str) and pd.isna(text)):
+            return []
+        text = str(text)
+        matches = []
+        for start, end, (alias, canonical, kind, boundary) in self.automaton.iter(text):
+            if boundary != 'none':
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if boundary == 'word' and end < len(text) and _is_word_char(text[end]):
+                    continue
+            matches.append(BrandMatch(start, end, alias, canonical, kind))
+        matches.sort(key=lambda m: (m.start, -(m.end - m.start)))
+        return matches
+
+    def chains(self, text):
+        """Canonical brands in text, in order of appearance, without repeats"""
+        return list(dict.fromkeys(m.canonical for m in self.find(text) if m.kind == 'brand'))
+
+    def first_chain(self, text, default='Unknown'):
+        """The brand that appears first (longest alias on ties), or default"""
+        chains = self.chains(text)
+        return chains[0] if chains else default
+
+    def categories(self, text):
+        """Categories named by a keyword or implied by a brand in text"""
+        found = set()
+        for match in self.find(text):
+            if match.kind == 'category':
+                found.add(match.canonical)
+            elif self.brand_category.get(match.canonical):
+                found.add(self.brand_category[match.canonical])
+        return found
+
+    def category(self, text, default='establishment'):
+        """Highest-priority category (the order of the categories mapping), or default"""
+        found = self.categories(text)
+        ranked = sorted(found, key=lambda c: self.category_order.get(c, len(self.category_order)))
+        return ranked[0] if ranked else default
+
+    def tag(self, values, default_chain='Unknown', default_category='establishment'):
+        """
+        Chain and category tags for a column, scanning each distinct value once
+
+        Returns:
+            DataFrame aligned with values: chain (first brand), chains (all brands), category
+        """
+        values = pd.Series(values, copy=False)
+        uniques = values.dropna().unique()
+        tags = {}
+        for value in uniques:
+            key = str(value)
+            if key not in self._cache:
+                self._cache[key] = (self.first_chain(key, default_chain), self.chains(key),
+                                    self.category(key, default_category))
+            tags[value] = self._cache[key]
+        empty = (default_chain, [], default_category)
+        rows = [tags.get(v, empty) if not pd.isna(v) else empty for v in values]
+        return pd.DataFrame(rows, columns=['chain', 'chains', 'category'], index=values.index)
+
+
+_DEFAULT = None
+
+
+def default_dictionary():
+    """Shared BrandDictionary over BRANDS and CATEGORY_KEYWORDS"""
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = BrandDictionary()
+    return _DEFAULT
+
+
+def extract_chain(label, default='Unknown'):
+    """extract_chain_from_label (3_2_2) with word boundaries and the full brand list"""
+    return default_dictionary().first_chain(label, default)
+
+
+_PLACE_TYPES = None
+
+
+def place_type_dictionary():
+    """
+    search_place_nearby_search's (2_2) keyword buckets alone, as plain substrings
+
+    Brand categories are left out: 2_2 only checks its three keyword lists, so
+    "Pilot Travel Center" or "Love's" stays 'establishment' there, while
+    default_dictionary() would call them gas stations.
+    """
+    global _PLACE_TYPES
+    if _PLACE_TYPES is None:
+        _PLACE_TYPES = BrandDictionary(brands={}, categories=CATEGORY_KEYWORDS, category_boundary='none')
+    return _PLACE_TYPES
+
+
+def infer_place_type(keyword, default='establishment'):
+    """search_place_nearby_search's keyword -> Places type inference (2_2) in one scan"""
+    return place_type_dictionary().category(keyword, default)
@@ -0,0 +1,312 @@
+"""
+Out-of-core chunked execution of the cleaning and matching chain.
+
+generate_candidates, determine_match_success and comprehensive_matching_logic
+take whole frames, so Add_3/Add_4 and Matching_WebScrape/5 hold the full
+directory (and every *_row_ids list built for it) in memory at once.
+run_chunked streams the directory instead: it reads fixed-size batches from a
+CSV (pandas chunks) or Parquet file/dataset (Arrow record batches), passes each
+batch through a list of stages and appends the result to the output file before
+reading the next one.  The stage factories below build their reference-side
+state once (the candidate indexes, prepare_reference) and keep it resident, so
+peak memory is the reference plus one batch, however large the directory is.
+
+    stages = [candidate_stage(df2), match_success_stage()]
+    run_chunked('Add_2.csv', 'Add_4_chunked.parquet', stages, batch_rows=50_000)
+
+    run_chunked('5_input.csv', '5_matched.csv', [exit_matching_stage(df2)])
+
+Results equal the whole-frame run row for row, with one difference: the extra
+rows comprehensive_matching_logic adds for multiple matches come at the end of
+their batch rather than at the end of the file.
+
+pd.read_csv infers dtypes per chunk, so a column can be int64 in one batch and
+text ('12A') in a later one.  Stages declare the columns they need as text in
+stage.dtypes, and run_chunked reads CSV sources with them; any other column
+whose type changes after the first batch is widened to large_string in the
+output rather than stopping the run.
+"""
+
+import os
+import time
+
+import pandas as pd
+
+from .matching import (build_candidate_index, comprehensive_matching_logic, determine_match_success,
+                       generate_candidates, prepare_reference)
+
+ROW_ID_COLUMNS = ['phone', 'ZIP', 'City', 'Exit', 'State', 'Road', 'Chain', 'Label']
+
+
+def _is_parquet(path):
+    return os.path.isdir(path) or path.endswith('.parquet')
+
+
+def iter_batches(source, batch_rows=50_000, columns=None, **read_kwargs):
+    """
+    Yield a source table as DataFrames of at most batch_rows rows
+
+    Args:
+        source: CSV path, Parquet file or dataset directory, or a DataFrame
+        batch_rows: Rows per batch
+        columns: Columns to read (default: all)
+        **read_kwargs: Passed to pd.read_csv for CSV sources
+
+    Yields:
+        DataFrame batches; the index continues across batches like a full read
+    """
+    if isinstance(source, pd.DataFrame):
+        frame = source if columns is None else source[columns]
+        for start in range(0, len(frame), batch_rows):
+            yield frame.iloc[start:start + batch_rows]
+        return
+
+    if _is_parquet(source):
+        import pyarrow.dataset as ds
+
+        offset = 0
+        for batch in ds.dataset(source, format='parquet').to_batches(columns=columns, batch_size=batch_rows):
+            if batch.num_rows:
+                chunk = batch.to_pandas()
+                chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+                offset += len(chunk)
+                yield chunk
+        return
+
+    with pd.read_csv(source, chunksize=batch_rows, usecols=columns, **read_kwargs) as reader:
+        yield from reader
+
+
+def _settled_type(arrow_type):
+    """Column type to fix for the whole file: a first batch of empty cells/lists says nothing about later ones"""
+    import pyarrow as pa
+
+    if pa.types.is_null(arrow_type):
+        return pa.string()
+    if pa.types.is_list(arrow_type) and pa.types.is_null(arrow_type.value_type):
+        return pa.list_(pa.int64())
+    return arrow_type
+
+
+class ChunkWriter:
+    """Appends DataFrame batches to one CSV or Parquet file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+        self._columns = None
+        self._tmp_path = path + '.partial'
+
+    def write(self, chunk):
+        """
+        Append one batch; its columns must match the first batch's
+
+        Raises:
+            ValueError: The batch has different columns from the first one
+        """
+        if self._columns is None:
+            self._columns = list(chunk.columns)
+        elif list(chunk.columns) != self._columns:
+            raise ValueError(f"Batch columns differ from the first batch: {list(chunk.columns)}")
+
+        if self.parquet:
+            self._write_parquet(chunk)
+        else:
+            chunk.to_csv(self._tmp_path, mode='a' if self.rows else 'w', header=not self.rows, index=False)
+        self.rows += len(chunk)
+
+    def _write_parquet(self, chunk):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+            # An all-empty column in the first batch would fix the column type to null
+            self._schema = pa.schema([pa.field(f.name, _settled_type(f.type)) for f in schema])
+            self._writer = pq.ParquetWriter(self._tmp_path, self._schema)
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if not table.schema.equals(self._schema):
+            table = self._conform(table)
+        self._writer.write_table(table)
+
+    def _conform(self, table):
+        """Cast a batch to the file schema, widening columns that cannot be cast to large_string"""
+        import pyarrow as pa
+
+        columns, widen = [], []
+        for field in self._schema:
+            column = table.column(field.name)
+            try:
+                columns.append(column.cast(field.type))
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+                widen.append(field.name)
+                columns.append(column.cast(pa.large_string()))
+        if widen:
+            print(f"⚠️ Column types changed after batch 1; writing {widen} as text from here on")
+            self._widen(widen)
+        return pa.Table.from_arrays(columns, schema=self._schema)
+
+    def _widen(self, names):
+        """Copy the batches written so far into a new file with the named columns as large_string"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._writer.close()
+        self._schema = pa.schema([pa.field(f.name, pa.large_string()) if f.name in names else f for f in self._schema])
+        # ParquetWriter cannot reopen a file, so the rest of the run goes to a fresh one
+        old_path, self._tmp_path = self._tmp_path, self._tmp_path + '.widened'
+        self._writer = pq.ParquetWriter(self._tmp_path, self._schema)
+        for batch in pq.ParquetFile(old_path).iter_batches():
+            self._writer.write_table(pa.Table.from_batches([batch]).cast(self._schema))
+        os.remove(old_path)
+
+    def close(self):
+        """Finish the file and move it into place"""
+        if self._writer is not None:
+            self._writer.close()
+        if os.path.exists(self._tmp_path):
+            os.replace(self._tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Leave the previous output in place; drop the half-written file
+            if self._writer is not None:
+                self._writer.close()
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+
+
+################################################################################
+# STAGES: stage(batch) -> batch; reference-side state is built once per factory
+################################################################################
+
+def candidate_stage(df2):
+    """generate_candidates (Add_3 steps 1-8) with the df2 indexes built once"""
+    df2 = df2.reset_index(drop=True)
+    index = build_candidate_index(df2)
+
+    def stage(batch):
+        start = batch.index[0] if len(batch) else 0
+        result = generate_candidates(batch, df2, index=index)
+        result.index = pd.RangeIndex(start, start + len(result))
+        return result
+    stage.__name__ = 'candidate_generation'
+    return stage
+
+
+def _as_row_ids(value):
+    if isinstance(value, str):
+        import ast
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return []
+    return value if value is not None else []
+
+
+def match_success_stage(column='Success_Match_Rate'):
+    """
+    determine_match_success (Add_4) per row
+
+    Accepts the *_row_ids columns as lists (straight from candidate_stage) or as
+    the "[1, 2]" strings of Add_3.csv.
+    """
+    def stage(batch):
+        parsed = batch.copy()
+        for name in ROW_ID_COLUMNS:
+            col = f'{name}_scraped_matches_row_ids'
+            if col in parsed.columns:
+                parsed[col + '_parsed'] = parsed[col].map(_as_row_ids)
+        batch = batch.copy()
+        batch[column] = parsed.apply(determine_match_success, axis=1) if len(parsed) else pd.Series(dtype=object)
+        return batch
+    stage.__name__ = 'determine_match_success'
+    return stage
+
+
+def exit_matching_stage(df2, row_mask=None):
+    """
+    comprehensive_matching_logic (Matching_WebScrape/5) with prepare_reference(df2) done once
+
+    Args:
+        df2: Scraped reference table
+        row_mask: Optional function batch -> boolean mask overriding the step 1 filter
+    """
+    df2_work = prepare_reference(df2)
+
+    def stage(batch):
+        start = batch.index[0] if len(batch) else 0
+        mask = row_mask(batch) if row_mask is not None else None
+        result = comprehensive_matching_logic(batch, df2, row_mask=mask, verbose=False, df2_work=df2_work)
+        result.index = pd.RangeIndex(start, start + len(result))
+        return result
+    stage.__name__ = 'comprehensive_matching_logic'
+    # Exit numbers like '12A' would otherwise make the column int in some batches and text in others
+    # (the matcher normalizes both columns from text the same way it does from numbers)
+    stage.dtypes = {'OCR_zip_code': str, 'OCR_Exit_Number': str}
+    return stage
+
+
+def run_chunked(source, output, stages, batch_rows=50_000, columns=None, metrics=None, read_kwargs=None):
+    """
+    Stream a table through stages in fixed-size batches, writing each result as it is produced
+
+    Args:
+        source: CSV path, Parquet file/dataset directory, or a DataFrame
+        output: .csv or .parquet path; replaced only when the run completes
+        stages: Functions batch -> batch (candidate_stage, match_success_stage, ...)
+        batch_rows: Rows per batch; peak memory grows with this, not with the input
+        columns: Source columns to read (default: all)
+        metrics: Optional RunMetrics; each stage of each batch is recorded
+        read_kwargs: Extra pd.read_csv arguments for CSV sources; the stages' declared
+            dtypes (stage.dtypes) are added to any dtype given here
+
+    Returns:
+        dict with batches, rows_in, rows_out, seconds and peak_rss_mb (None where
+        the peak cannot be measured)
+    """
+    from .benchmark import _peak_rss_mb
+
+    # Only CSV sources use read_kwargs; a single dtype for every column already covers the declared ones
+    read_kwargs = dict(read_kwargs or {})
+    declared = {column: dtype for stage in stages for column, dtype in getattr(stage, 'dtypes', {}).items()}
+    if declared and isinstance(read_kwargs.get('dtype', {}), dict):
+        read_kwargs['dtype'] = {**declared, **read_kwargs.get('dtype', {})}
+
+    start = time.perf_counter()
+    batches = rows_in = 0
+    with ChunkWriter(output) as writer:
+        for batch in iter_batches(source, batch_rows, columns, **read_kwargs):
+            rows_in += len(batch)
+            for stage in stages:
+                name = getattr(stage, '__name__', 'stage')
+                if metrics is not None:
+                    with metrics.stage(name, rows=len(batch)):
+                        batch = stage(batch)
+                else:
+                    batch = stage(batch)
+            writer.write(batch)
+            batches += 1
+            if batches % 10 == 0:
+                print(f"  ... {batches} batches, {rows_in} rows ({time.perf_counter() - start:.1f}s)")
+
+    peak_rss = _peak_rss_mb()
+    summary = {
+        'batches': batches,
+        'rows_in': rows_in,
+        'rows_out': writer.rows,
+        'seconds': round(time.perf_counter() - start, 2),
+        'peak_rss_mb': round(peak_rss, 1) if peak_rss is not None else None,
+    }
+    peak_text = f", peak RSS {summary['peak_rss_mb']} MB" if peak_rss is not None else ""
+    print(f"✅ {rows_in} rows in {batches} batches -> {writer.rows} rows in {output} "
+          f"({summary['seconds']}s{peak_text})")
+    return summary
@@ -0,0 +1,226 @@
+"""
+One fetch, one parse, every field: extractor registry for truck-stop detail pages.
+
+Web_Scraping/4.ipynb (`extract_locdetinfo_data`) and Matching_WebScrape/2.ipynb
+(`process_all_catscale3_with_image_extraction`) each crawl the same
+location_details.php pages for different fields.  Here each field group is an
+extractor that declares the CSS selectors it reads; the registry parses a page
+once, runs every selector once, and hands each extractor only its matches.  The
+outputs are merged into one record per page.
+
+Adding a field is one decorated function:
+
+    @REGISTRY.register('fuel_lanes', selectors=['div.fuel-lanes'])
+    def fuel_lanes(matches, url):
+        elements = matches['div.fuel-lanes']
+        return {'Fuel_Lanes': elements[0].get_text(strip=True)} if elements else {}
+
+Running it (live, through a PageArchive, or over an archive with replay):
+
+    df = scrape_details(df2['full_url'], archive=archive)
+    df = replay(archive.directory, REGISTRY.extract)
+"""
+
+import os
+import re
+import time
+from urllib.parse import urlparse
+
+import pandas as pd
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+
+class Extractor:
+    """A named field extractor and the selectors it needs"""
+
+    def __init__(self, name, selectors, func):
+        self.name = name
+        self.selectors = list(selectors)
+        self.func = func
+
+    def __repr__(self):
+        return f"Extractor({self.name!r}, selectors={self.selectors})"
+
+
+class ExtractorRegistry:
+    """Runs every registered extractor against a single parse of each page"""
+
+    def __init__(self):
+        self.extractors = {}
+
+    def register(self, name, selectors):
+        """
+        Decorator registering func(matches, url) -> dict
+
+        Args:
+            name: Extractor name (re-registering a name replaces it)
+            selectors: CSS selectors whose matches the extractor needs;
+                matches[selector] is the list of matching elements
+        """
+        def decorator(func):
+            self.extractors[name] = Extractor(name, selectors, func)
+            return func
+        return decorator
+
+    def unregister(self, name):
+        self.extractors.pop(name, None)
+
+    def selectors(self):
+        """Every distinct selector needed by the registered extractors"""
+        return list(dict.fromkeys(s for e in self.extractors.values() for s in e.selectors))
+
+    def extract(self, html, url=None, only=None):
+        """
+        Parse html once and merge the output of every extractor
+
+        Args:
+            html: Page body (bytes or str)
+            url: Page URL (passed through to extractors)
+            only: Optional list of extractor names to run
+
+        Returns:
+            dict: merged fields; failures are listed in 'extract_errors'
+        """
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, 'html.parser')
+        extractors = [e for e in self.extractors.values() if only is None or e.name in only]
+        matches = {}
+        for selector in dict.fromkeys(s for e in extractors for s in e.selectors):
+            matches[selector] = soup.select(selector)
+
+        record, errors = {}, []
+        for extractor in extractors:
+            try:
+                record.update(extractor.func({s: matches[s] for s in extractor.selectors}, url) or {})
+            except Exception as e:
+                errors.append(f"{extractor.name}: {type(e).__name__}: {e}")
+        if errors:
+            record['extract_errors'] = '; '.join(errors)
+        return record
+
+
+REGISTRY = ExtractorRegistry()
+
+
+@REGISTRY.register('locdetinfo', selectors=['div#leftcol div.locdetinfo'])
+def extract_locdetinfo(matches, url):
+    """'Field: value' pairs from the leftcol locdetinfo divs (Web_Scraping/4.ipynb)"""
+    data = {}
+    for div in matches['div#leftcol div.locdetinfo']:
+        match = re.match(r'([^:]+):\s*(.+)', div.get_text().strip())
+        if match:
+            data[match.group(1).strip()] = match.group(2).strip()
+    return data
+
+
+@REGISTRY.register('chain_logo', selectors=['div.popb_rotate img'])
+def extract_chain_logo(matches, url):
+    """Chain name from the rotating logo image file name (Web_Scraping/4.ipynb)"""
+    for img_tag in matches['div.popb_rotate img'][:1]:
+        img_src = img_tag.get('src')
+        if img_src:
+            filename = img_src.split('/')[-1]
+            return {'Chain': filename.replace('.jpg', '').replace('.png', '').replace('logo', '').strip()}
+    return {}
+
+
+@REGISTRY.register('coordinates', selectors=['a[href*="google.com/maps/place"]'])
+def extract_coordinates(matches, url):
+    """Latitude/Longitude from the Google Maps place link (Web_Scraping/4.ipynb)"""
+    for maps_link in matches['a[href*="google.com/maps/place"]'][:1]:
+        coord_match = re.search(r'place/(-?\d+\.?\d*),(-?\d+\.?\d*)', maps_link.get('href'))
+        if coord_match:
+            return {'Latitude': coord_match.group(1), 'Longitude': coord_match.group(2)}
+    return {}
+
+
+@REGISTRY.register('ad_image', selectors=['div.pop_ad_holder.popb_nonrotate img'])
+def extract_ad_image(matches, url):
+    """Ad image file name, e.g. 'talogo' (Matching_WebScrape/2.ipynb catscale3 step)"""
+    for img_tag in matches['div.pop_ad_holder.popb_nonrotate img'][:1]:
+        img_src = img_tag.get('src')
+        if img_src:
+            return {'Ad_Image': os.path.splitext(os.path.basename(urlparse(img_src).path))[0]}
+    return {}
+
+
+def apply_ad_image_chain(df, chain_value='catscale3'):
+    """
+    Matching_WebScrape/2.ipynb rule: "catscale3" chains become "catscale3 + <ad image>"
+
+    Args:
+        df: Frame with Chain and Ad_Image columns
+
+    Returns:
+        DataFrame with Chain updated where an ad image was found
+    """
+    df = df.copy()
+    mask = df['Chain'].eq(chain_value) & df['Ad_Image'].notna()
+    df.loc[mask, 'Chain'] = df.loc[mask, 'Chain'] + ' + ' + df.loc[mask, 'Ad_Image']
+    print(f"✅ Updated {mask.sum()} {chain_value} chains from the ad image")
+    return df
+
+
+def scrape_details(urls, registry=REGISTRY, archive=None, delay=0.3, timeout=10, session=None, progress_every=100,
+                   scheduler=None):
+    """
+    Fetch each detail page once and run every registered extractor on it
+
+    Args:
+        urls: Detail page URLs
+        registry: ExtractorRegistry to apply
+        archive: Optional PageArchive; archived pages are not fetched again
+        delay: Seconds between network requests (ignored with a scheduler)
+        timeout: Request timeout in seconds
+        session: Optional requests.Session
+        progress_every: Print progress every N pages
+        scheduler: Optional fetch_scheduler.FetchScheduler; pages not in the archive
+            are all queued up front and fetched at the rate each host allows
+
+    Returns:
+        DataFrame with full_url, the merged fields and fetch_error
+    """
+    import requests
+
+    session = session or requests.Session()
+    session.headers.setdefault('User-Agent', USER_AGENT)
+    urls = list(urls)
+    # Each page is fetched and extracted once; repeated URLs share the record
+    unique_urls = list(dict.fromkeys(urls))
+    by_url = {}
+    print(f"Scraping {len(unique_urls)} detail pages ({len(urls)} rows) with {len(registry.extractors)} extractors: "
+          f"{', '.join(registry.extractors)}")
+
+    pending = {}
+    if scheduler is not None:
+        for url in unique_urls:
+            if archive is None or not archive.has(url, archive.max_age):
+                pending[url] = scheduler.submit(url, headers={'User-Agent': USER_AGENT}, timeout=timeout)
+
+    for i, url in enumerate(unique_urls):
+        if progress_every and i % progress_every == 0:
+            print(f"\nProgress: {i}/{len(unique_urls)} ({i / max(len(unique_urls), 1) * 100:.1f}%)")
+        record = {'full_url': url}
+        try:
+            if url in pending:
+                response = pending.pop(url).result()
+                if archive is not None:
+                    archive.put_response(url, response)
+            elif archive is not None:
+                response = archive.fetch(url, session=session, timeout=timeout)
+            else:
+                response = session.get(url, timeout=timeout)
+            response.raise_for_status()
+            record.update(registry.extract(response.content, url))
+            if delay and scheduler is None and not getattr(response, 'from_archive', False):
+                time.sleep(delay)
+        except Exception as e:
+            record['fetch_error'] = f"{type(e).__name__}: {e}"
+        by_url[url] = record
+
+    failed = sum('fetch_error' in record for record in by_url.values())
+    print(f"\n✅ Scraped {len(by_url) - failed} pages, ❌ {failed} failed")
+    df = pd.DataFrame([by_url[url] for url in urls])
+    return df
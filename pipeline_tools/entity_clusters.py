@@ -0,0 +1,306 @@
+"""
+Cross-year entity resolution for directory places.
+
+Yelp_Lookup/8.ipynb assigns `place_identifier(year)` by walking rows in file order
+and 10.ipynb only compares consecutive years inside one identifier, so a stop
+whose rows are not adjacent in the file is never linked to itself.  Here every
+edition is clustered at once:
+
+    1. blocking: records share a block when they have the same normalized phone,
+       the same (ZIP, exit number), or the same geohash cell
+    2. scoring: candidate pairs inside blocks are scored in batches (label char
+       n-gram cosine plus phone / ZIP / exit / chain / distance agreement)
+    3. clustering: accepted pairs are merged best-first with union-find; two
+       clusters are never merged if they both already hold a record from the
+       same year (a stop is listed once per edition)
+
+    clustered, pairs = cluster_places(df)
+    clustered['place_identifier(year)'] = clustered['place_cluster_id']
+    df_analyzed, changes = analyze_place_changes(clustered)   # 10.ipynb, unchanged
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from .geohash import encode, haversine_m
+from .matching import clean_phone_number, clean_zip_code, extract_exit_numbers
+from .name_retrieval import NameAddressIndex
+
+# Weight of each agreement signal in the pair score (sums to 1)
+SCORE_WEIGHTS = {
+    'label_similarity': 0.45,
+    'phone_match': 0.2,
+    'zip_match': 0.1,
+    'exit_match': 0.1,
+    'chain_match': 0.05,
+    'near': 0.1,
+}
+
+# Blocks bigger than this are skipped (placeholder phones, dense city cells)
+MAX_BLOCK_SIZE = 200
+
+# Distance (m) under which two geocoded records count as "near"
+NEAR_METERS = 300
+
+
+class UnionFind:
+    """Disjoint sets over 0..n-1 that also track which years each set contains"""
+
+    def __init__(self, n, year_codes=None):
+        self.parent = np.arange(n, dtype=np.int64)
+        self.size = np.ones(n, dtype=np.int64)
+        # Bitmask of year positions per root; 0 means "don't check"
+        self.years = np.zeros(n, dtype=np.int64) if year_codes is None else (np.int64(1) << year_codes.astype(np.int64))
+
+    def find(self, x):
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, a, b, allow_year_overlap=False):
+        """Merge the sets of a and b; returns False if refused or already merged"""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        if not allow_year_overlap and self.years[root_a] & self.years[root_b]:
+            return False
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        self.years[root_a] |= self.years[root_b]
+        return True
+
+    def labels(self):
+        return np.array([self.find(i) for i in range(len(self.parent))], dtype=np.int64)
+
+
+def blocking_keys(df, phone_column='phone', zip_column='zip_code',
+                  exit_column='Exit_Number', lat_column='Latitude', lon_column='Longitude', geohash_precision=6):
+    """
+    Long table of (row, block key) for the three blocking schemes
+
+    Returns:
+        DataFrame with row (position in df) and key ("phone:...", "zipexit:...", "geo:...")
+    """
+    rows, keys = [], []
+    positions = np.arange(len(df))
+
+    if phone_column in df.columns:
+        phones = df[phone_column].map(clean_phone_number).str[-10:]
+        has = phones.str.len().ge(7).to_numpy()
+        rows.append(positions[has])
+        keys.append('phone:' + phones[has].to_numpy(dtype=object))
+
+    if zip_column in df.columns and exit_column in df.columns:
+        zips = df[zip_column].map(clean_zip_code)
+        exits = df[exit_column].map(extract_exit_numbers)
+        zip_exit = pd.DataFrame({'row': positions, 'zip': zips.to_numpy(), 'exit': exits.to_numpy()}).explode('exit')
+        zip_exit = zip_exit[(zip_exit['zip'].str.len() == 5) & zip_exit['exit'].notna()]
+        rows.append(zip_exit['row'].to_numpy(dtype=np.int64))
+        keys.append(('zipexit:' + zip_exit['zip'] + ':' + zip_exit['exit'].astype(str)).to_numpy(dtype=object))
+
+    if lat_column in df.columns and lon_column in df.columns:
+        cells = encode(df[lat_column], df[lon_column], geohash_precision)
+        has = pd.notna(cells)
+        rows.append(positions[has])
+        keys.append(np.array(['geo:' + c for c in cells[has]], dtype=object))
+
+    if not rows:
+        raise ValueError("No blocking columns found (need phone, zip_code + Exit_Number, or Latitude/Longitude)")
+    return pd.DataFrame({'row': np.concatenate(rows), 'key': np.concatenate(keys)})
+
+
+def candidate_pairs(blocks, years=None, max_block_size=MAX_BLOCK_SIZE, cross_year_only=True):
+    """
+    Unique (i, j) row pairs that share at least one block
+
+    Args:
+        blocks: Output of blocking_keys
+        years: Optional array of years by row, used with cross_year_only
+        max_block_size: Skip blocks with more rows than this
+        cross_year_only: Only pair records from different editions
+
+    Returns:
+        tuple of int64 arrays (i, j) with i < j
+    """
+    blocks = blocks.drop_duplicates()
+    sizes = blocks.groupby('key')['row'].transform('size')
+    skipped = blocks.loc[sizes > max_block_size, 'key'].nunique()
+    if skipped:
+        print(f"⚠️  Skipped {skipped} blocks larger than {max_block_size} rows")
+    blocks = blocks[(sizes > 1) & (sizes <= max_block_size)]
+
+    pair_codes = []
+    blocks = blocks.sort_values(['key', 'row'])
+    boundaries = np.flatnonzero(blocks['key'].to_numpy()[1:] != blocks['key'].to_numpy()[:-1]) + 1
+    for members in np.split(blocks['row'].to_numpy(dtype=np.int64), boundaries):
+        if len(members) < 2:
+            continue
+        i, j = np.triu_indices(len(members), 1)
+        pair_codes.append((members[i].astype(np.int64) << 32) | members[j].astype(np.int64))
+    if not pair_codes:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    codes = np.unique(np.concatenate(pair_codes))
+    first, second = codes >> 32, codes & 0xFFFFFFFF
+    if years is not None and cross_year_only:
+        different = years[first] != years[second]
+        first, second = first[different], second[different]
+    return first, second
+
+
+def _chain_agrees(chains, first, second):
+    """10.ipynb check_chain_match: missing on either side counts as agreement"""
+    normalized = pd.Series(chains).astype(object).map(lambda c: None if pd.isna(c) else str(c).lower().strip())
+    normalized = normalized.replace({'nan': None, 'none': None, '': None}).to_numpy(dtype=object)
+    a, b = normalized[first], normalized[second]
+    missing = pd.isna(a) | pd.isna(b)
+    return missing | (a == b)
+
+
+def score_pairs(df, first, second, label_column='label', phone_column='phone', zip_column='zip_code',
+                exit_column='Exit_Number', chain_column='chain', lat_column='Latitude', lon_column='Longitude',
+                batch_size=200_000, weights=None):
+    """
+    Feature columns and weighted score for candidate pairs
+
+    weights overrides SCORE_WEIGHTS (same keys).
+
+    Returns:
+        DataFrame with i, j, one column per SCORE_WEIGHTS signal and score
+    """
+    weights = weights or SCORE_WEIGHTS
+    features = pd.DataFrame({'i': first, 'j': second})
+    if len(first) == 0:
+        for name in list(weights) + ['score']:
+            features[name] = np.array([], dtype=float)
+        return features
+
+    label_df = pd.DataFrame({'label': df[label_column].to_numpy(), 'state': ''})
+    vectors = NameAddressIndex(label_df, text_columns=['label'], state_column='state', verbose=False).matrix.tocsr()
+    similarity = np.empty(len(first), dtype=np.float32)
+    for start in range(0, len(first), batch_size):
+        stop = start + batch_size
+        similarity[start:stop] = np.asarray(vectors[first[start:stop]].multiply(vectors[second[start:stop]]).sum(axis=1)).ravel()
+    features['label_similarity'] = similarity
+
+    def equal(values):
+        values = np.asarray(values, dtype=object)
+        a, b = values[first], values[second]
+        return (a == b) & (a != '') & pd.notna(a)
+
+    phones = df[phone_column].map(clean_phone_number).str[-10:] if phone_column in df.columns else pd.Series('', index=df.index)
+    features['phone_match'] = equal(phones).astype(float)
+    zips = df[zip_column].map(clean_zip_code) if zip_column in df.columns else pd.Series('', index=df.index)
+    features['zip_match'] = equal(zips).astype(float)
+
+    if exit_column in df.columns:
+        exits = df[exit_column].map(lambda e: frozenset(extract_exit_numbers(e))).to_numpy(dtype=object)
+        features['exit_match'] = np.fromiter((bool(exits[a] & exits[b]) for a, b in zip(first, second)), dtype=float, count=len(first))
+    else:
+        features['exit_match'] = 0.0
+
+    chains = df[chain_column] if chain_column in df.columns else pd.Series(None, index=df.index)
+    features['chain_match'] = _chain_agrees(chains, first, second).astype(float)
+
+    if lat_column in df.columns and lon_column in df.columns:
+        lat = pd.to_numeric(df[lat_column], errors='coerce').to_numpy()
+        lon = pd.to_numeric(df[lon_column], errors='coerce').to_numpy()
+        distance = haversine_m(lat[first], lon[first], lat[second], lon[second])
+        features['near'] = np.nan_to_num(distance <= NEAR_METERS, nan=0).astype(float)
+    else:
+        features['near'] = 0.0
+
+    features['score'] = sum(features[name] * weight for name, weight in weights.items())
+    return features
+
+
+def stable_cluster_ids(df, labels, year_column='year', label_column='label', zip_column='zip_code', phone_column='phone'):
+    """
+    Cluster ids derived from each cluster's earliest record, so unchanged
+    clusters keep the same id when the clustering is re-run
+
+    Clusters whose earliest records are identical (same year, label, ZIP and
+    phone, e.g. a listing printed twice in one edition that was not linked)
+    would hash to the same id; the first of them by row position keeps the plain
+    id and the others get -2, -3, ... so every cluster id is unique.
+    """
+    years = pd.to_numeric(df[year_column], errors='coerce').fillna(0).to_numpy() if year_column in df.columns else np.zeros(len(df))
+    order = np.lexsort((np.arange(len(df)), years, labels))
+    first_member = {}
+    for position in order:
+        first_member.setdefault(labels[position], position)
+
+    def key(position):
+        row = df.iloc[position]
+        parts = [row.get(year_column), row.get(label_column), clean_zip_code(row.get(zip_column)), clean_phone_number(row.get(phone_column))]
+        return 'PL' + hashlib.sha1('|'.join('' if pd.isna(p) else str(p) for p in parts).encode('utf-8')).hexdigest()[:12]
+
+    id_by_label = {}
+    taken = {}
+    for label, position in sorted(first_member.items(), key=lambda item: item[1]):
+        base = key(position)
+        taken[base] = taken.get(base, 0) + 1
+        id_by_label[label] = base if taken[base] == 1 else f"{base}-{taken[base]}"
+    return np.array([id_by_label[label] for label in labels], dtype=object)
+
+
+def cluster_places(df, threshold=0.55, year_column='year', max_block_size=MAX_BLOCK_SIZE, geohash_precision=6, **columns):
+    """
+    Cluster directory records from every edition into place ids
+
+    Args:
+        df: Directory records (all years), e.g. Yelp_Lookup/7_5.csv
+        threshold: Minimum pair score to link two records
+        year_column: Edition year column
+        max_block_size: Skip larger blocks
+        geohash_precision: Geohash cell size used for blocking
+        **columns: Column name overrides (label_column, phone_column, zip_column,
+            exit_column, chain_column, lat_column, lon_column)
+
+    Returns:
+        tuple: (copy of df with place_cluster_id, cluster_size and cluster_years,
+                scored pair table with an 'accepted' column)
+    """
+    block_columns = {k: v for k, v in columns.items() if k in ('phone_column', 'zip_column', 'exit_column', 'lat_column', 'lon_column')}
+    years = pd.to_numeric(df[year_column], errors='coerce').fillna(-1).astype(int).to_numpy()
+
+    blocks = blocking_keys(df, geohash_precision=geohash_precision, **block_columns)
+    first, second = candidate_pairs(blocks, years, max_block_size=max_block_size)
+    print(f"🔗 {len(df)} records, {blocks['key'].nunique()} blocks, {len(first)} candidate pairs")
+
+    pairs = score_pairs(df, first, second, **columns)
+    pairs = pairs.sort_values('score', ascending=False, kind='stable').reset_index(drop=True)
+
+    _, year_codes = np.unique(years, return_inverse=True)
+    union_find = UnionFind(len(df), year_codes)
+    accepted = np.zeros(len(pairs), dtype=bool)
+    refused = 0
+    for n, (i, j, score) in enumerate(zip(pairs['i'].to_numpy(), pairs['j'].to_numpy(), pairs['score'].to_numpy())):
+        if score < threshold:
+            break
+        if union_find.union(i, j):
+            accepted[n] = True
+        elif union_find.find(i) != union_find.find(j):
+            refused += 1
+    pairs['accepted'] = accepted
+
+    labels = union_find.labels()
+    result = df.copy()
+    result['place_cluster_id'] = stable_cluster_ids(df, labels, year_column=year_column,
+                                                    label_column=columns.get('label_column', 'label'),
+                                                    zip_column=columns.get('zip_column', 'zip_code'),
+                                                    phone_column=columns.get('phone_column', 'phone'))
+    result['cluster_size'] = result.groupby('place_cluster_id')['place_cluster_id'].transform('size')
+    result['cluster_years'] = result.groupby('place_cluster_id')[year_column].transform(
+        lambda s: ','.join(str(y) for y in sorted(pd.unique(s.dropna()))))
+
+    n_clusters = result['place_cluster_id'].nunique()
+    print(f"✅ {accepted.sum()} links accepted, {refused} refused (same-year conflict), "
+          f"{n_clusters} clusters ({(result['cluster_size'] > 1).sum()} records in multi-year clusters)")
+    return result, pairs
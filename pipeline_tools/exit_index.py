@@ -0,0 +1,398 @@
+"""
+Interval join between directory exit references and OSM motorway junctions.
+
+Directory rows say "I-80 Exit 160 EB/164 WB"; Overpass returns
+highway=motorway_junction nodes with `ref` (the exit number) and
+`destination:ref`, and the motorway ways through them carry the route `ref`.
+Both sides are parsed into (state, route, exit interval, suffix, direction) keys.
+Junction keys are stored sorted by (route key, exit number), and every directory
+key is resolved with two searchsorted calls plus an overlap filter, so the join
+is a single vectorized pass instead of a row-by-row scan.
+
+    junctions = junctions_from_overpass(query_overpass_direct(junction_query('CA')), state='CA')
+    index = ExitJoinIndex(junctions)
+    candidates = index.join(df)                      # df_index -> junction candidates
+    df = resolve_exit_coordinates(df, candidates)    # Exit_Latitude / Exit_Longitude
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from .geohash import haversine_m
+
+US_STATE_CODES = {
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'DC', 'FL', 'GA', 'HI', 'ID', 'IL', 'IN', 'IA', 'KS',
+    'KY', 'LA', 'ME', 'MD', 'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ', 'NM', 'NY', 'NC',
+    'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY',
+}
+
+ROAD_NAME_ABBREVIATIONS = {
+    'TURNPIKE': 'TPKE', 'TPK': 'TPKE', 'TNPK': 'TPKE', 'PARKWAY': 'PKWY', 'PKY': 'PKWY',
+    'EXPRESSWAY': 'EXPY', 'EXPWY': 'EXPY', 'FREEWAY': 'FWY', 'THRUWAY': 'THWY', 'TOLLWAY': 'TLWY',
+}
+
+DIRECTIONS = {
+    'NB': 'N', 'SB': 'S', 'EB': 'E', 'WB': 'W', 'N': 'N', 'S': 'S', 'E': 'E', 'W': 'W',
+    'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
+    'NORTHBOUND': 'N', 'SOUTHBOUND': 'S', 'EASTBOUND': 'E', 'WESTBOUND': 'W',
+}
+
+# Two junction nodes further apart than this are different places, not two carriageways
+SAME_EXIT_METERS = 2500
+
+# OSM oneway values; highway=motorway is one-way unless tagged otherwise
+ONEWAY_FORWARD = ('yes', 'true', '1')
+ONEWAY_REVERSED = ('-1',)
+
+KEY_COLUMNS = ['state', 'route', 'exit_lo', 'exit_hi', 'suffix', 'direction']
+
+_ROUTE_PATTERN = re.compile(
+    r'\b(?:(INTERSTATE|IH|I)|(U\s?S|US\s?HWY|US\s?HIGHWAY)|(SR|STATE\s?ROUTE|STATE\s?HWY|HWY|HIGHWAY|RTE|ROUTE|[A-Z]{2}))'
+    r'\s*-?\s*(\d+[A-Z]?)((?:\s*/\s*\d+[A-Z]?)*)'
+)
+_EXIT_PART_PATTERN = re.compile(r'(\d+)([A-Z]?)(?:\s*(?:-|–|TO|THRU)\s*(\d+)?([A-Z]?))?')
+
+
+def _clean_upper(text):
+    if text is None or (not isinstance(text, str) and pd.isna(text)):
+        return ''
+    return ' '.join(re.sub(r'[^A-Z0-9/;,&\- ]', ' ', str(text).upper().replace('.', '')).split())
+
+
+def parse_route_keys(road):
+    """
+    Route keys mentioned in a road string
+
+    "I-80/94" -> ['I80', 'I94'], "US 60-70" -> ['US60', 'US70'], "CA 99" / "SR 99" -> ['SR99'],
+    "Garden State Pkwy" -> ['GARDEN STATE PKWY'] (named roads keep their abbreviated name)
+    """
+    text = _clean_upper(road)
+    if not text:
+        return []
+    keys = []
+    for interstate, us, state_route, number, more in _ROUTE_PATTERN.findall(text):
+        if state_route and len(state_route) == 2 and state_route not in US_STATE_CODES | {'SR'}:
+            continue
+        prefix = 'I' if interstate else 'US' if us else 'SR'
+        numbers = [number] + re.findall(r'\d+[A-Z]?', more)
+        keys.extend(f"{prefix}{n}" for n in numbers)
+    # "US 60-70" style concurrencies
+    for prefix, first, second in re.findall(r'\b(I|US)\s*-?\s*(\d+)\s*-\s*(\d+)\b', text):
+        keys.extend([f"{prefix}{first}", f"{prefix}{second}"])
+    if not keys:
+        words = [ROAD_NAME_ABBREVIATIONS.get(w, w) for w in re.sub(r'[^A-Z0-9 ]', ' ', text).split()]
+        if words:
+            keys.append(' '.join(words))
+    return list(dict.fromkeys(keys))
+
+
+def parse_exit_ref(exit_ref):
+    """
+    Exit intervals in an exit reference
+
+    Returns a list of (lo, hi, suffix, direction) tuples:
+    "162" -> [(162, 162, '', '')], "13A" -> [(13, 13, 'A', '')], "26A-B" -> [(26, 26, 'AB', '')],
+    "12-14" -> [(12, 14, '', '')], "160 EB/164 WB" -> [(160, 160, '', 'E'), (164, 164, '', 'W')],
+    "23A;23B" (OSM) -> [(23, 23, 'A', ''), (23, 23, 'B', '')]
+    """
+    if exit_ref is None or (not isinstance(exit_ref, str) and pd.isna(exit_ref)):
+        return []
+    if isinstance(exit_ref, (int, float, np.integer, np.floating)):
+        return [(int(exit_ref), int(exit_ref), '', '')]
+    text = _clean_upper(re.sub(r'(\d)\.\d+', r'\1', str(exit_ref)))
+    text = re.sub(r'\b(?:EXIT|EXT|EX|X)\b', ' ', text)
+    intervals = []
+    for part in re.split(r'[/;,&]|\bAND\b', text):
+        direction = ''
+        for word in part.split():
+            if word in DIRECTIONS:
+                direction = DIRECTIONS[word]
+        # A lone A-D after a space is a suffix ("326 B"); N/S/E/W there are directions
+        part = re.sub(r'(\d)\s+([A-D])\b', r'\1\2', part)
+        match = _EXIT_PART_PATTERN.search(part)
+        if not match:
+            continue
+        lo, lo_suffix, hi, hi_suffix = match.groups()
+        lo = int(lo)
+        if hi:
+            hi = int(hi)
+            suffix = lo_suffix if hi == lo and lo_suffix == hi_suffix else ''
+            if hi < lo:
+                lo, hi = hi, lo
+        elif hi_suffix and lo_suffix:
+            hi, suffix = lo, ''.join(chr(c) for c in range(ord(lo_suffix), ord(hi_suffix) + 1))
+        else:
+            hi, suffix = lo, lo_suffix
+        intervals.append((lo, hi, suffix, direction))
+    return list(dict.fromkeys(intervals))
+
+
+def exit_keys(df, road_column='OCR_Main_Road', exit_columns=('OCR_Exit_Number',), state_column='OCR_state'):
+    """
+    One row per (directory row, route, exit interval)
+
+    Returns:
+        DataFrame with df_index plus KEY_COLUMNS
+    """
+    exit_columns = [c for c in exit_columns if c in df.columns]
+    rows = []
+    for df_index, road, state, *exits in zip(df.index, df[road_column], df[state_column],
+                                              *[df[c] for c in exit_columns]):
+        routes = parse_route_keys(road)
+        if not routes:
+            continue
+        state = _clean_upper(state)
+        intervals = list(dict.fromkeys(i for value in exits for i in parse_exit_ref(value)))
+        for route in routes:
+            for lo, hi, suffix, direction in intervals:
+                rows.append((df_index, state, route, lo, hi, suffix, direction))
+    return pd.DataFrame(rows, columns=['df_index'] + KEY_COLUMNS)
+
+
+def junction_query(state, bbox=None):
+    """
+    Overpass query for a state's motorway junctions plus the motorway ways through them
+
+    Args:
+        state: Two-letter state code (used through the ISO3166-2 area)
+        bbox: Optional (south, west, north, east) instead of the state area
+    """
+    area = f"({bbox[0]},{bbox[1]},{bbox[2]},{bbox[3]})" if bbox else "(area.searchArea)"
+    header = "" if bbox else f'area["ISO3166-2"="US-{state}"]->.searchArea;\n'
+    return (
+        "[out:json][timeout:300];\n"
+        f"{header}"
+        f'node["highway"="motorway_junction"]{area}->.junctions;\n'
+        "way(bn.junctions)[\"highway\"~\"^motorway$|^trunk$\"]->.ways;\n"
+        "(.junctions; .ways; node(w.ways););\n"
+        "out body;\n"
+    )
+
+
+def _signed_direction(route, d_lat, d_lon):
+    """
+    Signed direction of travel along a route
+
+    Even-numbered routes are signed E/W and odd-numbered ones N/S, whatever the
+    local bearing; named roads use whichever axis dominates.
+    """
+    number = re.search(r'(\d+)', route)
+    if number:
+        east_west = int(number.group(1)) % 2 == 0
+    else:
+        east_west = abs(d_lon) > abs(d_lat)
+    if east_west:
+        return 'E' if d_lon > 0 else 'W'
+    return 'N' if d_lat > 0 else 'S'
+
+
+def _travel_step(way_tags):
+    """+1 if traffic follows the way's node order, -1 if it runs against it, 0 if two-way"""
+    oneway = way_tags.get('oneway')
+    if oneway is None:
+        return 1 if way_tags.get('highway') == 'motorway' else 0
+    oneway = str(oneway).lower()
+    if oneway in ONEWAY_FORWARD:
+        return 1
+    if oneway in ONEWAY_REVERSED:
+        return -1
+    return 0
+
+
+def junctions_from_overpass(result, state):
+    """
+    Junction table from an Overpass JSON result of junction_query()
+
+    Each junction gets the route refs and names of the motorway ways through it
+    and, for one-way carriageways, the direction of travel at the junction.
+    Routes named only in destination:ref are kept with route_source 'destination'.
+
+    Returns:
+        DataFrame with junction_id, lat, lon, state, exit_ref, route, route_source,
+        direction, name and destination
+    """
+    elements = (result or {}).get('elements', [])
+    nodes = {e['id']: e for e in elements if e['type'] == 'node'}
+    ways_by_node = {}
+    for way in (e for e in elements if e['type'] == 'way'):
+        for position, node_id in enumerate(way.get('nodes', [])):
+            ways_by_node.setdefault(node_id, []).append((way, position))
+
+    rows = []
+    for node in nodes.values():
+        tags = node.get('tags', {})
+        if tags.get('highway') != 'motorway_junction':
+            continue
+        exit_ref = tags.get('ref') or tags.get('junction:ref')
+        motorway_routes, heading = [], None
+        for way, position in ways_by_node.get(node['id'], []):
+            way_tags = way.get('tags', {})
+            motorway_routes.extend(parse_route_keys(way_tags.get('ref', '').replace(';', '/')))
+            if way_tags.get('name'):
+                motorway_routes.extend(parse_route_keys(way_tags['name']))
+            step = _travel_step(way_tags)
+            way_nodes = way.get('nodes', [])
+            if step and 0 <= position + step < len(way_nodes) and way_nodes[position + step] in nodes:
+                nxt = nodes[way_nodes[position + step]]
+                heading = (nxt['lat'] - node['lat'], (nxt['lon'] - node['lon']) * np.cos(np.radians(node['lat'])))
+        destination_routes = parse_route_keys(tags.get('destination:ref', '').replace(';', '/'))
+        common = {'junction_id': node['id'], 'lat': node['lat'], 'lon': node['lon'], 'state': state,
+                  'exit_ref': exit_ref, 'name': tags.get('name'),
+                  'destination': tags.get('destination') or tags.get('exit_to')}
+        for route in dict.fromkeys(motorway_routes):
+            direction = _signed_direction(route, *heading) if heading else ''
+            rows.append({**common, 'direction': direction, 'route': route, 'route_source': 'motorway'})
+        for route in dict.fromkeys(destination_routes):
+            if route not in motorway_routes:
+                rows.append({**common, 'direction': '', 'route': route, 'route_source': 'destination'})
+    junctions = pd.DataFrame(rows, columns=['junction_id', 'lat', 'lon', 'state', 'exit_ref', 'direction',
+                                            'name', 'destination', 'route', 'route_source'])
+    print(f"✅ {junctions['junction_id'].nunique()} junctions in {state}, "
+          f"{(junctions['route_source'] == 'motorway').sum()} motorway route keys")
+    return junctions
+
+
+class ExitJoinIndex:
+    """Junction exit intervals sorted by (state, route, exit number)"""
+
+    def __init__(self, junctions):
+        """
+        Args:
+            junctions: junctions_from_overpass() output (or any frame with junction_id,
+                lat, lon, state, route, exit_ref, direction and route_source)
+        """
+        rows = []
+        for position, (state, route, exit_ref, direction) in enumerate(
+                zip(junctions['state'], junctions['route'], junctions['exit_ref'], junctions['direction'])):
+            for lo, hi, suffix, _ in parse_exit_ref(exit_ref):
+                rows.append((position, _clean_upper(state), route, lo, hi, suffix, direction or ''))
+        keys = pd.DataFrame(rows, columns=['position', 'state', 'route', 'exit_lo', 'exit_hi', 'suffix', 'direction'])
+        keys['route_code'] = pd.factorize(keys['state'] + '|' + keys['route'])[0]
+        keys = keys.sort_values(['route_code', 'exit_lo'], kind='stable').reset_index(drop=True)
+
+        self.junctions = junctions.reset_index(drop=True)
+        self.keys = keys
+        self.route_codes = dict(zip(keys['state'] + '|' + keys['route'], keys['route_code']))
+        self.max_width = int((keys['exit_hi'] - keys['exit_lo']).max()) if len(keys) else 0
+        self._sorted = self._composite(keys['route_code'].to_numpy(), keys['exit_lo'].to_numpy())
+        print(f"✅ Exit index: {len(keys)} junction keys on {len(self.route_codes)} state routes")
+
+    @staticmethod
+    def _composite(route_code, exit_number):
+        return route_code.astype(np.int64) * 1_000_000 + np.clip(exit_number, 0, 999_999).astype(np.int64)
+
+    def join(self, df, road_column='OCR_Main_Road', exit_columns=('OCR_Exit_Number',), state_column='OCR_state'):
+        """
+        Candidate junctions for every directory row
+
+        Returns:
+            DataFrame with df_index, junction_id, lat, lon, route, exit_ref,
+            route_source, ref_direction (direction of the directory's exit ref),
+            suffix_match and direction_match
+        """
+        queries = exit_keys(df, road_column, exit_columns, state_column)
+        route_code = (queries['state'] + '|' + queries['route']).map(self.route_codes)
+        queries = queries[route_code.notna()].reset_index(drop=True)
+        route_code = route_code.dropna().to_numpy(dtype=np.int64)
+        if queries.empty:
+            return self._empty()
+
+        lo, hi = queries['exit_lo'].to_numpy(), queries['exit_hi'].to_numpy()
+        start = np.searchsorted(self._sorted, self._composite(route_code, lo - self.max_width), side='left')
+        end = np.searchsorted(self._sorted, self._composite(route_code, hi), side='right')
+        counts = end - start
+        query_rows = np.repeat(np.arange(len(queries)), counts)
+        key_rows = np.concatenate([np.arange(s, e) for s, e in zip(start, end)]) if counts.sum() else np.array([], dtype=np.int64)
+
+        keys = self.keys.iloc[key_rows].reset_index(drop=True)
+        q = queries.iloc[query_rows].reset_index(drop=True)
+        overlap = keys['exit_hi'].to_numpy() >= q['exit_lo'].to_numpy()
+        suffix_match = [not a or not b or bool(set(a) & set(b)) for a, b in zip(q['suffix'], keys['suffix'])]
+        direction_match = [not a or not b or a == b for a, b in zip(q['direction'], keys['direction'])]
+        keep = overlap & np.array(suffix_match, dtype=bool) & np.array(direction_match, dtype=bool)
+
+        keys, q = keys[keep], q[keep]
+        junctions = self.junctions.iloc[keys['position'].to_numpy()]
+        candidates = pd.DataFrame({
+            'df_index': q['df_index'].to_numpy(),
+            'junction_id': junctions['junction_id'].to_numpy(),
+            'lat': junctions['lat'].to_numpy(),
+            'lon': junctions['lon'].to_numpy(),
+            'route': q['route'].to_numpy(),
+            'exit_ref': junctions['exit_ref'].to_numpy(),
+            'route_source': junctions['route_source'].to_numpy(),
+            'ref_direction': q['direction'].to_numpy(),
+            'suffix_match': (q['suffix'].to_numpy() != '') & (q['suffix'].to_numpy() == keys['suffix'].to_numpy()),
+            'direction_match': (q['direction'].to_numpy() != '') & (q['direction'].to_numpy() == keys['direction'].to_numpy()),
+        })
+        candidates = candidates.drop_duplicates(['df_index', 'ref_direction', 'junction_id']).reset_index(drop=True)
+        print(f"🔗 {candidates['df_index'].nunique()}/{len(df)} rows joined to {len(candidates)} junction candidates")
+        return candidates
+
+    @staticmethod
+    def _empty():
+        return pd.DataFrame(columns=['df_index', 'junction_id', 'lat', 'lon', 'route', 'exit_ref',
+                                     'route_source', 'ref_direction', 'suffix_match', 'direction_match'])
+
+
+def resolve_exit_coordinates(df, candidates, same_exit_meters=SAME_EXIT_METERS):
+    """
+    Exit coordinates for each directory row from its junction candidates
+
+    Motorway-route candidates beat destination:ref ones, then exact suffix and
+    direction matches.  When the best candidates (e.g. both carriageways) lie
+    within same_exit_meters of each other their centroid is used; otherwise the
+    row is left 'ambiguous'.
+
+    A compound directional ref ("160 EB/164 WB") names one stop reached from a
+    different exit in each direction, so each directional ref is resolved on its
+    own and the row gets the midpoint of the per-direction junctions
+    ('directional').  It is only ambiguous if one direction is.
+
+    Returns:
+        DataFrame: copy of df with Exit_Latitude, Exit_Longitude, Exit_Junction_Count
+        and Exit_Match ('unique', 'merged', 'directional', 'ambiguous' or None)
+    """
+    result_df = df.copy()
+    for col in ['Exit_Latitude', 'Exit_Longitude']:
+        result_df[col] = np.nan
+    result_df['Exit_Junction_Count'] = 0
+    result_df['Exit_Match'] = None
+    if candidates.empty:
+        return result_df
+
+    # Rows whose refs all carry distinct directions are grouped per direction; everything else is one group
+    ref_direction = candidates['ref_direction'].fillna('')
+    directions = ref_direction.groupby(candidates['df_index'])
+    directional = (directions.transform('nunique') > 1) & ~(ref_direction == '').groupby(
+        candidates['df_index']).transform('any')
+    ranked = candidates.assign(
+        _group=ref_direction.where(directional, ''),
+        _rank=(candidates['route_source'] != 'motorway').astype(int) * 4
+        + (~candidates['suffix_match'].astype(bool)).astype(int) * 2
+        + (~candidates['direction_match'].astype(bool)).astype(int)
+    )
+    best = ranked[ranked['_rank'] == ranked.groupby(['df_index', '_group'])['_rank'].transform('min')]
+    groups = best.groupby(['df_index', '_group']).agg(lat=('lat', 'mean'), lon=('lon', 'mean'))
+    spread = best.merge(groups, left_on=['df_index', '_group'], right_index=True, suffixes=('', '_mean'))
+    spread['distance'] = haversine_m(spread['lat'], spread['lon'], spread['lat_mean'], spread['lon_mean'])
+    groups['same_place'] = spread.groupby(['df_index', '_group'])['distance'].max() * 2 <= same_exit_meters
+
+    summary = groups.groupby(level='df_index').agg(
+        lat=('lat', 'mean'), lon=('lon', 'mean'), same_place=('same_place', 'all'), groups=('lat', 'size'))
+    summary['count'] = best.groupby('df_index')['junction_id'].nunique()
+
+    resolved = summary[summary['same_place']]
+    result_df.loc[resolved.index, 'Exit_Latitude'] = resolved['lat']
+    result_df.loc[resolved.index, 'Exit_Longitude'] = resolved['lon']
+    result_df.loc[summary.index, 'Exit_Junction_Count'] = summary['count']
+    result_df.loc[summary.index, 'Exit_Match'] = np.select(
+        [~summary['same_place'], summary['groups'] > 1, summary['count'] == 1],
+        ['ambiguous', 'directional', 'unique'], 'merged')
+
+    counts = result_df['Exit_Match'].value_counts()
+    print(f"📍 Exit coordinates: {counts.get('unique', 0)} unique, {counts.get('merged', 0)} merged carriageways, "
+          f"{counts.get('directional', 0)} directional pairs, {counts.get('ambiguous', 0)} ambiguous")
+    return result_df
@@ -0,0 +1,480 @@
+"""
+One adaptive fetch scheduler for every scraper, in place of hard-coded sleeps.
+
+The scrapers each pace themselves with a fixed time.sleep (0.3 s, 0.5 s, 1 s)
+whatever the server is doing.  FetchScheduler keeps a priority queue per host
+and decides how many requests each host gets at once from how it responds
+(AIMD, as in TCP congestion control):
+
+  - every response that comes back without slowing down adds about one request
+    of concurrency per round trip, up to max_concurrency
+  - a 429/503, a 5xx, a connection error or a latency well above the host's
+    best observed latency cuts concurrency (by half for errors, a little for
+    latency), at most once per round trip; at one request in flight the gap
+    between requests doubles instead
+  - Retry-After (seconds or HTTP date) holds the whole host until it expires,
+    and the request is retried
+
+Each host keeps its own pooled requests.Session objects, so connections stay
+alive between requests.  host_stats() reports per-host throughput and outcomes.
+
+The scheduler has requests' get() signature, so it drops in wherever a session
+is accepted:
+
+    scheduler = FetchScheduler()
+    response = scheduler.get(url, headers=headers)                  # blocking, like requests.get
+    futures = [scheduler.submit(url, priority=1) for url in urls]   # concurrent
+    details = scrape_details(urls, archive=archive, scheduler=scheduler)
+    crawler = ListingCrawler(..., session_factory=lambda: scheduler, per_host=8, delay=0)
+    scheduler.print_stats()
+
+serve_throttling_stub runs a local server with a rate limit, a concurrency
+limit and load-dependent latency for trying settings without touching a real site.
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+THROTTLE_STATUSES = (429, 503)
+LATENCY_FACTOR = 2.0        # latency above this multiple of the host's best counts as congestion
+LATENCY_SLACK = 0.05        # ... and at least this many seconds above it
+LATENCY_DECREASE = 0.8
+ERROR_DECREASE = 0.5
+MIN_PACE = 0.05             # first gap between requests once concurrency is down to one
+MAX_PACE = 60.0
+RETRY_BACKOFF = 1.0         # seconds before the first retry of a failed request; doubles per attempt
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date); None if absent or invalid"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (now if now is not None else time.time()))
+
+
+class _Request:
+    def __init__(self, priority, seq, method, url, kwargs, future):
+        self.priority = priority
+        self.seq = seq
+        self.method = method
+        self.url = url
+        self.kwargs = kwargs
+        self.future = future
+        self.attempt = 0
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class HostState:
+    """Queue, AIMD window and counters for one host"""
+
+    def __init__(self, host, initial_concurrency=1, max_concurrency=8, min_interval=0.0):
+        self.host = host
+        self.queue = []
+        self.window = float(initial_concurrency)
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self.pace = min_interval
+        self.in_flight = 0
+        self.next_allowed = 0.0
+        self.last_start = 0.0
+        self.last_decrease = 0.0
+        self.min_latency = None
+        self.sessions = []
+        self.stats = {'requests': 0, 'ok': 0, 'throttled': 0, 'server_errors': 0, 'errors': 0, 'retries': 0,
+                      'bytes': 0, 'latency_total': 0.0, 'first_start': None, 'last_end': None, 'peak_window': self.window}
+
+    def concurrency(self):
+        return max(1, int(self.window))
+
+    def ready_at(self):
+        """Monotonic time the next request may start (inf when the window is full)"""
+        if self.in_flight >= self.concurrency():
+            return float('inf')
+        return max(self.next_allowed, self.last_start + self.pace)
+
+    def on_success(self, latency, now):
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+        else:
+            # Let the baseline drift up slowly so a permanently slower server is not penalized forever
+            self.min_latency *= 1.001
+        if latency > max(self.min_latency * LATENCY_FACTOR, self.min_latency + LATENCY_SLACK):
+            self.decrease(now, LATENCY_DECREASE)
+            return
+        if self.pace > self.min_interval:
+            self.pace = max(self.min_interval, self.pace / 2 if self.pace > MIN_PACE else self.min_interval)
+        else:
+            self.window = min(self.max_concurrency, self.window + 1 / self.window)
+            self.stats['peak_window'] = max(self.stats['peak_window'], self.window)
+
+    def decrease(self, now, factor):
+        """Multiplicative decrease, once per round trip; below one request in flight, slow the pace"""
+        if now - self.last_decrease < (self.min_latency or 0.1):
+            return
+        self.last_decrease = now
+        if self.window > 1:
+            self.window = max(1.0, self.window * factor)
+        else:
+            self.pace = min(MAX_PACE, max(self.pace * 2, MIN_PACE, self.min_interval))
+
+    def summary(self):
+        s = self.stats
+        elapsed = (s['last_end'] - s['first_start']) if s['first_start'] is not None and s['last_end'] else 0.0
+        done = s['ok'] + s['throttled'] + s['server_errors'] + s['errors']
+        return {
+            'host': self.host,
+            'requests': s['requests'],
+            'ok': s['ok'],
+            'throttled': s['throttled'],
+            'server_errors': s['server_errors'],
+            'errors': s['errors'],
+            'retries': s['retries'],
+            'queued': len(self.queue),
+            'concurrency': round(self.window, 2),
+            'peak_concurrency': round(s['peak_window'], 2),
+            'pace_s': round(self.pace, 3),
+            'min_latency_ms': round(self.min_latency * 1000, 1) if self.min_latency is not None else None,
+            'mean_latency_ms': round(s['latency_total'] / done * 1000, 1) if done else None,
+            'req_per_s': round(s['ok'] / elapsed, 2) if elapsed > 0 else None,
+            'MB': round(s['bytes'] / 1e6, 2),
+            'sessions': len(self.sessions),
+        }
+
+
+class FetchScheduler:
+    """Per-host priority queues with AIMD concurrency, Retry-After and pooled keep-alive sessions"""
+
+    def __init__(self, max_workers=32, initial_concurrency=1, max_concurrency=8, min_interval=0.0,
+                 host_limits=None, max_retries=3, timeout=30, session_factory=None, metrics=None):
+        """
+        Args:
+            max_workers: Requests in flight across all hosts
+            initial_concurrency: Starting window per host
+            max_concurrency: Window cap per host
+            min_interval: Politeness floor: seconds between request starts to one host
+            host_limits: {host: {'max_concurrency': n, 'min_interval': s}} overrides
+            max_retries: Retries after a throttle, 5xx or connection error (then the
+                last response is returned, or the exception raised)
+            timeout: Default request timeout in seconds
+            session_factory: Returns a requests.Session-like object (pooled per host)
+            metrics: Optional instrumentation.RunMetrics; every attempt is recorded with the host as service
+        """
+        self.max_workers = max_workers
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self.host_limits = dict(host_limits or {})
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.session_factory = session_factory
+        self.metrics = metrics
+
+        self._hosts = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._outstanding = 0
+        self._closed = False
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fetch')
+        self._dispatcher = threading.Thread(target=self._dispatch, name='fetch-dispatch', daemon=True)
+        self._dispatcher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _new_session(self):
+        if self.session_factory is not None:
+            return self.session_factory()
+        import requests
+        session = requests.Session()
+        session.headers['User-Agent'] = USER_AGENT
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _host(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            limits = self.host_limits.get(host, {})
+            state = HostState(host, initial_concurrency=self.initial_concurrency,
+                              max_concurrency=limits.get('max_concurrency', self.max_concurrency),
+                              min_interval=limits.get('min_interval', self.min_interval))
+            self._hosts[host] = state
+        return state
+
+    # ---- submitting ----------------------------------------------------------
+
+    def submit(self, url, priority=0, method='GET', **kwargs):
+        """
+        Queue a request
+
+        Args:
+            url: Request URL
+            priority: Lower numbers are sent first within a host
+            method: HTTP method
+            **kwargs: Passed to session.request (headers, params, timeout, ...)
+
+        Returns:
+            concurrent.futures.Future resolving to the requests.Response
+        """
+        future = Future()
+        kwargs.setdefault('timeout', self.timeout)
+        request = _Request(priority, next(self._seq), method, url, kwargs, future)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("FetchScheduler is closed")
+            self._outstanding += 1
+            heapq.heappush(self._host(urllib.parse.urlsplit(url).netloc).queue, request)
+            self._cond.notify_all()
+        return future
+
+    def get(self, url, priority=0, **kwargs):
+        """Blocking GET through the scheduler (same call shape as requests.get / Session.get)"""
+        return self.submit(url, priority=priority, **kwargs).result()
+
+    def map(self, urls, priority=0, **kwargs):
+        """
+        Fetch many URLs concurrently
+
+        Returns:
+            list of responses in input order (the exception instead, for requests that failed)
+        """
+        futures = [self.submit(url, priority=priority, **kwargs) for url in urls]
+        return [f.exception() or f.result() for f in futures]
+
+    # ---- dispatching ---------------------------------------------------------
+
+    def _dispatch(self):
+        with self._cond:
+            while not (self._closed and self._outstanding == 0):
+                now = time.monotonic()
+                wake = None
+                total_in_flight = sum(h.in_flight for h in self._hosts.values())
+                for host in self._hosts.values():
+                    while host.queue and total_in_flight < self.max_workers:
+                        ready_at = host.ready_at()
+                        if ready_at > now:
+                            if ready_at != float('inf'):
+                                wake = ready_at if wake is None else min(wake, ready_at)
+                            break
+                        request = heapq.heappop(host.queue)
+                        host.in_flight += 1
+                        host.last_start = now
+                        total_in_flight += 1
+                        if host.stats['first_start'] is None:
+                            host.stats['first_start'] = now
+                        self._pool.submit(self._run, host, request)
+                self._cond.wait(timeout=None if wake is None else max(0.0, wake - now))
+
+    def _run(self, host, request):
+        with self._cond:
+            session = host.sessions.pop() if host.sessions else None
+        if session is None:
+            session = self._new_session()
+
+        start = time.monotonic()
+        response, error = None, None
+        try:
+            response = session.request(request.method, request.url, **request.kwargs)
+            body_size = len(response.content)
+        except Exception as e:
+            error = e
+        latency = time.monotonic() - start
+        if self.metrics is not None:
+            self.metrics.record_request(host.host, latency, status=response.status_code if response is not None else None,
+                                        error=type(error).__name__ if error else None)
+
+        retry_delay = None
+        with self._cond:
+            now = time.monotonic()
+            host.sessions.append(session)
+            host.in_flight -= 1
+            stats = host.stats
+            stats['requests'] += 1
+            stats['latency_total'] += latency
+            stats['last_end'] = now
+
+            if error is not None:
+                stats['errors'] += 1
+                host.decrease(now, ERROR_DECREASE)
+                retry_delay = RETRY_BACKOFF * 2 ** request.attempt
+            elif response.status_code in THROTTLE_STATUSES:
+                stats['throttled'] += 1
+                host.decrease(now, ERROR_DECREASE)
+                wait = parse_retry_after(response.headers.get('Retry-After'))
+                if wait is not None:
+                    host.next_allowed = max(host.next_allowed, now + wait)
+                retry_delay = 0.0 if wait is not None else RETRY_BACKOFF * 2 ** request.attempt
+            elif response.status_code >= 500:
+                stats['server_errors'] += 1
+                host.decrease(now, ERROR_DECREASE)
+                retry_delay = RETRY_BACKOFF * 2 ** request.attempt
+            else:
+                stats['ok'] += 1
+                stats['bytes'] += body_size
+                host.on_success(latency, now)
+
+            retrying = retry_delay is not None and request.attempt < self.max_retries and not self._closed
+            if retrying:
+                request.attempt += 1
+                stats['retries'] += 1
+                if retry_delay == 0:
+                    heapq.heappush(host.queue, request)
+            else:
+                self._outstanding -= 1
+            self._cond.notify_all()
+
+        if retrying:
+            if retry_delay > 0:
+                timer = threading.Timer(retry_delay, self._requeue, args=(host, request))
+                timer.daemon = True
+                timer.start()
+        elif error is not None:
+            request.future.set_exception(error)
+        else:
+            request.future.set_result(response)
+
+    def _requeue(self, host, request):
+        with self._cond:
+            heapq.heappush(host.queue, request)
+            self._cond.notify_all()
+
+    # ---- reporting and shutdown ----------------------------------------------
+
+    def host_stats(self):
+        """Per-host throughput, outcomes and current window as a DataFrame"""
+        with self._cond:
+            rows = [host.summary() for host in self._hosts.values()]
+        return pd.DataFrame(rows)
+
+    def print_stats(self):
+        for row in self.host_stats().to_dict('records'):
+            print(f"🌐 {row['host']}: {row['ok']}/{row['requests']} ok, {row['throttled']} throttled, "
+                  f"{row['server_errors']} 5xx, {row['errors']} errors, {row['retries']} retries | "
+                  f"{row['req_per_s']} req/s, window {row['concurrency']} (peak {row['peak_concurrency']}), "
+                  f"latency {row['mean_latency_ms']} ms (best {row['min_latency_ms']} ms)")
+
+    def wait(self):
+        """Block until every submitted request has resolved"""
+        with self._cond:
+            while self._outstanding:
+                self._cond.wait()
+
+    def close(self, wait=True):
+        """Stop accepting work; with wait, finish what is queued first"""
+        if wait:
+            self.wait()
+        with self._cond:
+            self._closed = True
+            for host in self._hosts.values():
+                while host.queue:
+                    request = heapq.heappop(host.queue)
+                    self._outstanding -= 1
+                    request.future.cancel()
+            self._cond.notify_all()
+        self._dispatcher.join()
+        self._pool.shutdown(wait=wait)
+        for host in self._hosts.values():
+            for session in host.sessions:
+                if hasattr(session, 'close'):
+                    session.close()
+
+
+def serve_throttling_stub(rate_limit=20.0, max_concurrent=4, latency=0.02, error_rate=0.0, retry_after=1,
+                          body_bytes=2000, host='127.0.0.1', port=0, seed=0):
+    """
+    Serve pages on localhost that throttle like a real site, for testing the scheduler
+
+    Args:
+        rate_limit: Requests per second allowed (token bucket); above it -> 429
+        max_concurrent: Concurrent requests allowed; above it -> 503
+        latency: Base response time in seconds; grows with the requests in flight
+        error_rate: Share of requests answered with a random 500
+        retry_after: Retry-After seconds sent with 429/503 (None to omit the header)
+        body_bytes: Size of each 200 body
+        host: Interface to bind
+        port: Port to bind (0 = pick a free port)
+        seed: Seed for the error draws
+
+    Returns:
+        tuple: (server, base_url, hits) where hits counts responses by status code
+        and distinct client connections under 'connections'; call server.shutdown() when done
+    """
+    hits = {'connections': 0}
+    lock = threading.Lock()
+    bucket = {'tokens': rate_limit, 'at': time.monotonic(), 'in_flight': 0}
+    rng = random.Random(seed)
+    body = (b'<html><body>' + b'x' * max(0, body_bytes - 26) + b'</body></html>')
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            with lock:
+                hits['connections'] += 1
+
+        def do_GET(self):
+            with lock:
+                now = time.monotonic()
+                bucket['tokens'] = min(rate_limit, bucket['tokens'] + (now - bucket['at']) * rate_limit)
+                bucket['at'] = now
+                if bucket['in_flight'] >= max_concurrent:
+                    status = 503
+                elif bucket['tokens'] < 1:
+                    status = 429
+                elif rng.random() < error_rate:
+                    status = 500
+                else:
+                    status = 200
+                    bucket['tokens'] -= 1
+                bucket['in_flight'] += 1
+                load = bucket['in_flight']
+            try:
+                if status == 200:
+                    time.sleep(latency * (1 + (load - 1) / max(max_concurrent, 1)))
+                    payload = body
+                else:
+                    payload = b'slow down' if status != 500 else b'error'
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html')
+                self.send_header('Content-Length', str(len(payload)))
+                if status in THROTTLE_STATUSES and retry_after is not None:
+                    self.send_header('Retry-After', str(retry_after))
+                self.end_headers()
+                self.wfile.write(payload)
+            finally:
+                with lock:
+                    bucket['in_flight'] -= 1
+                    hits[status] = hits.get(status, 0) + 1
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/", hits
@@ -0,0 +1,433 @@
+"""
+Precision-aware query planning for the place/geocode lookups.
+
+find_place_comprehensive (API_Attempt/2_2.ipynb) runs Text Search (+ Details)
+for every row and falls back to geocode + Nearby Search (+ Details), although
+API_Attempt/4.ipynb shows the outcome depends heavily on the kind of row: exit
+addresses rarely geocode to ROOFTOP, chain + ZIP rows resolve well by text
+search, and so on.  GeocodePlanner keeps success counts per segment
+
+    address style (exit / mile_marker / street / highway / none)
+    x what the row has (chain and ZIP, chain only, ZIP only, neither)
+    x state
+
+and per strategy, and orders the strategies for each row by expected cost per
+success (API calls plus a latency term, divided by the smoothed success rate).
+Free local strategies (exit junctions, TIGER ranges) naturally go first;
+nearby search is always the last resort.  Rates for thin segments borrow from
+the coarser segment above them (state -> style/fields -> style -> prior), and
+resolve() records every attempt, so the plan sharpens as it runs.
+
+    planner = GeocodePlanner()
+    planner.seed_from_places_results(pd.read_csv('2_2_results.csv'))    # places_search_method / places_status
+    planner.seed_from_precision(pd.read_csv(r'...\\2.csv'))             # precision_level per row
+    results = planner.resolve(df, {'exit_junction': exit_junction_executor(ExitJoinIndex(junctions), df),
+                                   'tiger': tiger_executor(TigerStore.load(r'...\\tiger'), df),
+                                   'geocode': geocode_address,
+                                   'text_search': search_place_text_search,
+                                   'nearby_search': search_place_nearby_search})
+    planner.save('geocode_planner_stats.csv')
+
+Executors may return a result dict or the geocode_address 6-tuple
+(lat, lng, precision, match_type, formatted_address, place_id).
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+ADDRESS_STYLES = ['exit', 'mile_marker', 'street', 'highway', 'none']
+GOOD_PRECISIONS = {'ROOFTOP', 'RANGE_INTERPOLATED'}
+
+# name: nominal paid API calls, default latency (s), prior success rate per address style,
+#       row fields it needs, whether it only runs when everything else failed
+STRATEGIES = {
+    'exit_junction': {'calls': 0, 'latency': 0.01, 'needs': [], 'last_resort': False,
+                      'prior': {'exit': 0.7}},
+    'tiger': {'calls': 0, 'latency': 0.01, 'needs': ['zip'], 'last_resort': False,
+              'prior': {'street': 0.6}},
+    'geocode': {'calls': 1, 'latency': 0.3, 'needs': [], 'last_resort': False,
+                'prior': {'street': 0.8, 'highway': 0.35, 'mile_marker': 0.2, 'exit': 0.2, 'none': 0.05}},
+    'text_search': {'calls': 2, 'latency': 0.6, 'needs': ['chain'], 'last_resort': False,
+                    'prior': {'street': 0.75, 'highway': 0.6, 'mile_marker': 0.55, 'exit': 0.6, 'none': 0.4}},
+    'nearby_search': {'calls': 3, 'latency': 1.0, 'needs': [], 'last_resort': True,
+                      'prior': {'street': 0.5, 'highway': 0.5, 'mile_marker': 0.45, 'exit': 0.5, 'none': 0.35}},
+}
+
+DEFAULT_COLUMNS = {'address': 'address', 'chain': 'chain', 'label': 'label', 'zip': 'zip_code', 'state': 'state'}
+
+# geocode_address / TigerStore.geocode return tuple
+GEOCODE_TUPLE_FIELDS = ['latitude', 'longitude', 'precision', 'match_type', 'formatted_address', 'place_id']
+
+STAT_COLUMNS = ['level', 'segment', 'strategy', 'attempts', 'successes', 'calls', 'seconds']
+
+_EXIT_PATTERN = r'\bEXIT\b|\bEX\.?\s*\d|\bJCT\b'
+_MILE_PATTERN = r'\bMM\b|\bMILE\s*(?:MARKER|POST)\b|\bM\.M\.'
+_STREET_PATTERN = r'^\s*\d+[A-Z]?\s+\S'
+_HIGHWAY_PATTERN = r'\b(?:I|US|SR|HWY|HIGHWAY|ROUTE|RTE|INTERSTATE)\b'
+
+
+def address_styles(addresses):
+    """Vectorized address style: exit / mile_marker / street / highway / none"""
+    text = pd.Series(addresses, copy=False).astype('string').fillna('').str.upper()
+    text = text.str.replace(r'\bI-(\d)', r'I \1', regex=True)
+    styles = np.select(
+        [text.str.contains(_EXIT_PATTERN, regex=True), text.str.contains(_MILE_PATTERN, regex=True),
+         text.str.contains(_STREET_PATTERN, regex=True), text.str.contains(_HIGHWAY_PATTERN, regex=True)],
+        ['exit', 'mile_marker', 'street', 'highway'], default='none')
+    return pd.Series(styles, index=text.index)
+
+
+def _present(df, column):
+    if column not in df.columns:
+        return pd.Series(False, index=df.index)
+    values = df[column].astype('string').str.strip()
+    return (values.notna() & (values != '') & (values.str.lower() != 'nan')).fillna(False).astype(bool)
+
+
+def row_segments(df, columns=None):
+    """
+    Planner segment of every row
+
+    Returns:
+        DataFrame with style, fields ('chain+zip', 'chain', 'zip', 'none'), state,
+        has_chain and has_zip
+    """
+    columns = {**DEFAULT_COLUMNS, **(columns or {})}
+    has_chain = _present(df, columns['chain']) | _present(df, columns['label'])
+    has_zip = _present(df, columns['zip'])
+    fields = np.select([has_chain & has_zip, has_chain, has_zip], ['chain+zip', 'chain', 'zip'], default='none')
+    state = df[columns['state']].astype('string').str.strip().str.upper().fillna('') if columns['state'] in df.columns else ''
+    return pd.DataFrame({
+        'style': address_styles(df[columns['address']]) if columns['address'] in df.columns else 'none',
+        'fields': fields,
+        'state': state,
+        'has_chain': has_chain.to_numpy(),
+        'has_zip': has_zip.to_numpy(),
+    }, index=df.index)
+
+
+def _segment_keys(style, fields, state):
+    """Keys from finest to coarsest"""
+    return [('state', f'{style}|{fields}|{state}'), ('fields', f'{style}|{fields}'), ('style', style)]
+
+
+def default_success(result):
+    """A lookup succeeded when it returned coordinates and no coarse (APPROXIMATE / GEOMETRIC_CENTER) precision"""
+    if not result:
+        return False
+    status = str(result.get('status', 'SUCCESS')).upper()
+    if status not in ('SUCCESS', 'OK'):
+        return False
+    if result.get('latitude') is None and not result.get('place_id'):
+        return False
+    precision = result.get('precision')
+    return precision is None or precision in GOOD_PRECISIONS
+
+
+def as_result(result):
+    """
+    An executor's return value as a result dict
+
+    Dicts pass through; a geocode_address-style 6-tuple is mapped onto
+    GEOCODE_TUPLE_FIELDS (status SUCCESS when it has coordinates, otherwise the
+    message in its match_type / formatted_address slot); None is a failure.
+    """
+    if result is None:
+        return {'status': 'No result'}
+    if isinstance(result, dict):
+        return result
+    if isinstance(result, (tuple, list)) and len(result) == len(GEOCODE_TUPLE_FIELDS):
+        converted = dict(zip(GEOCODE_TUPLE_FIELDS, result))
+        if converted['latitude'] is not None and converted['longitude'] is not None:
+            converted['status'] = 'SUCCESS'
+        else:
+            message = converted['match_type'] or converted['formatted_address'] or 'no coordinates'
+            converted = {'status': f"FAILED: {message}"}
+        return converted
+    return {'status': f"Unexpected executor result: {type(result).__name__}"}
+
+
+def exit_junction_executor(index, df, road_column='address', exit_columns=None, state_column='state'):
+    """
+    'exit_junction' executor: OSM junction coordinates for exit addresses, joined for all of df at once
+
+    Args:
+        index: exit_index.ExitJoinIndex over the states' motorway junctions
+        df: The rows resolve() will be called with (results are looked up by index label)
+        road_column: Column naming the route ("I-80 Exit 160")
+        exit_columns: Columns with the exit number; None takes the text after "Exit" in road_column
+        state_column: State column
+
+    Returns:
+        function(row) -> result dict (precision None: a junction is not a rooftop)
+    """
+    from .exit_index import resolve_exit_coordinates
+
+    frame = df
+    if exit_columns is None:
+        frame = df.assign(_exit_ref=df[road_column].astype('string').str.extract(
+            r'(?i)\bexit\s*#?\s*(.+)$', expand=False))
+        exit_columns = ('_exit_ref',)
+    resolved = resolve_exit_coordinates(frame, index.join(frame, road_column, exit_columns, state_column))
+
+    def execute(row):
+        match = resolved.at[row.name, 'Exit_Match']
+        if match not in ('unique', 'merged', 'directional'):
+            return {'status': f"Exit junction: {match or 'no junction'}", 'api_calls': 0}
+        return {'latitude': resolved.at[row.name, 'Exit_Latitude'], 'longitude': resolved.at[row.name, 'Exit_Longitude'],
+                'match_type': 'EXIT_JUNCTION', 'status': 'SUCCESS', 'api_calls': 0}
+    return execute
+
+
+def tiger_executor(store, df, address_column='address', zip_column='zip_code'):
+    """
+    'tiger' executor: TIGER address-range interpolation, batched over all of df at once
+
+    Args:
+        store: tiger_geocoder.TigerStore
+        df: The rows resolve() will be called with (results are looked up by index label)
+        address_column: Street address column ("1234 N Main St")
+        zip_column: ZIP column
+
+    Returns:
+        function(row) -> result dict
+    """
+    from .tiger_geocoder import parse_street_address
+
+    parsed = [parse_street_address(a) for a in df[address_column]]
+    local = store.geocode_batch([p[0] for p in parsed], [p[1] for p in parsed], df[zip_column].tolist())
+    local.index = df.index
+
+    def execute(row):
+        hit = local.loc[row.name]
+        if pd.isna(hit['latitude']):
+            return {'status': 'TIGER: no matching address range', 'api_calls': 0}
+        return {'latitude': hit['latitude'], 'longitude': hit['longitude'], 'precision': 'RANGE_INTERPOLATED',
+                'match_type': 'TIGER', 'formatted_address': hit['formatted_address'],
+                'place_id': f"tiger:{hit['tlid']}", 'status': 'SUCCESS', 'api_calls': 0}
+    return execute
+
+
+class GeocodePlanner:
+    """Per-segment success statistics and cheapest-first strategy ordering"""
+
+    def __init__(self, strategies=None, prior_weight=5.0, latency_weight=0.5, min_success=0.05, columns=None):
+        """
+        Args:
+            strategies: Strategy table (defaults to STRATEGIES)
+            prior_weight: Pseudo-attempts the coarser level's rate counts for
+            latency_weight: API-call equivalents per second of latency
+            min_success: Strategies below this success rate are left out of a plan
+                (the last-resort strategy is always kept)
+            columns: Overrides of DEFAULT_COLUMNS for the row frame
+        """
+        self.strategies = dict(strategies or STRATEGIES)
+        self.prior_weight = prior_weight
+        self.latency_weight = latency_weight
+        self.min_success = min_success
+        self.columns = {**DEFAULT_COLUMNS, **(columns or {})}
+        self.stats = {}
+
+    # ---- statistics -------------------------------------------------------------
+
+    def record(self, style, fields, state, strategy, success, calls=None, seconds=None):
+        """Count one attempt of a strategy on a row of the given segment"""
+        spec = self.strategies[strategy]
+        calls = spec['calls'] if calls is None else calls
+        seconds = spec['latency'] if seconds is None else seconds
+        for level, segment in _segment_keys(style, fields, state):
+            entry = self.stats.setdefault((level, segment, strategy), [0, 0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += int(bool(success))
+            entry[2] += calls
+            entry[3] += seconds
+
+    def record_frame(self, outcomes):
+        """Bulk record: DataFrame with style, fields, state, strategy, success (calls, seconds optional)"""
+        grouped = outcomes.assign(
+            calls=outcomes['calls'] if 'calls' in outcomes else outcomes['strategy'].map(lambda s: self.strategies[s]['calls']),
+            seconds=outcomes['seconds'] if 'seconds' in outcomes else outcomes['strategy'].map(lambda s: self.strategies[s]['latency']),
+            success=outcomes['success'].astype(bool).astype(int),
+        ).groupby(['style', 'fields', 'state', 'strategy'])[['success', 'calls', 'seconds']].agg(['sum', 'size'])
+        for (style, fields, state, strategy), row in grouped.iterrows():
+            for level, segment in _segment_keys(style, fields, state):
+                entry = self.stats.setdefault((level, segment, strategy), [0, 0, 0.0, 0.0])
+                entry[0] += int(row[('success', 'size')])
+                entry[1] += int(row[('success', 'sum')])
+                entry[2] += float(row[('calls', 'sum')])
+                entry[3] += float(row[('seconds', 'sum')])
+
+    def seed_from_places_results(self, df, method_column='places_search_method'):
+        """
+        Learn from a 2_2.ipynb results table: TEXT_SEARCH means text search worked;
+        NEARBY_SEARCH means text search failed and nearby worked; FAILED means both failed
+        """
+        segments = row_segments(df, self.columns)
+        method = df[method_column].astype('string').fillna('')
+        outcomes = []
+        for strategy, success in (('text_search', method == 'TEXT_SEARCH'),
+                                  ('nearby_search', method == 'NEARBY_SEARCH')):
+            tried = method.isin(['TEXT_SEARCH', 'NEARBY_SEARCH', 'FAILED']) if strategy == 'text_search' \
+                else method.isin(['NEARBY_SEARCH', 'FAILED'])
+            outcomes.append(segments.loc[tried, ['style', 'fields', 'state']].assign(strategy=strategy,
+                                                                                   success=success[tried].to_numpy()))
+        outcomes = pd.concat(outcomes, ignore_index=True)
+        self.record_frame(outcomes)
+        print(f"🌱 Seeded {len(outcomes)} text/nearby search outcomes from {len(df)} rows")
+
+    def seed_from_precision(self, df, strategy='geocode', precision_column='precision_level'):
+        """Learn from a geocoded table (2.csv): ROOFTOP / RANGE_INTERPOLATED count as success"""
+        segments = row_segments(df, self.columns)
+        precision = df[precision_column].astype('string')
+        tried = precision.notna()
+        outcomes = segments.loc[tried, ['style', 'fields', 'state']].assign(
+            strategy=strategy, success=precision[tried].isin(list(GOOD_PRECISIONS)).to_numpy())
+        self.record_frame(outcomes)
+        print(f"🌱 Seeded {len(outcomes)} {strategy} outcomes ({outcomes['success'].mean():.0%} precise)")
+
+    def success_rate(self, style, fields, state, strategy):
+        """Smoothed success rate: each level shrinks toward the coarser one, the coarsest toward the prior"""
+        spec = self.strategies[strategy]
+        rate = spec['prior'].get(style, 0.0)
+        for level, segment in reversed(_segment_keys(style, fields, state)):
+            attempts, successes, _, _ = self.stats.get((level, segment, strategy), (0, 0, 0.0, 0.0))
+            rate = (successes + self.prior_weight * rate) / (attempts + self.prior_weight)
+        return rate
+
+    def expected_cost(self, style, fields, state, strategy):
+        """(API calls + latency_weight * seconds) per attempt, from the observed means where there are any"""
+        spec = self.strategies[strategy]
+        attempts, _, calls, seconds = self.stats.get(('style', style, strategy), (0, 0, 0.0, 0.0))
+        mean_calls = calls / attempts if attempts else spec['calls']
+        mean_seconds = seconds / attempts if attempts else spec['latency']
+        return mean_calls + self.latency_weight * mean_seconds
+
+    # ---- planning -----------------------------------------------------------------
+
+    def plan_segment(self, style, fields, state, has_chain=True, has_zip=True):
+        """
+        Strategies to try, in order, for one segment
+
+        Returns:
+            list of (strategy, success rate, expected cost)
+        """
+        available = {'chain': has_chain, 'zip': has_zip}
+        ranked, last = [], []
+        for name, spec in self.strategies.items():
+            if not all(available.get(need, True) for need in spec['needs']):
+                continue
+            rate = self.success_rate(style, fields, state, name)
+            cost = self.expected_cost(style, fields, state, name)
+            if spec['last_resort']:
+                last.append((name, rate, cost))
+            elif rate >= self.min_success:
+                ranked.append((name, rate, cost))
+        # Cost per success is the optimal order for a cascade of independent attempts
+        ranked.sort(key=lambda item: item[2] / max(item[1], 1e-9))
+        return ranked + last
+
+    def plan(self, df, available=None):
+        """
+        Strategy order for every row (computed once per distinct segment)
+
+        Args:
+            df: Rows to resolve
+            available: Strategies that have an executor (default: all)
+
+        Returns:
+            Series of strategy-name lists
+        """
+        segments = row_segments(df, self.columns)
+        keys = ['style', 'fields', 'state', 'has_chain', 'has_zip']
+        plans = {}
+        for key in segments[keys].drop_duplicates().itertuples(index=False, name=None):
+            plans[key] = [name for name, _, _ in self.plan_segment(*key)
+                          if available is None or name in available]
+        return pd.Series([plans[key] for key in segments[keys].itertuples(index=False, name=None)], index=df.index)
+
+    def resolve(self, df, executors, success=default_success, record=True, delay=0.0):
+        """
+        Run each row's plan until a strategy succeeds
+
+        Args:
+            df: Rows to resolve
+            executors: {strategy: callable(row) -> result dict or geocode_address
+                tuple}; result['api_calls'] overrides the strategy's nominal call count
+            success: Callable(result) -> bool
+            record: Feed every attempt back into the statistics
+            delay: Seconds to sleep after each paid call
+
+        Returns:
+            DataFrame (same index) with the winning result fields plus plan,
+            strategy, attempts, api_calls and seconds
+        """
+        unknown = set(executors) - set(self.strategies)
+        if unknown:
+            raise ValueError(f"No strategy named {sorted(unknown)}; known: {sorted(self.strategies)}")
+        idle = sorted({strategy for _, _, strategy in self.stats} - set(executors))
+        if idle:
+            print(f"⚠️  No executor for {', '.join(idle)}: their statistics are kept but they are not tried")
+
+        segments = row_segments(df, self.columns)
+        plans = self.plan(df, available=set(executors))
+        rows = []
+        for idx, row in df.iterrows():
+            segment = segments.loc[idx]
+            outcome = {'plan': ' > '.join(plans[idx]), 'strategy': 'FAILED', 'attempts': 0, 'api_calls': 0, 'seconds': 0.0}
+            for strategy in plans[idx]:
+                start = time.perf_counter()
+                try:
+                    result = as_result(executors[strategy](row))
+                except Exception as e:
+                    result = {'status': f"Exception: {e}"}
+                seconds = time.perf_counter() - start
+                calls = result.get('api_calls', self.strategies[strategy]['calls'])
+                ok = success(result)
+                outcome['attempts'] += 1
+                outcome['api_calls'] += calls
+                outcome['seconds'] += seconds
+                if record:
+                    self.record(segment['style'], segment['fields'], segment['state'], strategy, ok, calls, seconds)
+                if calls and delay:
+                    time.sleep(delay)
+                if ok:
+                    outcome.update({k: v for k, v in result.items() if k != 'api_calls'})
+                    outcome['strategy'] = strategy
+                    break
+            rows.append(outcome)
+
+        results = pd.DataFrame(rows, index=df.index)
+        resolved = results['strategy'] != 'FAILED'
+        calls = results['api_calls'].sum()
+        print(f"✅ Resolved {resolved.sum()}/{len(results)} rows with {calls} API calls "
+              f"({calls / max(resolved.sum(), 1):.2f} per resolved place), "
+              f"{results['seconds'].sum():.1f}s total")
+        print("   " + ", ".join(f"{k} {v}" for k, v in results['strategy'].value_counts().items()))
+        return results
+
+    # ---- persistence and reporting ---------------------------------------------------
+
+    def stats_frame(self, level=None):
+        """Statistics table (one row per level, segment and strategy) with the raw success rate"""
+        table = pd.DataFrame([(lvl, seg, strat, *entry) for (lvl, seg, strat), entry in self.stats.items()],
+                             columns=STAT_COLUMNS)
+        if level is not None:
+            table = table[table['level'] == level]
+        table['success_rate'] = table['successes'] / table['attempts'].where(table['attempts'] > 0)
+        return table.sort_values(['level', 'segment', 'strategy']).reset_index(drop=True)
+
+    def save(self, path):
+        self.stats_frame()[STAT_COLUMNS].to_csv(path, index=False)
+
+    def load(self, path):
+        """Add the statistics saved at path to this planner's"""
+        table = pd.read_csv(path, keep_default_na=False)
+        for row in table.itertuples(index=False):
+            entry = self.stats.setdefault((row.level, row.segment, row.strategy), [0, 0, 0.0, 0.0])
+            entry[0] += int(row.attempts)
+            entry[1] += int(row.successes)
+            entry[2] += float(row.calls)
+            entry[3] += float(row.seconds)
+        return self
@@ -0,0 +1,101 @@
+"""
+Vectorized geohash encoding plus the small geometry helpers the pipeline shares.
+
+    cells = encode(df['Latitude'], df['Longitude'], precision=6)
+    neighbors('9q8yy')          # the 8 surrounding cells
+    haversine_m(lat1, lon1, lat2, lon2)
+
+Approximate cell sizes: precision 5 = 4.9 x 4.9 km, 6 = 1.2 x 0.6 km,
+7 = 153 x 153 m, 8 = 38 x 19 m.
+"""
+
+import numpy as np
+import pandas as pd
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_DECODE = {c: i for i, c in enumerate(BASE32)}
+EARTH_RADIUS_M = 6_371_008.8
+
+
+def encode(lat, lon, precision=7):
+    """
+    Geohash strings for arrays of coordinates
+
+    Args:
+        lat: Latitudes (array-like; NaN allowed)
+        lon: Longitudes (array-like; NaN allowed)
+        precision: Characters per hash (1-12)
+
+    Returns:
+        numpy object array of hashes, None where a coordinate is missing
+    """
+    lat = pd.to_numeric(pd.Series(np.asarray(lat, dtype=object).ravel()), errors='coerce').to_numpy(dtype=float)
+    lon = pd.to_numeric(pd.Series(np.asarray(lon, dtype=object).ravel()), errors='coerce').to_numpy(dtype=float)
+    valid = ~(np.isnan(lat) | np.isnan(lon))
+    n_bits = precision * 5
+    lon_bits = (n_bits + 1) // 2
+    lat_bits = n_bits // 2
+
+    # Scale to integer grid coordinates, then interleave bits (longitude first)
+    lat_i = np.clip(((np.nan_to_num(lat) + 90.0) / 180.0 * (1 << lat_bits)).astype(np.int64), 0, (1 << lat_bits) - 1)
+    lon_i = np.clip(((np.nan_to_num(lon) + 180.0) / 360.0 * (1 << lon_bits)).astype(np.int64), 0, (1 << lon_bits) - 1)
+    code = np.zeros(len(lat), dtype=np.int64)
+    for bit in range(n_bits):
+        if bit % 2 == 0:
+            value = (lon_i >> (lon_bits - 1 - bit // 2)) & 1
+        else:
+            value = (lat_i >> (lat_bits - 1 - bit // 2)) & 1
+        code = (code << 1) | value
+
+    chars = np.empty((len(lat), precision), dtype='<U1')
+    alphabet = np.array(list(BASE32))
+    for i in range(precision):
+        chars[:, i] = alphabet[(code >> (5 * (precision - 1 - i))) & 31]
+    hashes = np.array([''.join(row) for row in chars], dtype=object)
+    hashes[~valid] = None
+    return hashes
+
+
+def decode_bbox(geohash):
+    """(lat_min, lat_max, lon_min, lon_max) of one geohash cell"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            target = lon_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            target[0 if bit else 1] = mid
+            even = not even
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+
+def decode(geohash):
+    """Center (lat, lon) of one geohash cell"""
+    lat_min, lat_max, lon_min, lon_max = decode_bbox(geohash)
+    return (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+
+
+def neighbors(geohash):
+    """The 8 cells around geohash (fewer at the poles)"""
+    lat_min, lat_max, lon_min, lon_max = decode_bbox(geohash)
+    lat_c, lon_c = (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+    d_lat, d_lon = lat_max - lat_min, lon_max - lon_min
+    lats, lons = [], []
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            if dx == 0 and dy == 0:
+                continue
+            lat = lat_c + dy * d_lat
+            if -90 < lat < 90:
+                lats.append(lat)
+                lons.append((lon_c + dx * d_lon + 180) % 360 - 180)
+    return [h for h in dict.fromkeys(encode(lats, lons, len(geohash))) if h != geohash]
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in meters (numpy broadcasting)"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
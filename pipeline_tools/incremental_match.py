@@ -0,0 +1,280 @@
+"""
+Incremental re-matching when the scraped reference table is refreshed.
+
+comprehensive_matching_logic only ever compares an OCR row with reference rows
+in the same ZIP, so a new scrape can only change the outcome of OCR rows whose
+(ZIP, State) block gained, lost or changed reference rows, plus rows whose ZIP
+appeared in or disappeared from the table altogether (that flips "no matching
+ZIPCODE"), plus rows whose Scraped_ columns were copied from a reference row
+that changed or is gone (retrieval and spatial matches can point outside the
+row's own ZIP).  refresh_matches diffs the two snapshots by a stable key, works out
+those blocks, resets the affected rows to "No matches found", re-runs the
+matcher on them against the affected slice of the new table and splices the
+results back in.  Work scales with the size of the change, not the directory.
+
+    result = pd.read_csv('5.csv')
+    patched, diff = refresh_matches(result, pd.read_csv('2_previous.csv'), pd.read_csv('2.csv'))
+    patched.to_csv('5.csv', index=False)
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from .matching import comprehensive_matching_logic, normalize_zip_code
+from .name_retrieval import RETRIEVAL_FLAG_REASON
+from .spatial_candidates import SPATIAL_FLAG_REASON
+
+# Flag_Reason values comprehensive_matching_logic can leave on a row
+MATCHER_FAIL_REASONS = [
+    "no matching ZIPCODE",
+    "matching ZIPCODE, no matching State",
+    "matching ZIPCODE, matching State, no matching Exit",
+    "matching ZIPCODE, matching State, matching Exit, no matching Highway/Exit/Street Address",
+    "No Phone/Name/ZIP/State/Exit/Highway matches found",
+]
+SINGLE_MATCH_REASON = "Single Name/ZIP/State/Exit/Highway Match Found"
+MULTIPLE_MATCH_PATTERN = re.compile(r'^Multiple Name/ZIP/State/Exit/Highway Matches Found - Match (\d+) of \d+$')
+
+UNMATCHED_REASON = "No matches found"
+
+# Matches filled in after the matcher gave up on a row; a refreshed block can
+# give the matcher its own answer, or remove the scraped row they point to
+LATER_MATCH_REASONS = [RETRIEVAL_FLAG_REASON, SPATIAL_FLAG_REASON]
+
+# Used when the snapshot has no full_url column
+FALLBACK_KEY_COLUMNS = ['name', 'Street Address', 'City', 'State', 'Postal Code']
+
+
+def _raw_keys(df2, key_column='full_url', prefix=''):
+    """Detail-page URL per row, or a hash of name/address when there is none"""
+    if prefix + key_column in df2.columns:
+        return df2[prefix + key_column].astype(str)
+    columns = [prefix + c for c in FALLBACK_KEY_COLUMNS if prefix + c in df2.columns]
+    return pd.util.hash_pandas_object(df2[columns].astype(str), index=False).astype(str)
+
+
+def reference_keys(df2, key_column='full_url'):
+    """
+    Stable key per scraped row: the detail-page URL, or a hash of name/address when
+    the snapshot has none.  Repeated keys get an occurrence suffix so keys stay unique.
+    """
+    keys = _raw_keys(df2, key_column)
+    occurrence = keys.groupby(keys).cumcount()
+    return keys.where(occurrence == 0, keys + '#' + occurrence.astype(str)).to_numpy()
+
+
+def matched_reference_keys(result_df, key_column='full_url'):
+    """
+    Key of the scraped row each matched row's Scraped_ columns were copied from
+
+    Returns:
+        Series aligned with result_df; NaN where the row has no Scraped_ values
+    """
+    scraped_cols = [c for c in result_df.columns if c.startswith('Scraped_')]
+    if not scraped_cols:
+        return pd.Series(np.nan, index=result_df.index, dtype=object)
+    keys = _raw_keys(result_df, key_column, prefix='Scraped_')
+    return keys.where(result_df[scraped_cols].notna().any(axis=1))
+
+
+def _content_hash(df2, columns):
+    return pd.util.hash_pandas_object(df2[columns].astype(str), index=False).to_numpy()
+
+
+def _blocks(df2):
+    """(normalized ZIP, State) per reference row"""
+    zips = df2['Postal Code'].apply(normalize_zip_code)
+    return list(zip(zips, df2['State'].astype(str)))
+
+
+class ReferenceDiff:
+    """Added, removed and changed rows between two reference snapshots"""
+
+    def __init__(self, old, new, added, removed, changed, changed_old, stale_keys=()):
+        """
+        Args:
+            old, new: The two snapshots
+            added: Index labels in new of rows with a new key
+            removed: Index labels in old of rows whose key is gone
+            changed: Index labels in new of rows whose content changed
+            changed_old: The same rows' labels in old
+            stale_keys: Keys (without occurrence suffix) of the removed and changed rows
+        """
+        self.old = old
+        self.new = new
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.changed_old = changed_old
+        self.stale_keys = set(stale_keys)
+
+    def is_empty(self):
+        return not (len(self.added) or len(self.removed) or len(self.changed))
+
+    def affected_blocks(self):
+        """
+        Blocks whose matcher outcome can change
+
+        Returns:
+            tuple: (set of (ZIP, State) blocks touched by the diff, set of ZIPs that
+            appear in only one of the two snapshots)
+        """
+        old_rows = self.old.loc[np.concatenate([self.removed, self.changed_old])]
+        new_rows = self.new.loc[np.concatenate([self.added, self.changed])]
+        blocks = {b for b in _blocks(old_rows) + _blocks(new_rows) if b[0]}
+        zips_before = set(self.old['Postal Code'].apply(normalize_zip_code)) - {''}
+        zips_after = set(self.new['Postal Code'].apply(normalize_zip_code)) - {''}
+        touched_zips = {z for z, _ in blocks}
+        flipped_zips = (zips_before ^ zips_after) & touched_zips
+        return blocks, flipped_zips
+
+    def print_summary(self):
+        print(f"📊 Reference diff: {len(self.added)} added, {len(self.removed)} removed, "
+              f"{len(self.changed)} changed (of {len(self.new)} rows)")
+
+
+def diff_reference(old_df2, new_df2, key_column='full_url'):
+    """
+    Compare two scraped reference snapshots by stable key
+
+    Args:
+        old_df2: Reference table the current results were matched against
+        new_df2: Refreshed reference table
+        key_column: Column identifying a scraped location across scrapes
+
+    Returns:
+        ReferenceDiff
+    """
+    old_keys = pd.Series(old_df2.index, index=reference_keys(old_df2, key_column))
+    new_keys = pd.Series(new_df2.index, index=reference_keys(new_df2, key_column))
+    columns = [c for c in new_df2.columns if c in old_df2.columns]
+
+    common = new_keys.index.intersection(old_keys.index)
+    old_hash = pd.Series(_content_hash(old_df2, columns), index=old_keys.index).loc[common]
+    new_hash = pd.Series(_content_hash(new_df2, columns), index=new_keys.index).loc[common]
+    changed_keys = common[old_hash.to_numpy() != new_hash.to_numpy()]
+    removed = old_keys.loc[old_keys.index.difference(new_keys.index)].to_numpy()
+    changed_old = old_keys.loc[changed_keys].to_numpy()
+    raw_old = _raw_keys(old_df2, key_column)
+
+    return ReferenceDiff(
+        old_df2, new_df2,
+        added=new_keys.loc[new_keys.index.difference(old_keys.index)].to_numpy(),
+        removed=removed,
+        changed=new_keys.loc[changed_keys].to_numpy(),
+        changed_old=changed_old,
+        stale_keys=raw_old.loc[np.concatenate([removed, changed_old])],
+    )
+
+
+def _matcher_rows(result_df):
+    """
+    Rows whose Flag_Reason was written by comprehensive_matching_logic (or still awaits it),
+    including those a later retrieval or spatial pass matched after the matcher failed
+    """
+    reasons = result_df['Flag_Reason'].astype(str)
+    handled = (reasons.isin(MATCHER_FAIL_REASONS + [SINGLE_MATCH_REASON, UNMATCHED_REASON] + LATER_MATCH_REASONS)
+               | reasons.str.match(MULTIPLE_MATCH_PATTERN))
+    return handled & (result_df['OCR_Address_Type'] == "Exit")
+
+
+def _extra_match_rows(result_df):
+    """The duplicated rows comprehensive_matching_logic appends for matches 2..n"""
+    match_num = result_df['Flag_Reason'].astype(str).str.extract(MULTIPLE_MATCH_PATTERN, expand=False)
+    return pd.to_numeric(match_num, errors='coerce').fillna(0) >= 2
+
+
+def rematch_blocks(result_df, new_df2, blocks, flipped_zips=(), stale_keys=(), key_column='full_url', verbose=False):
+    """
+    Re-run comprehensive_matching_logic for the OCR rows in the given blocks,
+    and for rows matched to a reference row that changed or was removed
+
+    Rows already manually verified ("Manually Verified?" not "No"/"Please Verify This")
+    are left alone.
+
+    Args:
+        result_df: Matched combined frame (5.csv)
+        new_df2: Refreshed reference table
+        blocks: (ZIP, State) pairs to re-match
+        flipped_zips: ZIPs that appeared or disappeared; every row with one is re-matched
+        stale_keys: Keys of changed/removed reference rows; rows matched to one are
+            re-matched whatever their block
+        key_column: Stable key column of the scraped rows
+        verbose: Pass through to comprehensive_matching_logic
+
+    Returns:
+        DataFrame: result_df with the affected rows replaced by their new results
+    """
+    ocr_zip = result_df['OCR_zip_code'].apply(normalize_zip_code)
+    ocr_block = pd.Series(list(zip(ocr_zip, result_df['OCR_state'].astype(str))), index=result_df.index)
+    in_block = ocr_block.isin(set(blocks)) | ocr_zip.isin(set(flipped_zips))
+    stale = matched_reference_keys(result_df, key_column).isin(set(stale_keys))
+    affected = _matcher_rows(result_df) & (in_block | stale)
+    if 'Manually Verified?' in result_df.columns:
+        affected &= result_df['Manually Verified?'].isin(["No", "Please Verify This"]) | result_df['Manually Verified?'].isna()
+    if not affected.any():
+        print("✅ No OCR rows in the changed blocks")
+        return result_df
+
+    extras = affected & _extra_match_rows(result_df)
+    bases = affected & ~extras
+    print(f"🔁 Re-matching {bases.sum()} OCR rows in {len(set(blocks))} changed blocks "
+          f"({(bases & stale & ~in_block).sum()} more matched to a changed row elsewhere; "
+          f"dropping {extras.sum()} previous extra-match rows)")
+    later = bases & result_df['Flag_Reason'].isin(LATER_MATCH_REASONS)
+    if later.any():
+        print(f"⚠️ {later.sum()} of them had a retrieval/spatial match; re-run those passes on rows the matcher leaves unmatched")
+
+    # Reset the affected rows to their pre-matching state
+    scraped_cols = [c for c in result_df.columns if c.startswith('Scraped_')]
+    pending = result_df[bases].copy()
+    pending[scraped_cols] = None
+    pending['Flagged'] = True
+    pending['Flag_Reason'] = UNMATCHED_REASON
+    if 'Manually Verified?' in pending.columns:
+        pending['Manually Verified?'] = "No"
+
+    # Matching only ever looks inside the row's ZIP, so the ZIP slice of the new table is enough
+    zips = set(ocr_zip[bases])
+    reference_slice = new_df2[new_df2['Postal Code'].apply(normalize_zip_code).isin(zips)]
+    rematched = comprehensive_matching_logic(pending, reference_slice, row_mask=pd.Series(True, index=pending.index),
+                                             verbose=verbose)
+
+    kept = result_df[~extras]
+    updated = rematched.iloc[:len(pending)]
+    updated.index = pending.index
+    patched = kept.copy()
+    patched.loc[updated.index, updated.columns] = updated
+    new_extras = rematched.iloc[len(pending):]
+    patched = pd.concat([patched, new_extras], ignore_index=True)
+
+    before = result_df.loc[bases, 'Flag_Reason']
+    after = updated['Flag_Reason']
+    print(f"✅ {(before != after).sum()} rows changed outcome; {len(patched)} rows total "
+          f"({len(new_extras) - extras.sum():+d} extra-match rows)")
+    return patched
+
+
+def refresh_matches(result_df, old_df2, new_df2, key_column='full_url', verbose=False):
+    """
+    Bring a matched frame up to date with a refreshed reference table
+
+    Args:
+        result_df: Output of comprehensive_matching_logic against old_df2
+        old_df2: Previous reference snapshot
+        new_df2: Refreshed reference snapshot
+        key_column: Stable key column of the scraped rows
+
+    Returns:
+        tuple: (patched DataFrame, ReferenceDiff)
+    """
+    diff = diff_reference(old_df2, new_df2, key_column)
+    diff.print_summary()
+    if diff.is_empty():
+        return result_df, diff
+    blocks, flipped_zips = diff.affected_blocks()
+    print(f"🧱 {len(blocks)} (ZIP, State) blocks touched, {len(flipped_zips)} ZIPs appeared or disappeared")
+    return rematch_blocks(result_df, new_df2, blocks, flipped_zips, stale_keys=diff.stale_keys,
+                          key_column=key_column, verbose=verbose), diff
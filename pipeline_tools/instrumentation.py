@@ -0,0 +1,423 @@
+"""
+Stage-level instrumentation: wall time, rows/s, peak memory and HTTP latency.
+
+Usage in a notebook:
+
+    from pipeline_tools.instrumentation import METRICS, stage, instrument_stage, timed_request
+
+    @instrument_stage('comprehensive_matching_logic')
+    def comprehensive_matching_logic():
+        ...
+
+    with stage('extract_locdetinfo_data', rows=len(df)):
+        for url in df['full_url']:
+            with timed_request('truckstopsandservices'):
+                response = requests.get(url)
+
+    METRICS.write_json_report('run_report.json')
+    METRICS.write_prometheus('run_metrics.prom')
+"""
+
+import functools
+import inspect
+import json
+import math
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Upper bounds (seconds) for the HTTP latency histogram
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf)
+
+# HELP text for the Prometheus export; other metrics use their name
+METRIC_HELP = {
+    'http_request_seconds': 'Latency of HTTP calls to external services',
+    'http_requests_total': 'HTTP calls by service and outcome',
+    'http_responses_total': 'HTTP responses by service and status code',
+    'http_exceptions_total': 'HTTP calls that raised, by exception class',
+    'stage_runs_total': 'Completed runs of each pipeline stage',
+    'stage_rows_total': 'Rows processed by each pipeline stage',
+    'stage_seconds': 'Wall time of each pipeline stage run',
+    'stage_peak_bytes': 'Worst peak traced memory of each pipeline stage',
+    'stage_rows_per_second': 'Overall rows per second of each pipeline stage',
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q):
+        """Approximate quantile from the bucket upper bounds"""
+        if not self.count:
+            return None
+        target = q * self.count
+        running = 0
+        for bound, n in zip(self.buckets, self.counts):
+            running += n
+            if running >= target:
+                return self.max if math.isinf(bound) else bound
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.total, 6),
+            'mean': round(self.total / self.count, 6) if self.count else None,
+            'max': round(self.max, 6),
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'buckets': {('+Inf' if math.isinf(b) else str(b)): n for b, n in zip(self.buckets, self.counts)},
+        }
+
+
+class StageRecord:
+    """Timing for one run of a stage; set .rows inside the block if unknown up front"""
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.start = None
+        self.seconds = None
+        self.peak_bytes = None
+        self.error = None
+
+    def to_dict(self):
+        rows_per_sec = None
+        if self.rows is not None and self.seconds:
+            rows_per_sec = round(self.rows / self.seconds, 2)
+        return {
+            'stage': self.name,
+            'seconds': round(self.seconds, 4) if self.seconds is not None else None,
+            'rows': self.rows,
+            'rows_per_sec': rows_per_sec,
+            'peak_mb': round(self.peak_bytes / 1e6, 2) if self.peak_bytes is not None else None,
+            'error': self.error,
+        }
+
+
+class RunMetrics:
+    """Collects counters, latency histograms and stage records for one pipeline run"""
+
+    def __init__(self, trace_memory=True):
+        """
+        Args:
+            trace_memory: Track peak Python allocations per stage with tracemalloc
+                (adds overhead; turn off for very allocation-heavy loops)
+        """
+        self.trace_memory = trace_memory
+        self.started = time.time()
+        self.counters = {}
+        self.histograms = {}
+        self.stages = []
+        self._lock = threading.Lock()
+        # Stage nesting is per thread; tracemalloc is process-wide, so one thread owns it at a time
+        self._local = threading.local()
+        self._trace_owner = None
+        self._started_tracing = False
+
+    def _stacks(self):
+        """This thread's (active stage names, peak stack)"""
+        local = self._local
+        if not hasattr(local, 'active'):
+            local.active, local.peak_stack = [], []
+        return local.active, local.peak_stack
+
+    # ---- counters and histograms -------------------------------------------
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=DEFAULT_LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(buckets)
+            self.histograms[key].observe(value)
+
+    def record_request(self, service, seconds, status=None, error=None):
+        """
+        Record one HTTP call to an external service (Google, Yelp, iExit, ...)
+
+        Args:
+            service: Short service name used as the metric label
+            seconds: Wall-clock latency of the call
+            status: HTTP status code if a response came back
+            error: Exception class name if the call raised
+        """
+        outcome = 'error' if error or (status is not None and status >= 400) else 'ok'
+        self.observe('http_request_seconds', seconds, service=service)
+        self.inc('http_requests_total', service=service, outcome=outcome)
+        if status is not None:
+            self.inc('http_responses_total', service=service, status=str(status))
+        if error:
+            self.inc('http_exceptions_total', service=service, error=error)
+
+    # ---- stages --------------------------------------------------------------
+
+    @contextmanager
+    def stage(self, name, rows=None, trace_memory=None):
+        """
+        Time a block of work and record its rows/s and peak traced memory
+
+        trace_memory overrides the registry's setting for this stage (False for
+        allocation-heavy library code, where tracemalloc costs several times the runtime).
+
+        Stages may be nested; an inner stage's peak also counts towards its parent.
+        If tracing was not already on, it is started here and stopped again when
+        the outermost stage ends, so tracemalloc's overhead does not outlive the stage.
+
+        Stages can run in several threads at once, but tracemalloc has a single
+        process-wide peak: only the first thread to open a traced stage measures
+        memory until its outermost stage ends, and stages opened meanwhile in
+        other threads record no peak (peak_mb None).  The owner's peak includes
+        whatever other threads allocated while it ran.
+        """
+        record = StageRecord(name, rows)
+        active, peak_stack = self._stacks()
+        tracing = self.trace_memory if trace_memory is None else trace_memory
+        if tracing:
+            me = threading.get_ident()
+            with self._lock:
+                tracing = self._trace_owner in (None, me)
+                if tracing:
+                    self._trace_owner = me
+                    if not tracemalloc.is_tracing():
+                        tracemalloc.start()
+                        self._started_tracing = True
+                    if peak_stack:
+                        # Preserve the parent's peak before resetting for this stage
+                        peak_stack[-1] = max(peak_stack[-1], tracemalloc.get_traced_memory()[1])
+                    tracemalloc.reset_peak()
+                    peak_stack.append(0)
+
+        active.append(name)
+        record.start = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record.error = type(e).__name__
+            raise
+        finally:
+            record.seconds = time.perf_counter() - record.start
+            active.pop()
+            if tracing:
+                with self._lock:
+                    peak = max(peak_stack.pop(), tracemalloc.get_traced_memory()[1])
+                    record.peak_bytes = peak
+                    if peak_stack:
+                        peak_stack[-1] = max(peak_stack[-1], peak)
+                    else:
+                        self._trace_owner = None
+                        if self._started_tracing:
+                            tracemalloc.stop()
+                            self._started_tracing = False
+            with self._lock:
+                self.stages.append(record)
+            self.inc('stage_runs_total', stage=name)
+            if record.rows is not None:
+                self.inc('stage_rows_total', record.rows, stage=name)
+            self.observe('stage_seconds', record.seconds, buckets=(1, 10, 60, 300, 900, 3600, math.inf), stage=name)
+
+    def instrument_stage(self, name=None, rows_arg=None, trace_memory=None):
+        """
+        Decorator form of stage()
+
+        Args:
+            name: Stage name (defaults to the function name)
+            rows_arg: Name or position of an argument whose len() is the row count
+                (passed either way); if omitted, len() of a DataFrame/list return value is used
+            trace_memory: Per-stage override of the registry's trace_memory
+
+        A call made while a stage of the same name is already running (e.g. a
+        chunked run that records each batch under the function's name) is not
+        recorded a second time.
+        """
+        def decorator(func):
+            stage_name = name or func.__name__
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                active, _ = self._stacks()
+                if active and active[-1] == stage_name:
+                    return func(*args, **kwargs)
+                rows = None
+                if rows_arg is not None:
+                    if isinstance(rows_arg, int):
+                        value = args[rows_arg] if rows_arg < len(args) else None
+                    else:
+                        try:
+                            value = signature.bind_partial(*args, **kwargs).arguments.get(rows_arg)
+                        except TypeError:
+                            value = kwargs.get(rows_arg)
+                    rows = _safe_len(value)
+                with self.stage(stage_name, rows=rows, trace_memory=trace_memory) as record:
+                    result = func(*args, **kwargs)
+                    if record.rows is None:
+                        record.rows = _safe_len(result)
+                return result
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def timed_request(self, service):
+        """
+        Time an HTTP call; assign the response to .response to record its status
+
+            with METRICS.timed_request('yelp') as call:
+                call.response = requests.get(url, headers=headers)
+        """
+        call = _RequestCall()
+        start = time.perf_counter()
+        try:
+            yield call
+        except Exception as e:
+            self.record_request(service, time.perf_counter() - start, error=type(e).__name__)
+            raise
+        else:
+            status = getattr(call.response, 'status_code', None)
+            self.record_request(service, time.perf_counter() - start, status=status)
+
+    # ---- export --------------------------------------------------------------
+
+    def summary(self):
+        """Per-stage totals: calls, seconds, rows, rows/s and worst peak memory"""
+        totals = {}
+        for record in self.stages:
+            t = totals.setdefault(record.name, {'calls': 0, 'seconds': 0.0, 'rows': 0, 'peak_mb': None})
+            t['calls'] += 1
+            t['seconds'] += record.seconds or 0.0
+            t['rows'] += record.rows or 0
+            if record.peak_bytes is not None:
+                t['peak_mb'] = max(t['peak_mb'] or 0, round(record.peak_bytes / 1e6, 2))
+        for t in totals.values():
+            t['seconds'] = round(t['seconds'], 4)
+            t['rows_per_sec'] = round(t['rows'] / t['seconds'], 2) if t['rows'] and t['seconds'] else None
+        return totals
+
+    def to_dict(self):
+        return {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'elapsed_seconds': round(time.time() - self.started, 3),
+            'stage_summary': self.summary(),
+            'stages': [r.to_dict() for r in self.stages],
+            'counters': [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self.counters.items())
+            ],
+            'histograms': [
+                {'name': name, 'labels': dict(labels), **hist.to_dict()}
+                for (name, labels), hist in sorted(self.histograms.items(), key=lambda kv: kv[0])
+            ],
+        }
+
+    def write_json_report(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        print(f"📊 Run report saved to: {path}")
+        return path
+
+    def to_prometheus(self, prefix='geocoding_'):
+        """Render all metrics in the Prometheus text exposition format"""
+        # Each family's HELP/TYPE must come once, directly before all of its samples
+        families = {}
+
+        def family(name, kind):
+            return families.setdefault(prefix + name, (kind, []))[1]
+
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda kv: kv[0])
+        for (name, labels), value in counters:
+            family(name, 'counter').append(f"{prefix}{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), hist in histograms:
+            samples = family(name, 'histogram')
+            metric = prefix + name
+            running = 0
+            for bound, n in zip(hist.buckets, hist.counts):
+                running += n
+                le = '+Inf' if math.isinf(bound) else repr(float(bound))
+                samples.append(f"{metric}_bucket{_format_labels(labels + (('le', le),))} {running}")
+            samples.append(f"{metric}_sum{_format_labels(labels)} {hist.total}")
+            samples.append(f"{metric}_count{_format_labels(labels)} {hist.count}")
+
+        for stage_name, t in sorted(self.summary().items()):
+            labels = (('stage', stage_name),)
+            if t['peak_mb'] is not None:
+                family('stage_peak_bytes', 'gauge').append(
+                    f"{prefix}stage_peak_bytes{_format_labels(labels)} {int(t['peak_mb'] * 1e6)}")
+            if t['rows_per_sec'] is not None:
+                family('stage_rows_per_second', 'gauge').append(
+                    f"{prefix}stage_rows_per_second{_format_labels(labels)} {t['rows_per_sec']}")
+
+        lines = []
+        for metric, (kind, samples) in families.items():
+            lines.append(f"# HELP {metric} {METRIC_HELP.get(metric[len(prefix):], metric[len(prefix):])}")
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path, prefix='geocoding_'):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus(prefix))
+        print(f"📊 Prometheus metrics saved to: {path}")
+        return path
+
+    def print_summary(self):
+        print(f"{'stage':40s} {'calls':>6s} {'seconds':>10s} {'rows':>10s} {'rows/s':>10s} {'peak MB':>9s}")
+        for stage_name, t in self.summary().items():
+            print(f"{stage_name[:40]:40s} {t['calls']:6d} {t['seconds']:10.2f} {t['rows']:10d} "
+                  f"{t['rows_per_sec'] or 0:10.1f} {t['peak_mb'] or 0:9.1f}")
+        for (name, labels), hist in self.histograms.items():
+            if name == 'http_request_seconds':
+                d = hist.to_dict()
+                print(f"HTTP {dict(labels).get('service')}: {d['count']} calls, mean {d['mean']}s, p95 <= {d['p95']}s")
+
+    def reset(self):
+        self.__init__(trace_memory=self.trace_memory)
+
+
+class _RequestCall:
+    def __init__(self):
+        self.response = None
+
+
+def _safe_len(value):
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in labels)
+    return '{' + ','.join(escaped) + '}'
+
+
+# Default registry shared by notebooks and scripts in one process
+METRICS = RunMetrics()
+stage = METRICS.stage
+instrument_stage = METRICS.instrument_stage
+timed_request = METRICS.timed_request
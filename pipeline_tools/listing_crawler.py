@@ -0,0 +1,357 @@
+"""
+Incremental crawler for the state listing pages behind Web_Scraping/2.csv.
+
+Web_Scraping/2.ipynb walks listcatbusinesses.php for state ids 1-65 on both
+truckstopsandservices.com and rvandtravelers.com one request at a time and
+rebuilds 2.csv from scratch.  ListingCrawler fetches both sites concurrently
+(with a per-host connection limit and delay), remembers each page's ETag,
+Last-Modified and content hash, and on refresh sends conditional requests.  Pages
+that come back 304, or 200 with an unchanged body, are not re-parsed; their
+listings are carried over from the previous snapshot.  The result includes a
+diff (added / removed / changed listings) so only those detail URLs go on to the
+detail scraper.
+
+    crawler = ListingCrawler(
+        state_path=r'C:\\Users\\clint\\Desktop\\Geocoding_Task\\Web_Scraping\\2_crawl_state.json',
+        listings_path=r'C:\\Users\\clint\\Desktop\\Geocoding_Task\\Web_Scraping\\2.csv',
+    )
+    result = crawler.refresh()
+    result.detail_urls()        # full_url of every added or changed listing
+"""
+
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+import urllib.parse
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+LISTING_PATH = "listcatbusinesses.php?id=19&state={state_id}"
+STATE_IDS = range(1, 66)
+LISTING_COLUMNS = ['state_id', 'state', 'name', 'href', 'full_url', 'stop_type']
+
+# stop_type -> site root (same order and URLs as 2.ipynb)
+SITES = {
+    'Trucker': "https://www.truckstopsandservices.com/",
+    'RVer': "http://www.rvandtravelers.com/",
+}
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+
+def parse_listing_page(html, state_id, stop_type, base_url):
+    """
+    Extract the location_details.php links from one state listing page
+
+    Args:
+        html: Page body (bytes or str)
+        state_id: State id the page was requested for
+        stop_type: 'Trucker' or 'RVer'
+        base_url: Site root used to build full_url
+
+    Returns:
+        list of dicts with LISTING_COLUMNS
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Extract state from h1 element (the two sites word the title differently)
+    h1_element = soup.find('h1', class_='h2')
+    state = ""
+    if h1_element:
+        h1_text = h1_element.get_text(strip=True)
+        if stop_type == 'Trucker':
+            if "Truck Stops in" in h1_text:
+                state = h1_text.split("Truck Stops in")[-1].strip()
+        elif "in" in h1_text:
+            parts = h1_text.split("in")
+            if len(parts) > 1:
+                state = parts[-1].strip()
+
+    rows = []
+    tbody = soup.find('tbody', class_='nohover')
+    if tbody:
+        for anchor in tbody.find_all('a', href=True):
+            href = anchor['href']
+            if 'location_details.php?id=' in href:
+                rows.append({
+                    'state_id': state_id,
+                    'state': state,
+                    'name': anchor.get_text(strip=True),
+                    'href': href,
+                    'full_url': f"{base_url}{href}",
+                    'stop_type': stop_type,
+                })
+    return rows
+
+
+class CrawlResult:
+    """Outcome of one refresh: the full listing table, the diff and request counts"""
+
+    def __init__(self, listings, added, removed, changed, stats, errors):
+        self.listings = listings
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.stats = stats
+        self.errors = errors
+
+    def detail_urls(self):
+        """Detail pages that need (re-)scraping: added plus changed listings"""
+        return pd.concat([self.added['full_url'], self.changed['full_url']]).drop_duplicates().tolist()
+
+    def print_summary(self):
+        s = self.stats
+        print(f"📊 {s['requests']} requests: {s['not_modified']} not modified (304), "
+              f"{s['same_content']} unchanged bodies, {s['parsed']} pages parsed, {s['errors']} errors")
+        print(f"   Listings: {len(self.listings)} total, {len(self.added)} added, "
+              f"{len(self.removed)} removed, {len(self.changed)} changed")
+
+
+class ListingCrawler:
+    """Concurrent, conditional-GET crawler for the state listing pages of both sites"""
+
+    def __init__(self, state_path, listings_path, sites=None, state_ids=STATE_IDS,
+                 per_host=2, delay=0.5, timeout=30, session_factory=None, archive=None):
+        """
+        Args:
+            state_path: JSON file with ETag / Last-Modified / hash per listing URL
+            listings_path: CSV snapshot of all listings (2.csv layout)
+            sites: {stop_type: site root}; defaults to SITES
+            state_ids: State ids to request on every site
+            per_host: Concurrent requests allowed per host
+            delay: Seconds each worker waits between requests to the same host
+            timeout: Request timeout in seconds
+            session_factory: Returns a requests.Session-like object (one per worker)
+            archive: Optional PageArchive that receives every 200 response body
+        """
+        self.state_path = state_path
+        self.listings_path = listings_path
+        self.sites = dict(sites or SITES)
+        self.state_ids = list(state_ids)
+        self.per_host = per_host
+        self.delay = delay
+        self.timeout = timeout
+        self.session_factory = session_factory
+        self.archive = archive
+
+    def _new_session(self):
+        if self.session_factory is not None:
+            return self.session_factory()
+        import requests
+        session = requests.Session()
+        session.headers['User-Agent'] = USER_AGENT
+        return session
+
+    def load_state(self):
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def save_state(self, state):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def load_listings(self):
+        if os.path.exists(self.listings_path):
+            return pd.read_csv(self.listings_path, dtype=str, keep_default_na=False)
+        return pd.DataFrame(columns=LISTING_COLUMNS)
+
+    def _pages(self):
+        """(url, state_id, stop_type, base_url) for every listing page, grouped by host"""
+        by_host = {}
+        for stop_type, base_url in self.sites.items():
+            host = urllib.parse.urlparse(base_url).netloc
+            for state_id in self.state_ids:
+                url = base_url + LISTING_PATH.format(state_id=state_id)
+                by_host.setdefault(host, []).append((url, state_id, stop_type, base_url))
+        return by_host
+
+    def _fetch_page(self, session, page, previous):
+        """Conditional GET for one page; returns (outcome, rows or None, new state entry)"""
+        url, state_id, stop_type, base_url = page
+        headers = {}
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            headers['If-Modified-Since'] = previous['last_modified']
+
+        response = session.get(url, headers=headers, timeout=self.timeout)
+        entry = dict(previous)
+        entry['checked_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        if response.status_code == 304:
+            return 'not_modified', None, entry
+        response.raise_for_status()
+
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        entry.update({
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'status': response.status_code,
+        })
+        if self.archive is not None:
+            self.archive.put_response(url, response)
+        if previous.get('digest') == digest:
+            return 'same_content', None, entry
+        entry['digest'] = digest
+        entry['changed_at'] = entry['checked_at']
+        return 'parsed', parse_listing_page(body, state_id, stop_type, base_url), entry
+
+    def refresh(self, force=False):
+        """
+        Fetch every listing page (conditionally) and diff against the last snapshot
+
+        Args:
+            force: Ignore stored validators and re-parse every page
+
+        Returns:
+            CrawlResult; the listings CSV and state file are updated in place
+        """
+        # Without a snapshot there is nothing to carry a 304 over from
+        state = {} if force or not os.path.exists(self.listings_path) else self.load_state()
+        previous = self.load_listings()
+        previous_by_page = {
+            key: group for key, group in previous.groupby(['stop_type', 'state_id'])
+        } if len(previous) else {}
+
+        by_host = self._pages()
+        stats = {'requests': 0, 'not_modified': 0, 'same_content': 0, 'parsed': 0, 'errors': 0}
+        new_rows, errors = {}, []
+        lock = threading.Lock()
+
+        def worker(host_queue):
+            session = self._new_session()
+            while True:
+                try:
+                    page = host_queue.get_nowait()
+                except queue.Empty:
+                    return
+                url = page[0]
+                try:
+                    outcome, rows, entry = self._fetch_page(session, page, state.get(url, {}))
+                except Exception as e:
+                    with lock:
+                        stats['requests'] += 1
+                        stats['errors'] += 1
+                        errors.append({'url': url, 'error': f"{type(e).__name__}: {e}"})
+                else:
+                    with lock:
+                        stats['requests'] += 1
+                        stats[outcome] += 1
+                        state[url] = entry
+                        if rows is not None:
+                            new_rows[(page[2], str(page[1]))] = rows
+                if self.delay:
+                    time.sleep(self.delay)
+
+        threads = []
+        for host, pages in by_host.items():
+            host_queue = queue.Queue()
+            for page in pages:
+                host_queue.put(page)
+            for _ in range(min(self.per_host, len(pages))):
+                thread = threading.Thread(target=worker, args=(host_queue,), daemon=True)
+                thread.start()
+                threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        # Pages that were not re-parsed keep their previous listings
+        frames = []
+        for host, pages in by_host.items():
+            for url, state_id, stop_type, base_url in pages:
+                key = (stop_type, str(state_id))
+                if key in new_rows:
+                    frames.append(pd.DataFrame(new_rows[key], columns=LISTING_COLUMNS).astype(str))
+                elif key in previous_by_page:
+                    frames.append(previous_by_page[key])
+        listings = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=LISTING_COLUMNS)
+        listings = listings[LISTING_COLUMNS]
+
+        added, removed, changed = diff_listings(previous, listings)
+        listings.to_csv(self.listings_path, index=False)
+        self.save_state(state)
+
+        result = CrawlResult(listings, added, removed, changed, stats, pd.DataFrame(errors, columns=['url', 'error']))
+        result.print_summary()
+        return result
+
+
+def diff_listings(previous, current):
+    """
+    Compare two listing snapshots by full_url
+
+    Returns:
+        tuple of DataFrames: (added, removed, changed) where changed rows are the
+        current version of listings whose name or state differ
+    """
+    previous = previous.astype(str).drop_duplicates('full_url').set_index('full_url', drop=False)
+    current = current.astype(str).drop_duplicates('full_url').set_index('full_url', drop=False)
+    added = current[~current.index.isin(previous.index)]
+    removed = previous[~previous.index.isin(current.index)]
+    common = current.index.intersection(previous.index)
+    compare = ['name', 'state']
+    differs = (current.loc[common, compare] != previous.loc[common, compare]).any(axis=1)
+    changed = current.loc[common[differs.to_numpy()]]
+    return added.reset_index(drop=True), removed.reset_index(drop=True), changed.reset_index(drop=True)
+
+
+def serve_listing_stub(pages, host='127.0.0.1', port=0):
+    """
+    Serve listing pages on localhost with ETag / Last-Modified support, for testing
+
+    Args:
+        pages: dict {state_id: html}; edit it while the server runs to simulate changes
+        host: Interface to bind
+        port: Port to bind (0 = pick a free port)
+
+    Returns:
+        tuple: (server, base_url, hits) where hits counts responses by status code;
+        call server.shutdown() when done
+    """
+    hits = {}
+    lock = threading.Lock()
+    started = time.time()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parsed = urllib.parse.urlparse(self.path)
+            state_id = int(urllib.parse.parse_qs(parsed.query).get('state', ['0'])[0])
+            html = pages.get(state_id, "<html><body><h1 class='h2'>No listings</h1></body></html>")
+            body = html.encode('utf-8')
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            last_modified = formatdate(started, usegmt=True)
+
+            if self.headers.get('If-None-Match') == etag:
+                status = 304
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+            else:
+                status = 200
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', last_modified)
+                self.end_headers()
+                self.wfile.write(body)
+            with lock:
+                hits[status] = hits.get(status, 0) + 1
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/", hits
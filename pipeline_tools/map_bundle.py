@@ -0,0 +1,306 @@
+"""
+Clustered static map bundles for large exit / POI layers.
+
+A folium map with one marker per exit (API_Attempt/7.ipynb) or per geocoded
+stop (GeocodeScans.ipynb) embeds every point in one HTML file, which browsers
+stop opening somewhere past a few tens of thousands of markers.
+write_map_bundle pre-aggregates the points instead: for every zoom level below
+detail_zoom the points are binned into a Web-Mercator grid (cells_per_tile x
+cells_per_tile cells per 256 px map tile) with NumPy, and each non-empty tile's
+clusters (count + centroid) go to a small file of their own.  At detail_zoom and
+beyond, tiles hold the individual points with their popup columns.  The page
+loads only the tiles in view, so a national layer of hundreds of thousands of
+points stays as light as a county one.
+
+    write_map_bundle(df_exits, 'ca_exits_map', lat_column='lat', lon_column='lon',
+                     label_column='ref', popup_columns=['name', 'destination', 'exit_to'])
+    # open ca_exits_map/index.html (works from disk; the base map needs internet)
+
+Only non-empty tiles are written, as JSONP scripts (tiles/z/x/y.js calling
+mapTile(...)) rather than JSON so the bundle also works from file:// without a
+web server.
+"""
+
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def mercator_xy(lat, lon):
+    """
+    Web-Mercator coordinates normalized to [0, 1) (x east, y south), as Leaflet / OSM tiles use
+
+    Args:
+        lat: Latitudes (array-like)
+        lon: Longitudes (array-like)
+
+    Returns:
+        (x, y) float arrays
+    """
+    lat = np.clip(np.asarray(lat, dtype=float), -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT)
+    lon = np.asarray(lon, dtype=float)
+    x = (lon + 180.0) / 360.0
+    sin_lat = np.sin(np.radians(lat))
+    y = 0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)
+    return np.clip(x, 0, np.nextafter(1, 0)), np.clip(y, 0, np.nextafter(1, 0))
+
+
+def mercator_latlon(x, y):
+    """Inverse of mercator_xy"""
+    lon = np.asarray(x, dtype=float) * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(y, dtype=float)))))
+    return lat, lon
+
+
+def cluster_level(x, y, zoom, cells_per_tile=32):
+    """
+    Grid clusters of normalized Mercator points at one zoom level
+
+    Args:
+        x, y: Output of mercator_xy
+        zoom: Map zoom level
+        cells_per_tile: Grid cells along each side of a 256 px tile (32 = 8 px cells)
+
+    Returns:
+        DataFrame with tile_x, tile_y, lat, lon (centroid), count and row
+        (position of one member, the point itself for single-point clusters)
+    """
+    grid = (1 << zoom) * cells_per_tile
+    cell_x = (x * grid).astype(np.int64)
+    cell_y = (y * grid).astype(np.int64)
+    keys, first, inverse, counts = np.unique(cell_y * grid + cell_x, return_index=True, return_inverse=True,
+                                             return_counts=True)
+    lat, lon = mercator_latlon(np.bincount(inverse, weights=x) / counts, np.bincount(inverse, weights=y) / counts)
+    return pd.DataFrame({
+        'tile_x': (keys % grid) // cells_per_tile,
+        'tile_y': (keys // grid) // cells_per_tile,
+        'lat': lat,
+        'lon': lon,
+        'count': counts,
+        'row': first,
+    })
+
+
+def _write_tile(path, key, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"mapTile({json.dumps(key)},{json.dumps(payload, separators=(',', ':'), ensure_ascii=False)});\n")
+
+
+def _tile_groups(tile_x, tile_y):
+    """Yield ((tile_x, tile_y), member positions) for every non-empty tile"""
+    order = np.lexsort((tile_y, tile_x))
+    tx, ty = tile_x[order], tile_y[order]
+    breaks = np.flatnonzero((np.diff(tx) != 0) | (np.diff(ty) != 0)) + 1
+    for members in np.split(order, breaks):
+        if len(members):
+            yield (int(tile_x[members[0]]), int(tile_y[members[0]])), members.tolist()
+
+
+def _json_values(column):
+    """Column as JSON-ready Python values: numbers stay numbers, NaN becomes None, the rest str"""
+    if pd.api.types.is_bool_dtype(column) or pd.api.types.is_numeric_dtype(column):
+        values = column.astype(object).where(column.notna(), None)
+        return [v.item() if hasattr(v, 'item') else v for v in values.tolist()]
+    return [None if pd.isna(v) else str(v) for v in column.tolist()]
+
+
+def write_map_bundle(df, out_dir, lat_column='lat', lon_column='lon', label_column=None, popup_columns=None,
+                     min_zoom=0, detail_zoom=11, cells_per_tile=32, title='Map'):
+    """
+    Write a clustered, tiled static map of a point table
+
+    Args:
+        df: Points (exits, truck stops, geocoded rows, ...)
+        out_dir: Bundle directory (replaced): index.html plus tiles/
+        lat_column, lon_column: Coordinate columns; rows without both are skipped
+        label_column: Column shown as each point's tooltip
+        popup_columns: Columns listed in each point's popup (detail zoom only);
+            columns the table does not have are ignored
+        min_zoom: Lowest zoom level with cluster tiles
+        detail_zoom: First zoom level that shows individual points
+        cells_per_tile: Cluster grid cells along each side of a tile
+        title: Page title
+
+    Returns:
+        dict with points, cluster_tiles, point_tiles and bytes written
+    """
+    start = time.perf_counter()
+    lat = pd.to_numeric(df[lat_column], errors='coerce').to_numpy(dtype=float)
+    lon = pd.to_numeric(df[lon_column], errors='coerce').to_numpy(dtype=float)
+    valid = ~(np.isnan(lat) | np.isnan(lon))
+    points = df[valid]
+    lat, lon = lat[valid], lon[valid]
+    x, y = mercator_xy(lat, lon)
+
+    label_column = label_column if label_column in points.columns else None
+    popup_columns = [c for c in (popup_columns or []) if c in points.columns]
+    detail_columns = ([label_column] if label_column else []) + [c for c in popup_columns if c != label_column]
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    tiles_dir = os.path.join(out_dir, 'tiles')
+
+    # Cluster tiles: [lat, lon, count] per cluster
+    cluster_tiles = 0
+    for zoom in range(min_zoom, detail_zoom):
+        clusters = cluster_level(x, y, zoom, cells_per_tile)
+        rows = [[la, lo, c] for la, lo, c in zip(clusters['lat'].round(5).tolist(), clusters['lon'].round(5).tolist(),
+                                                 clusters['count'].tolist())]
+        for (tile_x, tile_y), members in _tile_groups(clusters['tile_x'].to_numpy(), clusters['tile_y'].to_numpy()):
+            key = f"{zoom}/{tile_x}/{tile_y}"
+            _write_tile(os.path.join(tiles_dir, f"{key}.js"), key, {'clusters': [rows[i] for i in members]})
+            cluster_tiles += 1
+
+    # Point tiles at detail_zoom: [lat, lon, *detail_columns] per point
+    n_tiles = 1 << detail_zoom
+    tile_x = np.minimum((x * n_tiles).astype(np.int64), n_tiles - 1)
+    tile_y = np.minimum((y * n_tiles).astype(np.int64), n_tiles - 1)
+    values = [lat.round(6).tolist(), lon.round(6).tolist()] + [_json_values(points[col]) for col in detail_columns]
+    rows = [list(row) for row in zip(*values)]
+    point_tiles = 0
+    for (tx, ty), members in _tile_groups(tile_x, tile_y):
+        key = f"{detail_zoom}/{tx}/{ty}"
+        _write_tile(os.path.join(tiles_dir, f"{key}.js"), key, {'columns': detail_columns, 'points': [rows[i] for i in members]})
+        point_tiles += 1
+
+    bounds = [[float(lat.min()), float(lon.min())], [float(lat.max()), float(lon.max())]] if len(lat) else [[24, -125], [50, -66]]
+    config = {
+        'title': title,
+        'bounds': bounds,
+        'minZoom': min_zoom,
+        'detailZoom': detail_zoom,
+        'label': label_column,
+    }
+    with open(os.path.join(out_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(_PAGE.replace('__TITLE__', _html_escape(title)).replace('__CONFIG__', json.dumps(config, separators=(',', ':'))))
+
+    size = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(out_dir) for name in names)
+    summary = {'points': int(valid.sum()), 'skipped': int((~valid).sum()), 'cluster_tiles': cluster_tiles,
+               'point_tiles': point_tiles, 'bytes': size}
+    print(f"🗺️ Map bundle: {summary['points']} points -> {cluster_tiles} cluster tiles (zoom {min_zoom}-{detail_zoom - 1}) "
+          f"+ {point_tiles} point tiles (zoom {detail_zoom}+), {size / 1e6:.1f} MB in {time.perf_counter() - start:.1f}s -> {out_dir}")
+    if summary['skipped']:
+        print(f"⚠️ {summary['skipped']} rows without coordinates were left out")
+    return summary
+
+
+def _html_escape(text):
+    return str(text).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css">
+<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<style>
+  html, body, #map { height: 100%; margin: 0; }
+  .cluster-label { background: none; border: none; box-shadow: none; font: bold 11px sans-serif; color: #fff; }
+  .cluster-label:before { display: none; }
+</style>
+</head>
+<body>
+<div id="map"></div>
+<script>
+var CONFIG = __CONFIG__;
+var map = L.map('map', {preferCanvas: true, minZoom: CONFIG.minZoom}).fitBounds(CONFIG.bounds);
+L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+  maxZoom: 19, attribution: '&copy; OpenStreetMap contributors'
+}).addTo(map);
+
+var cache = {}, requested = {}, layers = {}, visible = {};
+var group = L.layerGroup().addTo(map);
+
+function escapeHtml(value) {
+  return String(value).replace(/[&<>"']/g, function (c) {
+    return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+  });
+}
+
+function clusterRadius(count) { return Math.min(6 + 3 * Math.log2(count), 30); }
+function clusterColor(count) { return count >= 1000 ? '#b30000' : count >= 100 ? '#e34a33' : count >= 10 ? '#fc8d59' : '#2b8cbe'; }
+
+function buildLayer(key, data) {
+  var layer = L.layerGroup();
+  var zoom = parseInt(key.split('/')[0], 10);
+  if (data.clusters) {
+    data.clusters.forEach(function (c) {
+      var marker = L.circleMarker([c[0], c[1]], {
+        radius: clusterRadius(c[2]), color: clusterColor(c[2]), fillOpacity: 0.7, weight: 1
+      });
+      if (c[2] > 1) {
+        marker.bindTooltip(String(c[2]), {permanent: c[2] >= 10, direction: 'center', className: 'cluster-label'});
+        marker.on('click', function () { map.setView([c[0], c[1]], Math.min(zoom + 2, CONFIG.detailZoom)); });
+      }
+      layer.addLayer(marker);
+    });
+  } else {
+    data.points.forEach(function (p) {
+      var marker = L.circleMarker([p[0], p[1]], {radius: 5, color: '#2b8cbe', fillOpacity: 0.9, weight: 1});
+      var rows = data.columns.map(function (col, i) {
+        var value = p[i + 2];
+        return value === null ? '' : '<b>' + escapeHtml(col) + '</b>: ' + escapeHtml(value) + '<br>';
+      }).join('');
+      if (rows) { marker.bindPopup(rows); }
+      if (CONFIG.label && p[2] !== null) { marker.bindTooltip(escapeHtml(p[2])); }
+      layer.addLayer(marker);
+    });
+  }
+  return layer;
+}
+
+window.mapTile = function (key, data) {
+  cache[key] = data;
+  if (visible[key]) { show(key); }
+};
+
+function show(key) {
+  if (!layers[key]) { layers[key] = buildLayer(key, cache[key]); }
+  group.addLayer(layers[key]);
+}
+
+function refresh() {
+  var zoom = Math.max(CONFIG.minZoom, Math.min(map.getZoom(), CONFIG.detailZoom));
+  var bounds = map.getBounds();
+  var nw = map.project(bounds.getNorthWest(), zoom).divideBy(256).floor();
+  var se = map.project(bounds.getSouthEast(), zoom).divideBy(256).floor();
+  var wanted = {};
+  for (var x = nw.x; x <= se.x; x++) {
+    for (var y = nw.y; y <= se.y; y++) {
+      var key = zoom + '/' + x + '/' + y;
+      wanted[key] = true;
+    }
+  }
+  Object.keys(visible).forEach(function (key) {
+    if (!wanted[key] && layers[key]) { group.removeLayer(layers[key]); }
+  });
+  visible = wanted;
+  Object.keys(wanted).forEach(function (key) {
+    if (cache[key]) {
+      show(key);
+    } else if (!requested[key]) {
+      requested[key] = true;
+      var script = document.createElement('script');
+      script.src = 'tiles/' + key + '.js';
+      // Empty tiles have no file; a failed load just leaves that tile blank
+      script.onerror = function () { this.remove(); };
+      document.body.appendChild(script);
+    }
+  });
+}
+
+map.on('moveend', refresh);
+refresh();
+</script>
+</body>
+</html>
+"""
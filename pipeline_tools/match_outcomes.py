@@ -0,0 +1,234 @@
+"""
+Structured match outcomes in place of free-text Flag_Reason strings.
+
+Every Flag_Reason the matching notebooks write is one of a handful of
+templates, some with "Match i of n" appended.  encode_flag_reasons turns a
+column of those strings into four small integer columns:
+
+    Outcome       int8    which template (OUTCOMES)
+    Match_Fields  uint8   bitmask of the fields that matched (FIELD_BITS)
+    Match_Rank    uint16  i in "Match i of n" (0 when not a multiple match)
+    Match_Count   uint16  n in "Match i of n" (1 for single matches, 0 for failures)
+
+Parsing happens once per distinct string, so a column of any length costs a
+factorize plus a take.  render_flag_reasons rebuilds the exact strings for
+display, flag_category replaces the hand-listed arrays of
+classify_flag_reason (8.ipynb) with an array lookup, and filtering becomes
+integer comparison:
+
+    df = add_outcome_columns(df)
+    exits = df[df['Outcome'] == OUTCOME_CODES['EXIT_MULTIPLE']]
+    zip_ok = (df['Match_Fields'] & FIELD_BITS['ZIP']) != 0
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+SUCCESSFUL = 'Successful Matches'
+MULTIPLE = 'Multiple Matches'
+FAILED = 'Failed Matches'
+UNCLASSIFIED = 'Unclassified'
+FLAG_CATEGORIES = [SUCCESSFUL, MULTIPLE, FAILED, UNCLASSIFIED]
+
+FIELD_BITS = {
+    'PHONE': 1 << 0,
+    'NAME': 1 << 1,
+    'ZIP': 1 << 2,
+    'STATE': 1 << 3,
+    'EXIT': 1 << 4,
+    'HIGHWAY': 1 << 5,
+    'ROAD': 1 << 6,
+}
+
+
+def _fields(*names):
+    return sum(FIELD_BITS[n] for n in names)
+
+
+# (name, Flag_Reason template, Flag_Category, matched fields); the position is the int8 code.
+# Templates with {rank}/{count} are the "Match i of n" families.
+OUTCOMES = [
+    ('MISSING', None, FAILED, 0),
+    ('OTHER', None, UNCLASSIFIED, 0),
+    ('NO_MATCHES', "No matches found", FAILED, 0),
+    ('NO_PHONE_MATCH', "No Phone Match Found", FAILED, 0),
+    ('NO_ZIP', "no matching ZIPCODE", FAILED, 0),
+    ('ZIP_NO_STATE', "matching ZIPCODE, no matching State", FAILED, _fields('ZIP')),
+    ('ZIP_STATE_NO_EXIT', "matching ZIPCODE, matching State, no matching Exit", FAILED, _fields('ZIP', 'STATE')),
+    ('ZIP_STATE_EXIT_NO_HIGHWAY', "matching ZIPCODE, matching State, matching Exit, no matching Highway/Exit/Street Address",
+     FAILED, _fields('ZIP', 'STATE', 'EXIT')),
+    ('EXIT_NO_NAME', "No Phone/Name/ZIP/State/Exit/Highway matches found", FAILED, _fields('ZIP', 'STATE', 'EXIT', 'HIGHWAY')),
+    ('ROAD_NO_NAME', "No Name/ZIP/State/Road matches found for empty address type", FAILED, 0),
+    ('UNCLEAR_ADDRESS', "unclear OCR_address_standardized_OFF_parenthesis", FAILED, 0),
+    ('EXIT_SINGLE', "Single Name/ZIP/State/Exit/Highway Match Found", SUCCESSFUL,
+     _fields('NAME', 'ZIP', 'STATE', 'EXIT', 'HIGHWAY')),
+    ('ROAD_SINGLE', "Single Name/ZIP/State/Road Match Found (empty address type)", SUCCESSFUL,
+     _fields('NAME', 'ZIP', 'STATE', 'ROAD')),
+    ('RVER_AND_TRUCKER', "Available in RVer and Trucker", SUCCESSFUL, _fields('PHONE')),
+    ('RETRIEVAL', "Name/Address Retrieval Match Found", SUCCESSFUL, _fields('NAME', 'STATE')),
+    ('MULTIPLE_MATCHES', "Multiple matches found", MULTIPLE, 0),
+    ('EXIT_MULTIPLE', "Multiple Name/ZIP/State/Exit/Highway Matches Found - Match {rank} of {count}", MULTIPLE,
+     _fields('NAME', 'ZIP', 'STATE', 'EXIT', 'HIGHWAY')),
+    ('ROAD_MULTIPLE', "Multiple Name/ZIP/State/Road Matches Found (empty address type) - Match {rank} of {count}", MULTIPLE,
+     _fields('NAME', 'ZIP', 'STATE', 'ROAD')),
+    # spatial_candidates.apply_spatial_matches: within the radius and the name or the phone agrees
+    # (which one is not recorded in the reason); appended so stored codes keep their meaning
+    ('SPATIAL', "Spatial Name/Phone Match Found", SUCCESSFUL, 0),
+]
+
+OUTCOME_CODES = {name: code for code, (name, _, _, _) in enumerate(OUTCOMES)}
+OUTCOME_COLUMNS = ['Outcome', 'Match_Fields', 'Match_Rank', 'Match_Count']
+MAX_MATCH_COUNT = np.iinfo(np.uint16).max
+
+_CATEGORY_BY_CODE = np.array([FLAG_CATEGORIES.index(category) for _, _, category, _ in OUTCOMES], dtype=np.int8)
+_FIELDS_BY_CODE = np.array([fields for _, _, _, fields in OUTCOMES], dtype=np.uint8)
+_EXACT = {template: code for code, (_, template, _, _) in enumerate(OUTCOMES) if template and '{' not in template}
+_PATTERNS = [
+    (code, re.compile('^' + re.escape(template).replace(r'\{rank\}', r'(\d+)').replace(r'\{count\}', r'(\d+)') + '$'))
+    for code, (_, template, _, _) in enumerate(OUTCOMES) if template and '{' in template
+]
+
+
+def _parse_reason(text):
+    """
+    (code, rank, count) for one Flag_Reason string
+
+    Raises:
+        ValueError: "Match i of n" numbers beyond MAX_MATCH_COUNT
+    """
+    text = text.strip()
+    if text in ('', 'nan'):
+        return OUTCOME_CODES['MISSING'], 0, 0
+    code = _EXACT.get(text)
+    if code is not None:
+        return code, 0, 1 if OUTCOMES[code][2] == SUCCESSFUL else 0
+    for code, pattern in _PATTERNS:
+        match = pattern.match(text)
+        if match:
+            rank, count = int(match.group(1)), int(match.group(2))
+            if max(rank, count) > MAX_MATCH_COUNT:
+                raise ValueError(f"Match numbers above {MAX_MATCH_COUNT} do not fit Match_Rank/Match_Count: {text!r}")
+            return code, rank, count
+    return OUTCOME_CODES['OTHER'], 0, 0
+
+
+def encode_flag_reasons(reasons):
+    """
+    Structured outcome columns for a Flag_Reason column
+
+    Args:
+        reasons: Series (or array) of Flag_Reason strings; NaN allowed
+
+    Returns:
+        DataFrame with OUTCOME_COLUMNS plus Flag_Reason_Other, which keeps the
+        text of reasons that match no known template (None elsewhere)
+
+    Raises:
+        ValueError: A "Match i of n" reason with i or n above MAX_MATCH_COUNT
+    """
+    reasons = pd.Series(reasons, copy=False)
+    codes, uniques = pd.factorize(reasons.astype(object), use_na_sentinel=True)
+    parsed = np.array([_parse_reason(str(u)) for u in uniques] + [(OUTCOME_CODES['MISSING'], 0, 0)],
+                      dtype=np.int64).reshape(-1, 3)
+    # code -1 (missing) indexes the trailing MISSING entry
+    rows = parsed[codes]
+    outcome = rows[:, 0].astype(np.int8)
+    other_text = np.array([u if code == OUTCOME_CODES['OTHER'] else None for u, (code, _, _) in zip(uniques, parsed[:-1])] + [None],
+                          dtype=object)
+    return pd.DataFrame({
+        'Outcome': outcome,
+        'Match_Fields': _FIELDS_BY_CODE[outcome],
+        'Match_Rank': rows[:, 1].astype(np.uint16),
+        'Match_Count': rows[:, 2].astype(np.uint16),
+        'Flag_Reason_Other': other_text[codes],
+    }, index=reasons.index)
+
+
+def render_flag_reasons(outcome, rank, count, other=None):
+    """
+    Flag_Reason strings for structured outcomes (inverse of encode_flag_reasons)
+
+    Args:
+        outcome, rank, count: Outcome, Match_Rank and Match_Count columns
+        other: Flag_Reason_Other column, used for OTHER outcomes
+
+    Returns:
+        Series of strings (NaN for MISSING)
+    """
+    index = outcome.index if isinstance(outcome, pd.Series) else None
+    keys = pd.DataFrame({'o': np.asarray(outcome, dtype=np.int64), 'r': np.asarray(rank, dtype=np.int64),
+                         'c': np.asarray(count, dtype=np.int64)})
+    codes, uniques = pd.MultiIndex.from_frame(keys).factorize()
+    texts = []
+    for code, rank_value, count_value in uniques:
+        template = OUTCOMES[code][1]
+        texts.append(template.format(rank=rank_value, count=count_value) if template else None)
+    rendered = np.array(texts, dtype=object)[codes]
+    if other is not None:
+        is_other = keys['o'].to_numpy() == OUTCOME_CODES['OTHER']
+        rendered[is_other] = np.asarray(other, dtype=object)[is_other]
+    return pd.Series(rendered, index=index, dtype=object)
+
+
+def flag_category(outcome):
+    """Flag_Category (categorical) for Outcome codes, same buckets as classify_flag_reason in 8.ipynb"""
+    codes = _CATEGORY_BY_CODE[np.asarray(outcome, dtype=np.int64)]
+    index = outcome.index if isinstance(outcome, pd.Series) else None
+    return pd.Series(pd.Categorical.from_codes(codes, categories=FLAG_CATEGORIES), index=index)
+
+
+def classify_flag_reasons(reasons):
+    """Vectorized classify_flag_reason over a whole Flag_Reason column"""
+    return flag_category(encode_flag_reasons(reasons)['Outcome'])
+
+
+def add_outcome_columns(df, drop_text=False):
+    """
+    Add Outcome, Match_Fields, Match_Rank, Match_Count and Flag_Category to a matched frame
+
+    Args:
+        df: Frame with a Flag_Reason column
+        drop_text: Drop Flag_Reason (restore it with restore_flag_reason); the
+            text of unrecognised reasons is kept in Flag_Reason_Other
+
+    Returns:
+        DataFrame: copy of df with the structured columns
+    """
+    result_df = df.copy()
+    encoded = encode_flag_reasons(result_df['Flag_Reason'])
+    for col in OUTCOME_COLUMNS:
+        result_df[col] = encoded[col]
+    result_df['Flag_Category'] = flag_category(encoded['Outcome'])
+    if drop_text:
+        result_df['Flag_Reason_Other'] = encoded['Flag_Reason_Other']
+        result_df = result_df.drop(columns=['Flag_Reason'])
+
+    counts = result_df['Flag_Category'].value_counts()
+    print(f"✅ Encoded {len(result_df)} outcomes: " + ", ".join(f"{c} {counts.get(c, 0)}" for c in FLAG_CATEGORIES))
+    if counts.get(UNCLASSIFIED, 0):
+        unknown = encoded.loc[encoded['Outcome'] == OUTCOME_CODES['OTHER'], 'Flag_Reason_Other'].unique()
+        print(f"❓ Unrecognised Flag_Reason values: {list(unknown[:10])}")
+    return result_df
+
+
+def restore_flag_reason(df):
+    """Copy of df with the Flag_Reason text rebuilt from the structured columns"""
+    result_df = df.copy()
+    other = result_df['Flag_Reason_Other'] if 'Flag_Reason_Other' in result_df.columns else None
+    result_df['Flag_Reason'] = render_flag_reasons(result_df['Outcome'], result_df['Match_Rank'],
+                                                   result_df['Match_Count'], other)
+    return result_df
+
+
+def parse_match_rate(rates):
+    """
+    "6/6 successful match" style match rates as (matched, total) integer columns
+
+    Returns:
+        DataFrame with matched and total as Int32 (missing where the text does not parse)
+    """
+    parts = pd.Series(rates, copy=False).astype('string').str.extract(r'^\s*(\d+)\s*/\s*(\d+)')
+    return pd.DataFrame({'matched': pd.to_numeric(parts[0]).astype('Int32'),
+                         'total': pd.to_numeric(parts[1]).astype('Int32')})
@@ -0,0 +1,333 @@
+"""
+Normalized storage for the wide OCR_/Scraped_ combined frame.
+
+Matching_WebScrape/3.ipynb builds `combined_df` by copying every OCR row once per
+candidate match and gluing the full scraped row next to it, all as object dtype.
+A MatchStore keeps the same information in three tables:
+
+    ocr      one row per OCR record (columns without the OCR_ prefix)
+    scraped  one row per scraped record (columns without the Scraped_ prefix)
+    edges    one row per combined-frame row: int32 ocr_id / scraped_id (-1 = no
+             match), uint8 match_bits, and the per-row pipeline columns
+             (Flagged, Flag_Reason, match_accuracy, Manually Verified?, ...)
+
+String columns are stored as categoricals when they repeat and as Arrow-backed
+strings otherwise.  `wide()` rebuilds the familiar OCR_*/Scraped_* frame for just
+the rows (and columns) that are asked for, so later stages and ManualVerifier can
+work from the store without ever holding the full wide frame.
+
+    store = MatchStore.from_combined(combined_df)
+    store.save(r'C:\\Users\\clint\\Desktop\\Geocoding_Task\\Test_Code\\Matching_WebScrape\\3_store')
+    store = MatchStore.load(...)
+    store.wide(store.edges.index[store.edges['Flag_Reason'] == 'No matches found'])
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+OCR_PREFIX = 'OCR_'
+SCRAPED_PREFIX = 'Scraped_'
+
+# match_accuracy parts written by 3.ipynb, one bit each
+MATCH_BITS = {
+    'exact phone number (Phone)': 1 << 0,
+    'exact phone number (Phone 2)': 1 << 1,
+    'exact phone number (Fax)': 1 << 2,
+    'partial phone number (Phone)': 1 << 3,
+    'partial phone number (Phone 2)': 1 << 4,
+    'partial phone number (Fax)': 1 << 5,
+}
+EXACT_PHONE_BITS = MATCH_BITS['exact phone number (Phone)'] | MATCH_BITS['exact phone number (Phone 2)'] | MATCH_BITS['exact phone number (Fax)']
+
+
+def _string_dtype():
+    try:
+        import pyarrow
+        return pd.ArrowDtype(pyarrow.string())
+    except ImportError:
+        return 'string'
+
+
+def compact_frame(df, category_ratio=0.5, keep=()):
+    """
+    Shrink object columns: categorical when values repeat, Arrow strings otherwise
+
+    Integer columns are downcast (exact); float columns stay float64, since
+    float32 keeps only ~7 digits and would move coordinates by meters and
+    corrupt float-typed ids (ZIPs, phones read with NaNs).  Only object columns of
+    strings are converted to strings; object columns of numbers become numeric
+    and mixed ones are left as they are.
+
+    Args:
+        df: DataFrame to convert (modified copy is returned)
+        category_ratio: Use categorical when unique values / rows is below this
+        keep: Columns to leave untouched
+
+    Returns:
+        DataFrame
+    """
+    df = df.copy()
+    string_dtype = _string_dtype()
+    for col in df.columns:
+        if col in keep:
+            continue
+        series = df[col]
+        if series.dtype != object and not pd.api.types.is_string_dtype(series.dtype):
+            if pd.api.types.is_integer_dtype(series.dtype):
+                df[col] = pd.to_numeric(series, downcast='integer')
+            continue
+        non_null = series.dropna()
+        if non_null.empty:
+            df[col] = series.astype('category')
+            continue
+        types = non_null.map(type)
+        if types.eq(bool).all():
+            df[col] = series.astype('boolean')
+            continue
+        is_str = types.map(lambda t: issubclass(t, str))
+        if not is_str.all():
+            # Stringifying would turn 85001 and '85001' into one value and 1.0 into '1.0':
+            # columns holding only numbers become numeric, mixed ones are left alone
+            if not is_str.any():
+                numeric = pd.to_numeric(series, errors='coerce', downcast='integer')
+                if numeric.notna().sum() == len(non_null):
+                    df[col] = numeric
+            continue
+        if series.nunique(dropna=True) < category_ratio * len(series):
+            df[col] = series.astype(str).where(series.notna()).astype('category')
+        else:
+            df[col] = series.astype(str).where(series.notna()).astype(string_dtype)
+    return df
+
+
+def match_bits_from_accuracy(match_accuracy):
+    """Encode 3.ipynb match_accuracy strings ("exact phone number (Phone), ...") as bits"""
+    codes = pd.Series(match_accuracy, copy=False).astype('category')
+    lookup = np.zeros(len(codes.cat.categories) + 1, dtype=np.uint8)
+    for i, text in enumerate(codes.cat.categories):
+        for part in str(text).split(', '):
+            lookup[i] |= MATCH_BITS.get(part.strip(), 0)
+    # code -1 (missing) indexes the trailing zero
+    return lookup[codes.cat.codes.to_numpy()]
+
+
+def _row_ids(frame):
+    """int32 id per distinct row of frame; -1 for rows that are entirely empty"""
+    if frame.shape[1] == 0:
+        return np.full(len(frame), -1, dtype=np.int32), np.array([], dtype=np.int64)
+    hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    empty = frame.isna().all(axis=1).to_numpy()
+    codes, uniques = pd.factorize(np.where(empty, 0, hashes))
+    codes = codes.astype(np.int32)
+    # Positions of the first occurrence of each id
+    first_pos = pd.Series(np.arange(len(codes))).groupby(codes).first()
+    if empty.any():
+        empty_code = codes[np.flatnonzero(empty)[0]]
+        codes = np.where(codes == empty_code, -1, codes - (codes > empty_code)).astype(np.int32)
+        first_pos = first_pos.drop(empty_code)
+    return codes, first_pos.to_numpy()
+
+
+class MatchStore:
+    """OCR rows, scraped rows and a slim edge table in place of the wide combined frame"""
+
+    def __init__(self, ocr, scraped, edges, column_order=None):
+        self.ocr = ocr
+        self.scraped = scraped
+        self.edges = edges
+        # Original wide column order, so wide() round-trips to the same layout
+        self.column_order = column_order or (
+            [OCR_PREFIX + c for c in ocr.columns]
+            + [SCRAPED_PREFIX + c for c in scraped.columns]
+            + [c for c in edges.columns if c not in ('ocr_id', 'scraped_id', 'match_bits')]
+        )
+
+    @classmethod
+    def from_combined(cls, combined_df, compact=True):
+        """
+        Split a wide combined frame (3.csv ... 8.csv layout) into the three tables
+
+        Args:
+            combined_df: Wide frame with OCR_* and Scraped_* columns
+            compact: Convert string columns to categorical / Arrow dtypes
+
+        Returns:
+            MatchStore
+        """
+        ocr_cols = [c for c in combined_df.columns if c.startswith(OCR_PREFIX)]
+        scraped_cols = [c for c in combined_df.columns if c.startswith(SCRAPED_PREFIX)]
+        edge_cols = [c for c in combined_df.columns if c not in ocr_cols and c not in scraped_cols]
+
+        ocr_ids, ocr_first = _row_ids(combined_df[ocr_cols])
+        scraped_ids, scraped_first = _row_ids(combined_df[scraped_cols])
+
+        ocr = combined_df[ocr_cols].iloc[ocr_first].reset_index(drop=True)
+        ocr.columns = [c[len(OCR_PREFIX):] for c in ocr_cols]
+        scraped = combined_df[scraped_cols].iloc[scraped_first].reset_index(drop=True)
+        scraped.columns = [c[len(SCRAPED_PREFIX):] for c in scraped_cols]
+
+        edges = combined_df[edge_cols].reset_index(drop=True)
+        edges.insert(0, 'ocr_id', ocr_ids)
+        edges.insert(1, 'scraped_id', scraped_ids)
+        if 'match_accuracy' in edges.columns:
+            edges.insert(2, 'match_bits', match_bits_from_accuracy(edges['match_accuracy']))
+        else:
+            edges.insert(2, 'match_bits', np.zeros(len(edges), dtype=np.uint8))
+        for col in ('df1_source_row', 'df2_matched_row'):
+            if col in edges.columns:
+                edges[col] = pd.to_numeric(edges[col], errors='coerce').astype('Int32')
+
+        if compact:
+            ocr, scraped = compact_frame(ocr), compact_frame(scraped)
+            edges = compact_frame(edges, keep=('ocr_id', 'scraped_id', 'match_bits'))
+
+        return cls(ocr, scraped, edges, column_order=list(combined_df.columns))
+
+    @classmethod
+    def from_phone_matches(cls, df1, df2, all_matches, compact=True):
+        """
+        Build the store straight from 3.ipynb's df1, df2 and all_matches, skipping the wide frame
+
+        Args:
+            df1: OCR directory table
+            df2: Scraped reference table
+            all_matches: {df1 index: {'matches': {col: {'exact_indices', 'partial_indices'}}}}
+
+        Returns:
+            MatchStore
+        """
+        ocr_ids, scraped_ids, bits, accuracy, reasons = [], [], [], [], []
+        df1_positions = {idx: pos for pos, idx in enumerate(df1.index)}
+
+        for row_idx, match_data in all_matches.items():
+            per_scraped = {}
+            for col, results in match_data.get('matches', {}).items():
+                for df2_idx in results['exact_indices']:
+                    per_scraped.setdefault(df2_idx, []).append(f"exact phone number ({col})")
+                for df2_idx in results['partial_indices']:
+                    if df2_idx not in results['exact_indices']:
+                        per_scraped.setdefault(df2_idx, []).append(f"partial phone number ({col})")
+
+            if not per_scraped:
+                per_scraped = {-1: ["No matches"]}
+            reason = None
+            if -1 in per_scraped:
+                reason = "No matches found"
+            elif len(per_scraped) > 1:
+                reason = "Multiple matches found"
+
+            for df2_idx, parts in sorted(per_scraped.items()):
+                ocr_ids.append(df1_positions[row_idx])
+                scraped_ids.append(df2_idx)
+                text = ', '.join(parts)
+                accuracy.append(text)
+                bits.append(sum(MATCH_BITS.get(p, 0) for p in parts))
+                reasons.append(reason)
+
+        edges = pd.DataFrame({
+            'ocr_id': np.array(ocr_ids, dtype=np.int32),
+            'scraped_id': np.array(scraped_ids, dtype=np.int32),
+            'match_bits': np.array(bits, dtype=np.uint8),
+            'match_accuracy': pd.Categorical(accuracy),
+            'Flagged': pd.array([r is not None for r in reasons], dtype='boolean'),
+            'Flag_Reason': pd.Categorical(reasons),
+        })
+        ocr = df1.reset_index(drop=True)
+        scraped = df2.reset_index(drop=True)
+        if compact:
+            ocr, scraped = compact_frame(ocr), compact_frame(scraped)
+        return cls(ocr, scraped, edges)
+
+    # ---- views ---------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.edges)
+
+    def wide(self, rows=None, columns=None):
+        """
+        Materialize the OCR_*/Scraped_* frame for selected edge rows only
+
+        Args:
+            rows: Edge positions, a boolean mask over edges, or None for all rows
+            columns: Wide column names to return (default: all, original order)
+
+        Returns:
+            DataFrame shaped like the combined CSVs
+        """
+        edges = self.edges if rows is None else (
+            self.edges[rows] if isinstance(rows, (pd.Series, np.ndarray)) and np.asarray(rows).dtype == bool
+            else self.edges.iloc[np.asarray(rows)]
+        )
+        columns = list(columns) if columns is not None else self.column_order
+
+        ocr_ids = edges['ocr_id'].to_numpy()
+        scraped_ids = edges['scraped_id'].to_numpy()
+        has_scraped = scraped_ids >= 0
+        out = {}
+        for col in columns:
+            if col.startswith(OCR_PREFIX) and col[len(OCR_PREFIX):] in self.ocr.columns:
+                out[col] = self.ocr[col[len(OCR_PREFIX):]].take(ocr_ids).to_numpy(dtype=object)
+            elif col.startswith(SCRAPED_PREFIX) and col[len(SCRAPED_PREFIX):] in self.scraped.columns:
+                values = np.full(len(edges), None, dtype=object)
+                values[has_scraped] = self.scraped[col[len(SCRAPED_PREFIX):]].take(scraped_ids[has_scraped]).to_numpy(dtype=object)
+                out[col] = values
+            elif col in edges.columns:
+                out[col] = edges[col].to_numpy(dtype=object)
+        return pd.DataFrame(out, index=edges.index)
+
+    def iter_wide(self, batch_size=50_000, columns=None):
+        """Yield the wide frame in batches of edge rows"""
+        for start in range(0, len(self.edges), batch_size):
+            yield self.wide(np.arange(start, min(start + batch_size, len(self.edges))), columns)
+
+    def edges_for_ocr(self, ocr_id):
+        """All edge rows (candidate matches) of one OCR record"""
+        return self.edges[self.edges['ocr_id'] == ocr_id]
+
+    # ---- persistence -----------------------------------------------------------
+
+    def save(self, directory):
+        """Write ocr/scraped/edges as Parquet files in directory"""
+        os.makedirs(directory, exist_ok=True)
+        self.ocr.to_parquet(os.path.join(directory, 'ocr.parquet'), index=False)
+        self.scraped.to_parquet(os.path.join(directory, 'scraped.parquet'), index=False)
+        self.edges.to_parquet(os.path.join(directory, 'edges.parquet'), index=False)
+        pd.Series(self.column_order).to_frame('column').to_parquet(os.path.join(directory, 'columns.parquet'), index=False)
+        print(f"💾 Match store saved to: {directory}")
+        return directory
+
+    @classmethod
+    def load(cls, directory, edge_columns=None):
+        """
+        Load a saved store
+
+        Args:
+            directory: Folder written by save()
+            edge_columns: Optional subset of edge columns to read (ids are always read)
+        """
+        if edge_columns is not None:
+            edge_columns = list(dict.fromkeys(['ocr_id', 'scraped_id', 'match_bits'] + list(edge_columns)))
+        return cls(
+            pd.read_parquet(os.path.join(directory, 'ocr.parquet')),
+            pd.read_parquet(os.path.join(directory, 'scraped.parquet')),
+            pd.read_parquet(os.path.join(directory, 'edges.parquet'), columns=edge_columns),
+            column_order=pd.read_parquet(os.path.join(directory, 'columns.parquet'))['column'].tolist(),
+        )
+
+    def memory_report(self, wide_df=None):
+        """Deep memory of the three tables, optionally next to the wide frame they came from"""
+        sizes = {
+            'ocr': self.ocr.memory_usage(deep=True).sum(),
+            'scraped': self.scraped.memory_usage(deep=True).sum(),
+            'edges': self.edges.memory_usage(deep=True).sum(),
+        }
+        total = sum(sizes.values())
+        for name, size in sizes.items():
+            print(f"  {name:8s} {size / 1e6:10.1f} MB")
+        print(f"  {'total':8s} {total / 1e6:10.1f} MB")
+        if wide_df is not None:
+            wide_size = wide_df.memory_usage(deep=True).sum()
+            print(f"  wide     {wide_size / 1e6:10.1f} MB  ({wide_size / total:.1f}x larger)")
+        return sizes
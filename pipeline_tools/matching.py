@@ -0,0 +1,684 @@
+"""
+Importable copies of the cleaning and matching functions from the notebooks.
+
+The notebooks define these inline against global `df` / `df2` frames, which makes
+them impossible to reuse from scripts, benchmarks or later pipeline stages.  The
+functions here keep the notebook logic and strings unchanged but take their
+inputs as arguments:
+
+    - clean_text_for_matching, filter_meaningful_words, normalize_zip_code
+      and comprehensive_matching_logic from Matching_WebScrape/5.ipynb
+    - the per-field cleaners and the Add_3 candidate steps from Cleaned_Code/Add_3.ipynb
+    - determine_match_success from Cleaned_Code/Add_4.ipynb
+"""
+
+import re
+
+import pandas as pd
+
+from .instrumentation import instrument_stage
+
+################################################################################
+# Matching_WebScrape/5.ipynb
+################################################################################
+
+# Common words to exclude from name matching (case-insensitive)
+EXCLUDE_WORDS = {
+    # Vehicle/Transportation related
+    'truck', 'trucks', 'trucker', 'truckers', 'trucking',
+    'stop', 'stops', 'station', 'stations',
+    'travel', 'travels', 'traveling', 'centre', 'center',
+    'plaza', 'plazas', 'mart', 'store', 'stores',
+    'gas', 'fuel', 'petrol', 'petroleum', 'diesel',
+    'service', 'services', 'auto', 'automotive',
+    'parking', 'fleet', 'commercial', 'professional',
+
+    # Generic business terms
+    'inc', 'llc', 'corp', 'corporation', 'company', 'co',
+    'ltd', 'limited', 'enterprises', 'enterprise',
+    'group', 'international', 'intl', 'usa', 'america',
+    'franchise', 'chain', 'brand', 'corporate',
+
+    # Location/Direction terms (but keep specific place names)
+    'north', 'south', 'east', 'west', 'ne', 'nw', 'se', 'sw',
+    'highway', 'hwy', 'road', 'rd', 'street', 'st', 'avenue', 'ave',
+    'exit', 'interchange', 'junction',
+
+    # Common adjectives/descriptors (removed 'town' and 'city' as they can be part of business names)
+    'big', 'small', 'large', 'giant', 'super', 'mega', 'express',
+    'quick', 'fast', 'convenient', 'friendly', 'family',
+    'country', 'state', 'national', 'speedy', 'instant',
+
+    # Food/Restaurant terms
+    'restaurant', 'cafe', 'diner', 'grill', 'kitchen', 'food', 'eats',
+
+    # Accommodation terms
+    'motel', 'hotel', 'inn', 'lodge', 'rest',
+
+    # Time/Convenience terms
+    '24', 'hour', 'hours',
+
+    # Connectors and articles
+    'and', 'or', 'the', 'of', 'in', 'at', 'on', 'for', 'with', 'by'
+}
+
+
+def clean_text_for_matching(text):
+    """Clean text for case-insensitive matching, removing hyphens, apostrophes, spaces, periods"""
+    if pd.isna(text):
+        return ""
+    return re.sub(r"['-.\s]", "", str(text).lower())
+
+
+def filter_meaningful_words(text):
+    """
+    Extract meaningful words for name matching, excluding common generic terms.
+    Returns a list of words that are meaningful for matching business names.
+    """
+    if pd.isna(text):
+        return []
+
+    # Split text into words and clean each word
+    words = str(text).lower().split()
+    meaningful_words = []
+
+    for word in words:
+        # Clean the word (remove punctuation, etc.)
+        cleaned_word = re.sub(r"[^\w]", "", word)
+
+        # Keep words that are:
+        # 1. At least 3 characters long
+        # 2. Not in the exclude list
+        # 3. Not purely numeric
+        if (len(cleaned_word) >= 3 and
+            cleaned_word not in EXCLUDE_WORDS and
+            not cleaned_word.isdigit()):
+            meaningful_words.append(cleaned_word)
+
+    return meaningful_words
+
+
+def normalize_zip_code(zip_code):
+    """Normalize ZIP code to 5 digits with leading zeros (e.g., '2345' -> '02345')"""
+    if pd.isna(zip_code):
+        return None
+    try:
+        # Remove any non-digit characters and convert to string
+        zip_str = re.sub(r'\D', '', str(zip_code))
+        if len(zip_str) >= 5:
+            return zip_str[:5]  # Take first 5 digits
+        elif len(zip_str) > 0:
+            return zip_str.zfill(5)  # Pad with leading zeros to make 5 digits
+        else:
+            return None
+    except Exception:
+        return None
+
+
+def names_match(ocr_words, business_words):
+    """Notebook name rule: any OCR word contained in (or containing) any business word"""
+    for ocr_word in ocr_words:
+        for business_word in business_words:
+            if ocr_word in business_word or business_word in ocr_word:
+                return f"{ocr_word}→{business_word}"
+    return None
+
+
+def prepare_reference(df2):
+    """Copy of the scraped reference table with the ZIP_normalized column the matcher uses"""
+    df2_work = df2.copy()
+    df2_work['ZIP_normalized'] = df2_work['Postal Code'].apply(normalize_zip_code)
+    return df2_work
+
+
+def match_exit_row(row, df2_work, verbose=False):
+    """
+    Steps 3-8 of comprehensive_matching_logic for one OCR row
+
+    Args:
+        row: Combined-frame row with OCR_zip_code, OCR_state, OCR_Exit_Number,
+            OCR_Main_Road and OCR_label
+        df2_work: Reference table from prepare_reference()
+        verbose: Print the per-step trace the notebook prints
+
+    Returns:
+        tuple: (flag_reason or None, DataFrame of name-matched reference rows)
+    """
+    empty = df2_work.iloc[0:0]
+
+    # Step 3: Extract and normalize OCR_zip_code
+    ocr_zip = normalize_zip_code(row['OCR_zip_code'])
+
+    # Step 4: Check ZIP code match
+    if not ocr_zip:
+        if verbose:
+            print(f"  ❌ No valid ZIP code")
+        return "no matching ZIPCODE", empty
+
+    zip_matches = df2_work[df2_work['ZIP_normalized'] == ocr_zip]
+    if zip_matches.empty:
+        if verbose:
+            print(f"  ❌ ZIP {ocr_zip} not found")
+        return "no matching ZIPCODE", empty
+
+    # Step 5: Check state match
+    ocr_state = row['OCR_state']
+    state_matches = zip_matches[zip_matches['State'] == ocr_state]
+    if state_matches.empty:
+        if verbose:
+            print(f"  ❌ State {ocr_state} not found")
+        return "matching ZIPCODE, no matching State", empty
+
+    # Step 6: Check exit number match
+    ocr_exit = row['OCR_Exit_Number']
+    try:
+        ocr_exit_str = str(int(float(ocr_exit))) if pd.notna(ocr_exit) else ""
+    except Exception:
+        ocr_exit_str = str(ocr_exit).strip() if pd.notna(ocr_exit) else ""
+
+    if ocr_exit_str:
+        exit_matches = state_matches[
+            state_matches['Exit'].astype(str).str.contains(ocr_exit_str, case=False, na=False, regex=False)
+        ]
+    else:
+        exit_matches = empty
+
+    if exit_matches.empty:
+        if verbose:
+            print(f"  ❌ Exit {ocr_exit} not found")
+        return "matching ZIPCODE, matching State, no matching Exit", empty
+
+    # Step 7: Check highway match against Highway, Exit, and Street Address columns
+    ocr_highway = row['OCR_Main_Road']
+    highway_condition = (
+        (exit_matches['Highway'] == ocr_highway) |
+        (exit_matches['Exit'] == ocr_highway) |
+        (exit_matches['Street Address'] == ocr_highway)
+    )
+    highway_matches = exit_matches[highway_condition]
+
+    if highway_matches.empty:
+        if verbose:
+            print(f"  ❌ Highway/Exit/Street Address '{ocr_highway}' not found in any of the three columns")
+        return "matching ZIPCODE, matching State, matching Exit, no matching Highway/Exit/Street Address", empty
+
+    # Step 8: Check name matches
+    ocr_label = row['OCR_label']
+    ocr_words = [] if pd.isna(ocr_label) else filter_meaningful_words(ocr_label)
+
+    name_match_indices = []
+    for hw_idx, hw_row in highway_matches.iterrows():
+        business_words = filter_meaningful_words(hw_row['Chain']) + filter_meaningful_words(hw_row['name'])
+        matched = names_match(ocr_words, business_words)
+        if matched:
+            name_match_indices.append(hw_idx)
+            if verbose:
+                print(f"    🎯 Match found: {[matched]}")
+
+    if not name_match_indices:
+        if verbose:
+            print(f"  ❌ No name matches found")
+        return "No Phone/Name/ZIP/State/Exit/Highway matches found", empty
+
+    return None, highway_matches.loc[name_match_indices]
+
+
+def match_flag_reason(match_num, match_count):
+    """Flag_Reason written for the match_num-th (0-based) of match_count name matches"""
+    if match_count == 1:
+        return "Single Name/ZIP/State/Exit/Highway Match Found"
+    return f"Multiple Name/ZIP/State/Exit/Highway Matches Found - Match {match_num + 1} of {match_count}"
+
+
+# Timed into instrumentation.METRICS; no tracemalloc, which would triple the runtime
+@instrument_stage('comprehensive_matching_logic', rows_arg='df', trace_memory=False)
+def comprehensive_matching_logic(df, df2, row_mask=None, verbose=True, df2_work=None):
+    """
+    Complete implementation of the 14-step matching logic from Matching_WebScrape/5.ipynb:
+    1. Filter rows where Flag_Reason equals "No matches found" and OCR_Address_Type equals "Exit"
+    2. Process all filtered rows
+    3-8. Progressive matching: ZIP -> State -> Exit -> Highway -> Name
+    9-14. Handle different match scenarios and create duplicate rows for multiple matches
+
+    Args:
+        df: Combined OCR_/Scraped_ frame
+        df2: Scraped reference table
+        row_mask: Optional boolean mask overriding the step 1 filter
+        verbose: Print the per-row trace
+        df2_work: prepare_reference(df2), when the caller keeps it across calls
+
+    Returns:
+        DataFrame: df with matched rows filled in and extra rows for multiple matches
+    """
+
+    # Step 1: Filter rows
+    if row_mask is None:
+        row_mask = (df['Flag_Reason'] == "No matches found") & (df['OCR_Address_Type'] == "Exit")
+    selected_rows = df[row_mask]
+
+    if len(selected_rows) == 0:
+        if verbose:
+            print("No rows found matching the filter criteria")
+        return df
+
+    result_df = df.copy()
+    if 'Manually Verified?' not in result_df.columns:
+        result_df['Manually Verified?'] = "No"
+
+    new_rows_to_add = []
+    if df2_work is None:
+        df2_work = prepare_reference(df2)
+    scraped_map = [(col, f"Scraped_{col}") for col in df2.columns if f"Scraped_{col}" in result_df.columns]
+    scraped_cols = [c for c in result_df.columns if c.startswith('Scraped_')]
+
+    if verbose:
+        print(f"Processing {len(selected_rows)} rows...")
+
+    for row_num, (idx, row) in enumerate(selected_rows.iterrows(), 1):
+        if verbose:
+            print(f"\nRow {row_num}/{len(selected_rows)} (Index {idx}):")
+
+        flag_reason, matches = match_exit_row(row, df2_work, verbose=verbose)
+
+        if flag_reason is not None:
+            result_df.loc[idx, 'Flagged'] = True
+            result_df.loc[idx, 'Flag_Reason'] = flag_reason
+            continue
+
+        for match_num, (_, match_row) in enumerate(matches.iterrows()):
+            scraped_data = {scraped_col: match_row[df2_col] for df2_col, scraped_col in scraped_map}
+            reason = match_flag_reason(match_num, len(matches))
+
+            if match_num == 0:
+                # First match: update the original row
+                result_df.loc[idx, 'Flagged'] = False
+                result_df.loc[idx, 'Flag_Reason'] = reason
+                result_df.loc[idx, 'Manually Verified?'] = "Please Verify This"
+                for col, value in scraped_data.items():
+                    result_df.loc[idx, col] = value
+            else:
+                # Additional matches: copy the original row and clear its scraped data
+                new_row = result_df.loc[idx].copy()
+                new_row['Flagged'] = False
+                new_row['Flag_Reason'] = reason
+                new_row['Manually Verified?'] = "Please Verify This"
+                new_row[scraped_cols] = None
+                for col, value in scraped_data.items():
+                    new_row[col] = value
+                new_rows_to_add.append(new_row)
+
+            if verbose:
+                print(f"      ✓ Filled data for {match_row['Chain']} - {match_row['name']}")
+
+    if new_rows_to_add:
+        result_df = pd.concat([result_df, pd.DataFrame(new_rows_to_add)], ignore_index=True)
+        if verbose:
+            print(f"\n🎉 Added {len(new_rows_to_add)} new rows for multiple matches!")
+
+    if verbose:
+        print(f"\n📊 Final result: {len(result_df)} rows (original: {len(df)}, added: {len(new_rows_to_add)})")
+    return result_df
+
+
+################################################################################
+# Cleaned_Code/Add_3.ipynb
+################################################################################
+
+PHONE_COLUMNS = ['Phone', 'Phone 2', 'Phone 3', 'Phone 4', 'Phone 5', 'Fax']
+
+CHAIN_MAPPINGS = {
+    'sinclair': ['sinclair', 'sinclair oil'],
+    'travelcenters': ['ta', 'taexpress', 'talogo'],
+    'eleven': ['11', '7-11', 'seven', 'eleven', '7 eleven', '7eleven'],
+    "love's": ['love', 'loves', "love's"],
+    'speedway': ['speedway', 'speedwaygas'],
+    'chevron': ['chevron'],
+    'flying j': ['flying j'],
+    'tesoro': ['tesoro'],
+    'shell': ['shell'],
+    'texaco': ['texaco'],
+    'exxon': ['exxon'],
+    'pilot': ['pilot'],
+    'conoco': ['conoco'],
+    'shamrock': ['shamrock'],
+    'valero': ['valero'],
+    'bp': ['bp'],
+    'mobil': ['mobil'],
+    'circle k': ['circle_k', 'circle k'],
+    'citgo': ['citgo'],
+    '76': ['76', 'union 76']
+}
+
+LABEL_STOP_WORDS = {'the', '#', '&', 'and', 'or', 'a', 'an', 'at', 'by', 'for', 'from', 'in',
+                    'of', 'on', 'to', 'with', 'gas', 'station', 'service', 'store'}
+
+ROAD_COMMON_WORDS = {'the', 'of', 'and', 'to', 'a', 'in', 'for', 'is', 'on', 'that', 'by', 'this', 'with', 'i', 'you', 'it'}
+
+
+def clean_phone_number(phone_str):
+    """Digits only; anything shorter than 7 digits is treated as missing"""
+    if pd.isna(phone_str):
+        return ''
+    digits_only = re.sub(r'\D', '', str(phone_str))
+    if len(digits_only) >= 7:
+        return digits_only
+    return ''
+
+
+def clean_zip_code(zip_str):
+    """First 5 digits of a ZIP code as a string"""
+    if pd.isna(zip_str):
+        return ''
+    zip_clean = str(zip_str).strip()
+    zip_clean = re.sub(r'[^0-9]', '', zip_clean)[:5]
+    return zip_clean
+
+
+def clean_city(city_str):
+    """Lowercase word tokens of a city name"""
+    if pd.isna(city_str):
+        return []
+    city_clean = re.sub(r'[^a-zA-Z0-9\s]', '', str(city_str).lower()).strip()
+    return city_clean.split()
+
+
+def extract_exit_numbers(exit_str):
+    """All numbers in an exit field, including both sides of compounds like "160 EB/164 WB" """
+    if pd.isna(exit_str):
+        return []
+
+    exit_str = str(exit_str)
+    exit_numbers = re.findall(r'\d+', exit_str)
+
+    # Special handling for compound exits like "160 EB/164 WB"
+    if '/' in exit_str:
+        for part in exit_str.split('/'):
+            exit_numbers.extend(re.findall(r'\d+', part))
+
+    return list(set(exit_numbers))
+
+
+def clean_state(state_str):
+    """Uppercase letters only"""
+    if pd.isna(state_str):
+        return ''
+    return re.sub(r'[^A-Z]', '', str(state_str).upper())
+
+
+def extract_road_tokens(road_str):
+    """Road name words plus route numbers (I-10 -> 10, US 60-70 -> 60, 70, NV 604/574 -> 604, 574)"""
+    if pd.isna(road_str):
+        return set()
+
+    road_str = str(road_str).lower()
+    tokens = set()
+
+    basic_name = re.sub(r'[^a-z0-9\s]', ' ', road_str)
+    tokens.update(basic_name.split())
+
+    for match in re.findall(r'(\d+)(?:\s*-\s*(\d+))?', road_str):
+        tokens.add(match[0])
+        if match[1]:
+            tokens.add(match[1])
+
+    interstate_match = re.search(r'i\s*[-]?\s*(\d+)', road_str)
+    if interstate_match:
+        tokens.add(interstate_match.group(1))
+
+    state_route_match = re.search(r'[a-z]{2}\s*[-]?\s*(\d+)', road_str)
+    if state_route_match:
+        tokens.add(state_route_match.group(1))
+
+    if '/' in road_str:
+        for part in road_str.split('/'):
+            tokens.update(re.findall(r'\d+', part))
+
+    directionals = ['n', 's', 'e', 'w', 'north', 'south', 'east', 'west']
+    street_types = ['st', 'ave', 'blvd', 'rd', 'ln', 'dr', 'way', 'pkwy', 'hwy', 'expwy']
+
+    for word in road_str.split():
+        word = re.sub(r'[^a-z0-9]', '', word)
+        if (word not in directionals and word not in street_types and
+            not (len(word) == 1 and word.isalpha())):
+            tokens.add(word)
+
+    return tokens - ROAD_COMMON_WORDS
+
+
+def standardize_chain(chain_str):
+    """Chain text plus its words plus every known alias of any canonical chain it mentions"""
+    if pd.isna(chain_str):
+        return set()
+
+    chain_str = str(chain_str).lower()
+    tokens = {chain_str}
+    tokens.update(re.sub(r'[^a-z0-9\s]', ' ', chain_str).split())
+
+    # One automaton pass finds every CHAIN_MAPPINGS variation (substring rule, as before);
+    # the notebook's extra "11"/"seven"/"eleven" check is the 'eleven' mapping itself
+    for canonical in _chain_aliases().chains(chain_str):
+        tokens.add(canonical)
+        tokens.update(CHAIN_MAPPINGS[canonical])
+
+    return tokens
+
+
+_CHAIN_ALIASES = None
+
+
+def _chain_aliases():
+    global _CHAIN_ALIASES
+    if _CHAIN_ALIASES is None:
+        from .brand_dictionary import BrandDictionary
+        _CHAIN_ALIASES = BrandDictionary.from_aliases(CHAIN_MAPPINGS, boundary='none')
+    return _CHAIN_ALIASES
+
+
+def extract_label_words(label_str):
+    """Meaningful lowercase words of a label"""
+    if pd.isna(label_str):
+        return set()
+
+    clean_label = re.sub(r'[^a-z0-9\s]', ' ', str(label_str).lower())
+    words = clean_label.split()
+
+    meaningful_words = set()
+    for word in words:
+        if not word.isdigit() and word not in LABEL_STOP_WORDS and len(word) > 1:
+            meaningful_words.add(word)
+            if word == '7' and any(eleven_word in words for eleven_word in ['eleven', '11']):
+                meaningful_words.add('7-eleven')
+            if word == 'loves':
+                meaningful_words.add("love's")
+
+    return meaningful_words
+
+
+def _token_index(token_series):
+    """Map every token to the sorted list of row positions whose token set contains it"""
+    index = {}
+    for pos, tokens in enumerate(token_series):
+        for token in tokens:
+            index.setdefault(token, []).append(pos)
+    return index
+
+
+def _lookup(index, tokens):
+    matches = set()
+    for token in tokens:
+        matches.update(index.get(token, ()))
+    return sorted(matches)
+
+
+def _column_or_empty(df, col, empty):
+    if col in df.columns:
+        return df[col]
+    return pd.Series([empty] * len(df), index=df.index, dtype=object)
+
+
+def build_candidate_index(df2):
+    """
+    Inverted indexes over the reference table for generate_candidates steps 1-8
+
+    Build once and pass as generate_candidates(..., index=...) when the directory
+    is matched in several pieces against the same reference.
+
+    Args:
+        df2: Scraped reference table (Add_2_scraped.csv layout)
+
+    Returns:
+        dict of step name -> {token: sorted df2 positions}
+    """
+    df2 = df2.reset_index(drop=True)
+
+    # STEP 1: phone
+    phone_sets = {}
+    for col in PHONE_COLUMNS:
+        if col in df2.columns:
+            for pos, phone in enumerate(df2[col].apply(clean_phone_number)):
+                if phone:
+                    phone_sets.setdefault(phone, set()).add(pos)
+
+    # STEP 6: road tokens from every road-like column
+    df2_road_tokens = [set() for _ in range(len(df2))]
+    for col in ['Highway', 'Street Address', 'Mailing Address', 'Road Name']:
+        if col in df2.columns:
+            for pos, tokens in enumerate(df2[col].apply(extract_road_tokens)):
+                df2_road_tokens[pos].update(tokens)
+
+    # STEP 8: label vs name/chain words
+    label_targets = [
+        a | b for a, b in zip(_column_or_empty(df2, 'name', None).apply(extract_label_words),
+                              _column_or_empty(df2, 'Chain', None).apply(extract_label_words))
+    ]
+
+    return {
+        'phone': {phone: sorted(rows) for phone, rows in phone_sets.items()},
+        'zip': _token_index(_column_or_empty(df2, 'Postal Code', None).apply(lambda z: [clean_zip_code(z)] if clean_zip_code(z) else [])),
+        'city': _token_index(_column_or_empty(df2, 'City', None).apply(clean_city)),
+        'exit': _token_index(_column_or_empty(df2, 'Exit', None).apply(extract_exit_numbers)),
+        'state': _token_index(_column_or_empty(df2, 'State', None).apply(lambda s: [clean_state(s)] if clean_state(s) else [])),
+        'road': _token_index(df2_road_tokens),
+        'chain': _token_index(_column_or_empty(df2, 'Chain', None).apply(standardize_chain)),
+        'label': _token_index(label_targets),
+    }
+
+
+def generate_candidates(df1, df2, index=None):
+    """
+    Steps 1-8 of Add_3.ipynb: candidate reference rows per directory row, field by field
+
+    Each step keeps the notebook's matching rule (equality for phone/ZIP/state,
+    any shared token for city/exit/road/chain/label) but looks tokens up in an
+    inverted index over df2 instead of scanning every df2 row.
+
+    Args:
+        df1: OCR directory table (Add_2.csv layout)
+        df2: Scraped reference table (Add_2_scraped.csv layout)
+        index: build_candidate_index(df2), when the caller keeps it across calls
+
+    Returns:
+        DataFrame: df1 with the *_scraped_matches_row_ids columns holding lists of df2 positions
+    """
+    df1 = df1.reset_index(drop=True).copy()
+    if index is None:
+        index = build_candidate_index(df2)
+
+    # STEP 1: phone
+    df1['phone_scraped_matches_row_ids'] = [
+        list(index['phone'].get(p, ())) if p else [] for p in _column_or_empty(df1, 'phone', None).apply(clean_phone_number)
+    ]
+
+    # STEP 2: ZIP
+    df1['ZIP_scraped_matches_row_ids'] = [
+        _lookup(index['zip'], [z]) if z else [] for z in _column_or_empty(df1, 'zip_code', None).apply(clean_zip_code)
+    ]
+
+    # STEP 3: city (city + major_city tokens)
+    city_tokens = _column_or_empty(df1, 'city', None).apply(clean_city) + _column_or_empty(df1, 'major_city', None).apply(clean_city)
+    df1['City_scraped_matches_row_ids'] = [_lookup(index['city'], set(t)) for t in city_tokens]
+
+    # STEP 4: exit numbers from all exit columns
+    exit_columns = ['Exit_Number', 'Exit_From_Address', 'Exit_From_Label', 'Exit_Number_2', 'Exit_Number_3']
+    exit_tokens = [set() for _ in range(len(df1))]
+    for col in exit_columns:
+        if col in df1.columns:
+            for pos, nums in enumerate(df1[col].apply(extract_exit_numbers)):
+                exit_tokens[pos].update(nums)
+    df1['Exit_scraped_matches_row_ids'] = [_lookup(index['exit'], t) for t in exit_tokens]
+
+    # STEP 5: state
+    df1['State_scraped_matches_row_ids'] = [
+        _lookup(index['state'], [s]) if s else [] for s in _column_or_empty(df1, 'state', None).apply(clean_state)
+    ]
+
+    # STEP 6: road tokens
+    road_tokens = [set() for _ in range(len(df1))]
+    for col in ['Main_Road', 'Secondary_Road', 'Tertiary_Road']:
+        if col in df1.columns:
+            for pos, tokens in enumerate(df1[col].apply(extract_road_tokens)):
+                road_tokens[pos].update(tokens)
+    df1['Road_scraped_matches_row_ids'] = [_lookup(index['road'], t) for t in road_tokens]
+
+    # STEP 7: chain
+    df1['Chain_scraped_matches_row_ids'] = [
+        _lookup(index['chain'], t) for t in _column_or_empty(df1, 'chain', None).apply(standardize_chain)
+    ]
+
+    # STEP 8: label vs name/chain words
+    df1['Label_scraped_matches_row_ids'] = [
+        _lookup(index['label'], t) for t in _column_or_empty(df1, 'label', None).apply(extract_label_words)
+    ]
+
+    return df1
+
+
+################################################################################
+# Cleaned_Code/Add_4.ipynb
+################################################################################
+
+def determine_match_success(row):
+    """
+    Match tier for one row of Add_3 output (with *_parsed list columns):
+    ZIP/State -> City/Exit -> Road -> Label -> Chain, each step narrowing the set
+    """
+    # Start with ZIP/State
+    match_set = set()
+    match_set.update(row['ZIP_scraped_matches_row_ids_parsed'])
+    match_set.update(row['State_scraped_matches_row_ids_parsed'])
+
+    if not match_set:
+        return "0/6 successful match"
+
+    # Check City/Exit
+    city_exit_set = set()
+    city_exit_set.update(row['City_scraped_matches_row_ids_parsed'])
+    city_exit_set.update(row['Exit_scraped_matches_row_ids_parsed'])
+
+    match_set = match_set.intersection(city_exit_set) if city_exit_set else match_set
+
+    if not match_set:
+        return "2/6 successful match"  # Only ZIP/State matched
+
+    # Check Road
+    road_set = set(row['Road_scraped_matches_row_ids_parsed'])
+    match_set = match_set.intersection(road_set) if road_set else match_set
+
+    if not match_set:
+        return "4/6 successful match"  # ZIP/State and City/Exit matched
+
+    # Check Label
+    label_set = set(row['Label_scraped_matches_row_ids_parsed'])
+    match_set = match_set.intersection(label_set) if label_set else match_set
+
+    if not match_set:
+        return "5/6 successful match"  # ZIP/State, City/Exit, and Road matched
+
+    # Finally check Chain
+    chain_set = set(row['Chain_scraped_matches_row_ids_parsed'])
+    match_set = match_set.intersection(chain_set) if chain_set else match_set
+
+    if not match_set:
+        return "6/6 successful match"  # ZIP/State, City/Exit, Road, and Label matched
+
+    return "7/6 successful match"  # All components matched
@@ -0,0 +1,248 @@
+"""
+Character n-gram TF-IDF retrieval over the scraped reference table.
+
+`comprehensive_matching_logic` stops at the ZIP gate, so an OCR row with a single
+mistyped ZIP digit ends up as "no matching ZIPCODE" even when its name and street
+are clearly in the scraped table.  NameAddressIndex vectorizes every scraped
+row's name/chain/address as char 3- and 4-grams (sublinear TF, smoothed IDF, L2
+normalized) and answers top-k cosine queries with blocked sparse products, one
+batch per state, so the fallback is never a full pairwise comparison.
+
+    index = NameAddressIndex(df2)
+    candidates = rescue_unmatched(df, index, k=5)
+    df = apply_retrieval_matches(df, candidates, df2, min_score=0.45)
+"""
+
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .matching import normalize_zip_code
+
+NGRAM_SIZES = (3, 4)
+
+REFERENCE_TEXT_COLUMNS = ['name', 'Chain', 'Street Address', 'City', 'Highway']
+OCR_TEXT_COLUMNS = ['OCR_label', 'OCR_chain', 'OCR_address_standardized_OFF_parenthesis', 'OCR_city', 'OCR_Main_Road']
+
+# Flag_Reason values left by the ZIP/State gate
+ZIP_GATE_REASONS = ["no matching ZIPCODE", "matching ZIPCODE, no matching State"]
+
+RETRIEVAL_FLAG_REASON = "Name/Address Retrieval Match Found"
+
+
+def normalize_text(text):
+    """Lowercase alphanumeric words separated by single spaces"""
+    if text is None or (not isinstance(text, str) and pd.isna(text)):
+        return ''
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', str(text).lower()).split())
+
+
+def char_ngrams(text, sizes=NGRAM_SIZES):
+    """Char n-grams of the normalized text, padded so word edges form their own grams"""
+    padded = f" {normalize_text(text)} "
+    grams = []
+    for n in sizes:
+        grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+def row_text(df, columns):
+    """Join the available text columns of each row into one string"""
+    columns = [c for c in columns if c in df.columns]
+    if not columns:
+        return pd.Series('', index=df.index)
+    return df[columns].astype(object).where(df[columns].notna(), '').astype(str).agg(' '.join, axis=1)
+
+
+class NameAddressIndex:
+    """Sparse char n-gram TF-IDF matrix of the scraped table, blocked by state"""
+
+    def __init__(self, reference, text_columns=REFERENCE_TEXT_COLUMNS, state_column='State', sizes=NGRAM_SIZES, verbose=True):
+        """
+        Args:
+            reference: Scraped reference table (df2)
+            text_columns: Columns concatenated into each row's document
+            state_column: Column used to restrict queries to one state
+            sizes: Character n-gram lengths
+            verbose: Print the index summary
+        """
+        self.reference = reference
+        self.sizes = tuple(sizes)
+        self.vocabulary = {}
+        documents = [Counter(char_ngrams(t, self.sizes)) for t in row_text(reference, text_columns)]
+        for counts in documents:
+            for gram in counts:
+                if gram not in self.vocabulary:
+                    self.vocabulary[gram] = len(self.vocabulary)
+
+        counts_matrix = self._counts_matrix(documents)
+        doc_freq = np.bincount(counts_matrix.indices, minlength=len(self.vocabulary))
+        self.idf = np.log((1 + len(documents)) / (1 + doc_freq)) + 1.0
+        self.matrix = self._weight(counts_matrix)
+
+        states = reference[state_column].astype(object).where(reference[state_column].notna(), '').astype(str).to_numpy()
+        self.states = states
+        self.state_rows = {state: np.flatnonzero(states == state) for state in pd.unique(states)}
+        if verbose:
+            print(f"✅ Indexed {len(documents)} scraped rows, {len(self.vocabulary)} n-grams, {len(self.state_rows)} states")
+
+    def _counts_matrix(self, documents):
+        indptr, indices, data = [0], [], []
+        for counts in documents:
+            for gram, count in counts.items():
+                col = self.vocabulary.get(gram)
+                if col is not None:
+                    indices.append(col)
+                    data.append(count)
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+            shape=(len(documents), len(self.vocabulary)),
+        )
+
+    def _weight(self, counts_matrix):
+        """Sublinear TF times IDF, rows scaled to unit length"""
+        weighted = counts_matrix.copy()
+        weighted.data = (1.0 + np.log(weighted.data)) * self.idf[weighted.indices].astype(np.float32)
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.diags((1.0 / norms).astype(np.float32)) @ weighted
+
+    def transform(self, texts):
+        """TF-IDF rows for query strings (n-grams unseen in the reference are ignored)"""
+        return self._weight(self._counts_matrix([Counter(char_ngrams(t, self.sizes)) for t in texts])).tocsr()
+
+    def query(self, texts, states=None, k=5, block_size=1024, min_score=0.0):
+        """
+        Top-k reference rows for each query text
+
+        Args:
+            texts: Query strings
+            states: Optional state per query; candidates are limited to that state
+            k: Candidates per query
+            block_size: Query rows multiplied at a time (bounds memory)
+            min_score: Drop candidates with a lower cosine score
+
+        Returns:
+            DataFrame with query (position in texts), ref_row (position in the
+            reference), ref_index (its index label), score and rank (0 = best)
+        """
+        texts = list(texts)
+        queries = self.transform(texts)
+        if states is None:
+            groups = {None: np.arange(len(texts))}
+        else:
+            states = pd.Series(list(states)).astype(object)
+            states = states.where(states.notna(), '').astype(str).to_numpy()
+            groups = {state: np.flatnonzero(states == state) for state in pd.unique(states)}
+
+        out_query, out_ref, out_score, out_rank = [], [], [], []
+        for state, query_rows in groups.items():
+            ref_rows = np.arange(self.matrix.shape[0]) if state is None else self.state_rows.get(state)
+            if ref_rows is None or len(ref_rows) == 0 or len(query_rows) == 0:
+                continue
+            ref_block = self.matrix[ref_rows].T.tocsc()
+            for start in range(0, len(query_rows), block_size):
+                block_rows = query_rows[start:start + block_size]
+                scores = (queries[block_rows] @ ref_block).tocsr()
+                for i, q in enumerate(block_rows):
+                    row_start, row_end = scores.indptr[i], scores.indptr[i + 1]
+                    if row_start == row_end:
+                        continue
+                    row_scores = scores.data[row_start:row_end]
+                    row_cols = scores.indices[row_start:row_end]
+                    if len(row_scores) > k:
+                        top = np.argpartition(-row_scores, k - 1)[:k]
+                        row_scores, row_cols = row_scores[top], row_cols[top]
+                    order = np.argsort(-row_scores, kind='stable')
+                    keep = row_scores[order] >= min_score
+                    order = order[keep]
+                    out_query.extend([q] * len(order))
+                    out_ref.extend(ref_rows[row_cols[order]])
+                    out_score.extend(row_scores[order])
+                    out_rank.extend(range(len(order)))
+
+        ref_positions = np.array(out_ref, dtype=np.int64)
+        return pd.DataFrame({
+            'query': np.array(out_query, dtype=np.int64),
+            'ref_row': ref_positions,
+            'ref_index': self.reference.index.to_numpy()[ref_positions],
+            'score': np.round(np.array(out_score, dtype=np.float64), 4),
+            'rank': np.array(out_rank, dtype=np.int16),
+        })
+
+
+def zip_digit_distance(zip_a, zip_b):
+    """Number of differing digits between two normalized 5-digit ZIPs (5 if either is missing)"""
+    a, b = normalize_zip_code(zip_a), normalize_zip_code(zip_b)
+    if not a or not b:
+        return 5
+    return sum(x != y for x, y in zip(a, b))
+
+
+def rescue_unmatched(df, index, k=5, reasons=ZIP_GATE_REASONS, text_columns=OCR_TEXT_COLUMNS,
+                     state_column='OCR_state', min_score=0.2, block_size=1024):
+    """
+    Retrieve name/address candidates for rows that failed the ZIP/State gate
+
+    Args:
+        df: Combined frame after comprehensive_matching_logic
+        index: NameAddressIndex over the scraped table
+        k: Candidates per row
+        reasons: Flag_Reason values to retry
+        text_columns: OCR columns that make up each query
+        state_column: OCR state column used to block the search
+        min_score: Minimum cosine score to keep
+        block_size: Query rows per sparse product
+
+    Returns:
+        DataFrame with df_index, ref_index, score, rank, OCR/scraped ZIP and zip_digits_differ
+    """
+    rows = df[df['Flag_Reason'].isin(reasons)]
+    print(f"🔎 Retrieving top-{k} candidates for {len(rows)} rows that failed the ZIP/State gate")
+    if rows.empty:
+        return pd.DataFrame(columns=['df_index', 'ref_index', 'score', 'rank', 'OCR_zip_code', 'Scraped_zip', 'zip_digits_differ'])
+
+    hits = index.query(row_text(rows, text_columns), states=rows[state_column], k=k,
+                       block_size=block_size, min_score=min_score)
+    hits.insert(0, 'df_index', rows.index.to_numpy()[hits['query'].to_numpy()])
+    hits = hits.drop(columns=['query'])
+    hits['OCR_zip_code'] = rows.loc[hits['df_index'], 'OCR_zip_code'].to_numpy()
+    hits['Scraped_zip'] = index.reference['Postal Code'].to_numpy()[hits['ref_row'].to_numpy()]
+    hits['zip_digits_differ'] = [zip_digit_distance(a, b) for a, b in zip(hits['OCR_zip_code'], hits['Scraped_zip'])]
+    print(f"✅ {hits['df_index'].nunique()} rows have at least one candidate "
+          f"({(hits.loc[hits['rank'] == 0, 'zip_digits_differ'] <= 1).sum()} with a one-digit ZIP difference)")
+    return hits.drop(columns=['ref_row'])
+
+
+def apply_retrieval_matches(df, candidates, df2, min_score=0.45, max_zip_digits=1):
+    """
+    Fill the best retrieval candidate into rows flagged by the ZIP/State gate
+
+    Only rank-0 candidates with score >= min_score and at most max_zip_digits
+    differing ZIP digits are applied; they are marked for manual verification.
+
+    Returns:
+        DataFrame: copy of df with Scraped_ columns, Flagged, Flag_Reason and
+        Manually Verified? updated
+    """
+    result_df = df.copy()
+    if 'Manually Verified?' not in result_df.columns:
+        result_df['Manually Verified?'] = "No"
+    best = candidates[(candidates['rank'] == 0) & (candidates['score'] >= min_score)
+                      & (candidates['zip_digits_differ'] <= max_zip_digits)]
+    scraped_map = [(col, f"Scraped_{col}") for col in df2.columns if f"Scraped_{col}" in result_df.columns]
+
+    for df_index, ref_index in zip(best['df_index'], best['ref_index']):
+        match_row = df2.loc[ref_index]
+        result_df.loc[df_index, 'Flagged'] = False
+        result_df.loc[df_index, 'Flag_Reason'] = RETRIEVAL_FLAG_REASON
+        result_df.loc[df_index, 'Manually Verified?'] = "Please Verify This"
+        for df2_col, scraped_col in scraped_map:
+            result_df.loc[df_index, scraped_col] = match_row[df2_col]
+
+    print(f"🎉 Applied {len(best)} retrieval matches (score >= {min_score}, ZIP digits differing <= {max_zip_digits})")
+    return result_df
@@ -0,0 +1,268 @@
+"""
+Spatial result cache for Google Places nearby searches.
+
+`GooglePlacesNearbySearch.search_similar_places` (Test_Code/API_Attempt/3_2_2.ipynb)
+runs three nearby searches per row, centred on the geocode of (city, state, zip).
+Rows from the same town or exit share those circles almost exactly, so most of the
+calls return results we already have.
+
+NearbySearchCache keeps a coverage map: per (geohash cell, place type, keyword)
+the circles that were actually fetched and their results.  A new query is answered
+locally when a cached circle contains it (distance between centres + query radius
+<= cached radius) and that cached search was complete (fewer than 20 results, so
+Google did not truncate it); the cached results are filtered to the query circle.
+Misses are fetched from the centre of their geohash cell with the radius widened
+by the cell's half-diagonal, so every later query from anywhere in that cell with
+the same radius is covered.  When a widened search comes back truncated, the exact
+query is fetched as well so results never silently drop places.  Only searches
+Google answered with OK or ZERO_RESULTS are stored: a failed call (quota, network,
+REQUEST_DENIED) raises instead of looking like an empty area, so it is never
+cached and is retried on the next query.
+
+    cached_client = CachedPlacesClient(places_client, NearbySearchCache.load('nearby_cache.json'))
+    nearby_places = cached_client.search_similar_places(row_dict)   # same as places_client
+    cached_client.cache.save('nearby_cache.json')
+    cached_client.cache.print_stats()
+"""
+
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from .geohash import decode_bbox, encode, haversine_m, neighbors
+
+# Google returns at most 20 results per nearby-search page
+PAGE_SIZE = 20
+MAX_RADIUS_M = 50_000
+
+# Places API statuses that are real answers; anything else is a failed call
+ANSWER_STATUSES = ('OK', 'ZERO_RESULTS')
+
+
+def _place_location(place):
+    location = place.get('geometry', {}).get('location', {})
+    return location.get('lat'), location.get('lng')
+
+
+def _normalize_keyword(keyword):
+    return ' '.join(re.sub(r'[^a-z0-9 ]', ' ', str(keyword).lower()).split()) if keyword else ''
+
+
+class NearbySearchCache:
+    """Coverage map of fetched search circles keyed by geohash cell, type and keyword"""
+
+    def __init__(self, precision=5):
+        """
+        Args:
+            precision: Geohash length of the cells (5 = about 4.9 x 4.9 km)
+        """
+        self.precision = precision
+        self.circles = {}
+        self.stats = {'queries': 0, 'hits': 0, 'fetches': 0, 'exact_refetches': 0, 'seconds_fetching': 0.0}
+
+    @staticmethod
+    def _key(cell, place_type, keyword):
+        return f"{cell}|{place_type or ''}|{_normalize_keyword(keyword)}"
+
+    def lookup(self, lat, lng, radius, place_type=None, keyword=None):
+        """
+        Cached results for the query circle, or None if no complete cached circle contains it
+        """
+        cell = encode([lat], [lng], self.precision)[0]
+        for candidate_cell in [cell] + neighbors(cell):
+            for circle in self.circles.get(self._key(candidate_cell, place_type, keyword), []):
+                if not circle['complete']:
+                    continue
+                distance = float(haversine_m(lat, lng, circle['lat'], circle['lng']))
+                if distance + radius <= circle['radius']:
+                    return self._filter(circle['results'], lat, lng, radius)
+        return None
+
+    @staticmethod
+    def _filter(results, lat, lng, radius):
+        if not results:
+            return []
+        coords = np.array([_place_location(p) for p in results], dtype=float)
+        distance = haversine_m(lat, lng, coords[:, 0], coords[:, 1])
+        return [place for place, d in zip(results, distance) if d <= radius]
+
+    def store(self, lat, lng, radius, place_type, keyword, results):
+        """Record a fetched circle in the cell that contains its centre"""
+        cell = encode([lat], [lng], self.precision)[0]
+        circle = {'lat': lat, 'lng': lng, 'radius': radius, 'complete': len(results) < PAGE_SIZE, 'results': results}
+        self.circles.setdefault(self._key(cell, place_type, keyword), []).append(circle)
+        return circle
+
+    def snapped_query(self, lat, lng, radius):
+        """Centre of the query's geohash cell and a radius that covers the query from anywhere in the cell"""
+        cell = encode([lat], [lng], self.precision)[0]
+        lat_min, lat_max, lon_min, lon_max = decode_bbox(cell)
+        center_lat, center_lng = (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+        half_diagonal = float(haversine_m(center_lat, center_lng, lat_max, lon_max))
+        return center_lat, center_lng, min(MAX_RADIUS_M, int(np.ceil(radius + half_diagonal)))
+
+    def search(self, fetch, lat, lng, radius, place_type=None, keyword=None, snap=True):
+        """
+        Answer a nearby search from the cache, fetching only when the area is not covered
+
+        Args:
+            fetch: Callable(lat, lng, keyword, place_type, radius) -> list of place dicts;
+                must raise when the call fails, since whatever it returns is cached
+            lat, lng: Query centre
+            radius: Query radius in meters
+            place_type: Google place type
+            keyword: Optional keyword
+            snap: Fetch from the cell centre with a widened radius on a miss
+
+        Returns:
+            list of place dicts within radius of (lat, lng)
+
+        Raises:
+            Whatever fetch raises; nothing is cached for a failed fetch
+        """
+        self.stats['queries'] += 1
+        cached = self.lookup(lat, lng, radius, place_type, keyword)
+        if cached is not None:
+            self.stats['hits'] += 1
+            return cached
+
+        if snap:
+            snap_lat, snap_lng, snap_radius = self.snapped_query(lat, lng, radius)
+            if snap_radius > radius:
+                results = self._fetch(fetch, snap_lat, snap_lng, snap_radius, place_type, keyword)
+                circle = self.store(snap_lat, snap_lng, snap_radius, place_type, keyword, results)
+                if circle['complete']:
+                    return self._filter(results, lat, lng, radius)
+                self.stats['exact_refetches'] += 1
+
+        results = self._fetch(fetch, lat, lng, radius, place_type, keyword)
+        self.store(lat, lng, radius, place_type, keyword, results)
+        return results
+
+    def _fetch(self, fetch, lat, lng, radius, place_type, keyword):
+        start = time.perf_counter()
+        results = fetch(lat, lng, keyword=keyword, place_type=place_type, radius=radius)
+        self.stats['seconds_fetching'] += time.perf_counter() - start
+        self.stats['fetches'] += 1
+        return results
+
+    def coverage(self):
+        """One row per cached circle: cell, place type, keyword, radius, result count, complete"""
+        import pandas as pd
+        rows = []
+        for key, circles in self.circles.items():
+            cell, place_type, keyword = key.split('|', 2)
+            for circle in circles:
+                rows.append({'cell': cell, 'place_type': place_type, 'keyword': keyword, 'lat': circle['lat'],
+                             'lng': circle['lng'], 'radius': circle['radius'], 'results': len(circle['results']),
+                             'complete': circle['complete']})
+        return pd.DataFrame(rows)
+
+    def print_stats(self):
+        s = self.stats
+        hit_rate = s['hits'] / s['queries'] if s['queries'] else 0
+        print(f"📊 Nearby searches: {s['queries']} queries, {s['hits']} answered from cache ({hit_rate:.0%}), "
+              f"{s['fetches']} API calls ({s['exact_refetches']} exact re-fetches), {s['seconds_fetching']:.1f}s fetching")
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'precision': self.precision, 'circles': self.circles}, f)
+        print(f"💾 Nearby cache saved to: {path} ({sum(len(c) for c in self.circles.values())} circles)")
+
+    @classmethod
+    def load(cls, path, precision=5):
+        """Load a saved cache, or start an empty one if path does not exist"""
+        if not os.path.exists(path):
+            return cls(precision)
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        cache = cls(data['precision'])
+        cache.circles = data['circles']
+        return cache
+
+
+class CachedPlacesClient:
+    """GooglePlacesNearbySearch with geocodes and nearby searches served from a cache"""
+
+    def __init__(self, client, cache=None, snap=True):
+        """
+        Args:
+            client: GooglePlacesNearbySearch instance (3_2_2.ipynb)
+            cache: NearbySearchCache (a new one by default)
+            snap: Widen misses to cover their whole geohash cell
+        """
+        self.client = client
+        self.cache = cache or NearbySearchCache()
+        self.snap = snap
+        self.geocodes = {}
+
+    def get_coordinates_from_address(self, city, state, zip_code):
+        key = (str(city), str(state), str(zip_code))
+        if key not in self.geocodes:
+            self.geocodes[key] = self.client.get_coordinates_from_address(city, state, zip_code)
+        return self.geocodes[key]
+
+    def fetch_nearby(self, latitude, longitude, keyword=None, place_type="gas_station", radius=5000):
+        """
+        One Places nearby search that raises on failure
+
+        GooglePlacesNearbySearch.nearby_search returns [] for errors as well as for
+        empty areas, so the request is made on its googlemaps client directly.
+
+        Raises:
+            RuntimeError: The response status is not OK or ZERO_RESULTS
+            googlemaps exceptions: The call itself failed
+        """
+        params = {'location': (latitude, longitude), 'radius': radius, 'type': place_type}
+        if keyword:
+            params['keyword'] = keyword
+        places_result = self.client.gmaps.places_nearby(**params)
+        status = places_result.get('status', 'OK')
+        if status not in ANSWER_STATUSES:
+            raise RuntimeError(f"Places nearby search failed with status {status}: "
+                               f"{places_result.get('error_message', '')}")
+        return places_result.get('results', [])
+
+    def nearby_search(self, latitude, longitude, keyword=None, place_type="gas_station", radius=5000):
+        """Cached nearby search; a failed call prints the error and returns [] without being cached"""
+        try:
+            return self.cache.search(self.fetch_nearby, latitude, longitude, radius,
+                                     place_type=place_type, keyword=keyword, snap=self.snap)
+        except Exception as e:
+            print(f"Error in nearby search: {e}")
+            return []
+
+    def search_similar_places(self, row_data):
+        """Same three strategies and de-duplication as GooglePlacesNearbySearch.search_similar_places"""
+        coords = self.get_coordinates_from_address(row_data['city'], row_data['state'], str(row_data['zip_code']))
+        if not coords:
+            return []
+
+        lat, lng = coords
+        search_results = []
+
+        # Strategy 1: Search by chain name (10km radius)
+        if row_data.get('chain') and row_data['chain'] != 'Unknown':
+            search_results.extend(self.nearby_search(lat, lng, keyword=row_data['chain'], place_type="gas_station", radius=10000))
+
+        # Strategy 2: General gas stations (5km radius)
+        search_results.extend(self.nearby_search(lat, lng, place_type="gas_station", radius=5000))
+
+        # Strategy 3: Business name search (15km radius)
+        if row_data.get('label'):
+            business_name = row_data['label'].split('(')[0].strip()
+            if len(business_name) > 3:
+                search_results.extend(self.nearby_search(lat, lng, keyword=business_name, place_type="establishment", radius=15000))
+
+        # Remove duplicates based on place_id
+        unique_results = []
+        seen_place_ids = set()
+        for result in search_results:
+            place_id = result.get('place_id')
+            if place_id and place_id not in seen_place_ids:
+                seen_place_ids.add(place_id)
+                unique_results.append(result)
+        return unique_results
@@ -0,0 +1,488 @@
+"""
+Append-only archive of raw fetched pages, so fixing a selector never means re-crawling.
+
+Pages are stored zstd-compressed in large segment files (segment-00000.pages, ...)
+with a CSV index keyed by URL and fetch time.  Bodies are content-addressed: a
+page whose bytes are identical to one already stored only gets a small "revisit"
+record pointing at the existing copy (same idea as WARC revisit records).  The
+segments are self-describing, so the index can be rebuilt from them.
+
+Fetching through the archive (serves the stored copy when there is a successful
+one younger than max_age; error responses are never archived or served):
+
+    archive = PageArchive(r'C:\\Users\\clint\\Desktop\\Geocoding_Task\\page_archive', max_age=7 * 86400)
+    response = archive.fetch(url, headers=headers)      # drop-in for requests.get
+    soup = BeautifulSoup(response.content, 'html.parser')
+
+Re-running an existing extractor without network access:
+
+    with archive.offline():
+        data = extract_locdetinfo_data(url)             # requests.get is served from the archive
+
+Re-extracting the whole corpus in parallel (extractor(html, url) -> dict or list of dicts;
+it must live in an importable .py file when workers > 1):
+
+    df = replay(archive.directory, parse_locdetinfo, url_prefix='https://www.truckstopsandservices.com/')
+
+Writers are single-process; any number of processes can read at once.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import struct
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+
+RECORD_MAGIC = b'PGA1'
+# magic, header length (uint32), body length (uint64)
+RECORD_PREFIX = struct.Struct('<4sIQ')
+INDEX_COLUMNS = ['url', 'fetched_at', 'status', 'digest', 'segment', 'offset', 'length', 'codec', 'content_type', 'final_url']
+DEFAULT_SEGMENT_BYTES = 1 << 30
+ZSTD_LEVEL = 10
+
+_zstd_warned = False
+
+
+def _compress(body, codec):
+    if codec == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    if codec == 'zlib':
+        return zlib.compress(body, 6)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def _decompress(data, codec):
+    if codec == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def _default_codec():
+    global _zstd_warned
+    try:
+        import zstandard  # noqa: F401
+        return 'zstd'
+    except ImportError:
+        if not _zstd_warned:
+            print("⚠️  zstandard is not installed (pip install zstandard); archiving with zlib instead")
+            _zstd_warned = True
+        return 'zlib'
+
+
+class ArchivedResponse:
+    """The parts of requests.Response that the scrapers use, backed by an archived page"""
+
+    from_archive = True
+
+    def __init__(self, url, content, status_code=200, headers=None, fetched_at=None, final_url=None):
+        self.url = final_url or url
+        self.requested_url = url
+        self.content = content
+        self.status_code = int(status_code)
+        self.headers = dict(headers or {})
+        self.fetched_at = fetched_at
+        self.encoding = _charset(self.headers.get('Content-Type', '')) or 'utf-8'
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} Error (archived {self.fetched_at}) for url: {self.url}", response=self)
+
+
+def _successful(status):
+    return 200 <= int(status) < 300
+
+
+def _charset(content_type):
+    for part in content_type.split(';'):
+        part = part.strip()
+        if part.lower().startswith('charset='):
+            return part.split('=', 1)[1].strip('"\' ')
+    return None
+
+
+class PageArchive:
+    """Content-addressed, append-only store of raw page bodies"""
+
+    def __init__(self, directory, segment_bytes=DEFAULT_SEGMENT_BYTES, codec=None, max_age=None):
+        """
+        Args:
+            directory: Folder holding the segments and index.csv (created on first write)
+            segment_bytes: Start a new segment file once the current one passes this size
+            codec: 'zstd' (default when zstandard is installed) or 'zlib'
+            max_age: Default for fetch(): seconds after which an archived page is
+                fetched again (None keeps archived pages forever)
+        """
+        self.directory = directory
+        self.max_age = max_age
+        self.segment_bytes = segment_bytes
+        self.codec = codec
+        self.index_path = os.path.join(directory, 'index.csv')
+        self._lock = threading.Lock()
+        self._by_url = None
+        self._by_digest = None
+        # One read handle per segment, shared by every thread: seek + read must not interleave
+        self._readers = {}
+        self._read_lock = threading.Lock()
+
+    # ---- index -----------------------------------------------------------------
+
+    def _load_index(self):
+        if self._by_url is not None:
+            return
+        self._by_url, self._by_digest = {}, {}
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, newline='', encoding='utf-8') as f:
+            for entry in csv.DictReader(f):
+                self._add_to_index(entry)
+
+    def _add_to_index(self, entry):
+        entry['status'] = int(entry['status'])
+        entry['offset'] = int(entry['offset'])
+        entry['length'] = int(entry['length'])
+        self._by_url.setdefault(entry['url'], []).append(entry)
+        self._by_digest.setdefault(entry['digest'], entry)
+
+    def index(self):
+        """All index entries as a DataFrame (one row per fetch)"""
+        self._load_index()
+        rows = [e for entries in self._by_url.values() for e in entries]
+        return pd.DataFrame(rows, columns=INDEX_COLUMNS)
+
+    def urls(self):
+        self._load_index()
+        return list(self._by_url)
+
+    def __contains__(self, url):
+        self._load_index()
+        return url in self._by_url
+
+    def __len__(self):
+        self._load_index()
+        return len(self._by_url)
+
+    # ---- writing ---------------------------------------------------------------
+
+    def _current_segment(self):
+        segments = sorted(f for f in os.listdir(self.directory) if f.endswith('.pages'))
+        if segments:
+            path = os.path.join(self.directory, segments[-1])
+            if os.path.getsize(path) < self.segment_bytes:
+                return segments[-1]
+        return f"segment-{len(segments):05d}.pages"
+
+    def put(self, url, body, status=200, headers=None, fetched_at=None, final_url=None):
+        """
+        Store one fetched page
+
+        Args:
+            url: URL that was requested (the lookup key)
+            body: Raw response bytes (str is UTF-8 encoded)
+            status: HTTP status code
+            headers: Response headers (only Content-Type is indexed, all are kept in the record)
+            fetched_at: ISO timestamp; defaults to now (UTC)
+            final_url: URL after redirects, if different
+
+        Returns:
+            dict: the index entry
+        """
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        headers = dict(headers or {})
+        fetched_at = fetched_at or datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+        digest = hashlib.sha256(body).hexdigest()
+
+        with self._lock:
+            self._load_index()
+            os.makedirs(self.directory, exist_ok=True)
+            existing = self._by_digest.get(digest)
+            codec = existing['codec'] if existing else (self.codec or _default_codec())
+            payload = b'' if existing else _compress(body, codec)
+
+            record_header = json.dumps({
+                'type': 'revisit' if existing else 'response',
+                'url': url, 'fetched_at': fetched_at, 'status': status, 'digest': digest,
+                'codec': codec, 'headers': headers, 'final_url': final_url or '',
+            }).encode('utf-8')
+
+            segment = self._current_segment()
+            segment_path = os.path.join(self.directory, segment)
+            with open(segment_path, 'ab') as f:
+                offset = f.tell()
+                f.write(RECORD_PREFIX.pack(RECORD_MAGIC, len(record_header), len(payload)))
+                f.write(record_header)
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            with self._read_lock:
+                stale = self._readers.pop(segment, None)
+                if stale is not None:
+                    stale.close()
+
+            entry = {
+                'url': url, 'fetched_at': fetched_at, 'status': status, 'digest': digest,
+                'segment': existing['segment'] if existing else segment,
+                'offset': existing['offset'] if existing else offset + RECORD_PREFIX.size + len(record_header),
+                'length': existing['length'] if existing else len(payload),
+                'codec': codec, 'content_type': headers.get('Content-Type', headers.get('content-type', '')),
+                'final_url': final_url or '',
+            }
+            write_header = not os.path.exists(self.index_path)
+            with open(self.index_path, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=INDEX_COLUMNS)
+                if write_header:
+                    writer.writeheader()
+                writer.writerow(entry)
+            self._add_to_index(dict(entry))
+            return entry
+
+    def put_response(self, url, response):
+        """
+        Store a requests.Response if it was successful (2xx)
+
+        Throttling, error and CAPTCHA pages (429, 403, 5xx, ...) are not kept,
+        so a transient failure is never replayed as the page.
+
+        Returns:
+            dict: the index entry, or None when the response was not stored
+        """
+        if not _successful(response.status_code):
+            return None
+        final_url = response.url if getattr(response, 'url', url) != url else None
+        return self.put(url, response.content, status=response.status_code,
+                        headers=dict(response.headers), final_url=final_url)
+
+    def has(self, url, max_age=None):
+        """Whether url has a successful archived fetch younger than max_age seconds (any age if None)"""
+        entries = [e for e in self.entries(url) if _successful(e['status'])]
+        if not entries:
+            return False
+        if max_age is None:
+            return True
+        # Index rows may be written by put() ('...Z') or by hand / other tools (offset or naive)
+        fetched = datetime.fromisoformat(entries[-1]['fetched_at'].replace('Z', '+00:00'))
+        if fetched.tzinfo is None:
+            fetched = fetched.replace(tzinfo=timezone.utc)
+        return (datetime.now(timezone.utc) - fetched).total_seconds() <= max_age
+
+    def fetch(self, url, refresh=False, session=None, max_age=None, **kwargs):
+        """
+        requests.get with the archive in front of it
+
+        Args:
+            url: Page URL
+            refresh: Fetch from the network even if the page is archived
+            session: requests.Session to use (default: requests.get)
+            max_age: Re-fetch archived pages older than this many seconds
+                (default: the archive's max_age)
+            **kwargs: Passed to requests (headers, timeout, ...)
+
+        Returns:
+            ArchivedResponse for a fresh successful archived copy, otherwise the live
+            requests.Response (archived before it is returned when it is 2xx)
+        """
+        if not refresh and self.has(url, self.max_age if max_age is None else max_age):
+            return self.get(url)
+        import requests
+        response = (session or requests).get(url, **kwargs)
+        self.put_response(url, response)
+        return response
+
+    # ---- reading ---------------------------------------------------------------
+
+    def _read_payload(self, entry):
+        segment = entry['segment']
+        with self._read_lock:
+            handle = self._readers.get(segment)
+            if handle is None:
+                handle = open(os.path.join(self.directory, segment), 'rb')
+                self._readers[segment] = handle
+            handle.seek(entry['offset'])
+            data = handle.read(entry['length'])
+        return _decompress(data, entry['codec'])
+
+    def entries(self, url):
+        """Every archived fetch of url, oldest first"""
+        self._load_index()
+        return sorted(self._by_url.get(url, []), key=lambda e: e['fetched_at'])
+
+    def get(self, url, as_of=None, include_errors=False):
+        """
+        Archived response for url
+
+        Args:
+            url: Page URL
+            as_of: ISO timestamp; return the latest fetch at or before it (default: latest)
+            include_errors: Also consider non-2xx fetches (archives written before
+                error responses were filtered out may hold some)
+
+        Returns:
+            ArchivedResponse, or None if the URL has no (successful) archived fetch
+        """
+        entries = self.entries(url)
+        if not include_errors:
+            entries = [e for e in entries if _successful(e['status'])]
+        if as_of is not None:
+            entries = [e for e in entries if e['fetched_at'] <= as_of]
+        if not entries:
+            return None
+        entry = entries[-1]
+        return ArchivedResponse(url, self._read_payload(entry), entry['status'],
+                                {'Content-Type': entry['content_type']} if entry['content_type'] else {},
+                                entry['fetched_at'], entry['final_url'] or None)
+
+    def iter_pages(self, urls=None, url_prefix=None, latest_only=True):
+        """Yield (url, ArchivedResponse) for archived pages, optionally filtered"""
+        self._load_index()
+        for url in (urls if urls is not None else list(self._by_url)):
+            if url_prefix and not url.startswith(url_prefix):
+                continue
+            entries = [e for e in self.entries(url) if _successful(e['status'])]
+            for entry in (entries[-1:] if latest_only else entries):
+                yield url, self.get(url, as_of=entry['fetched_at'])
+
+    def close(self):
+        with self._read_lock:
+            for handle in self._readers.values():
+                handle.close()
+            self._readers = {}
+
+    def rebuild_index(self):
+        """Recreate index.csv by scanning the segment files"""
+        entries, by_digest = [], {}
+        for segment in sorted(f for f in os.listdir(self.directory) if f.endswith('.pages')):
+            with open(os.path.join(self.directory, segment), 'rb') as f:
+                while True:
+                    prefix = f.read(RECORD_PREFIX.size)
+                    if len(prefix) < RECORD_PREFIX.size:
+                        break
+                    magic, header_len, body_len = RECORD_PREFIX.unpack(prefix)
+                    if magic != RECORD_MAGIC:
+                        print(f"⚠️  Corrupt record in {segment} at {f.tell() - RECORD_PREFIX.size}; skipping rest of segment")
+                        break
+                    header = json.loads(f.read(header_len))
+                    offset = f.tell()
+                    f.seek(body_len, os.SEEK_CUR)
+                    if header['type'] == 'response':
+                        by_digest.setdefault(header['digest'], (segment, offset, body_len))
+                    if header['digest'] not in by_digest:
+                        continue
+                    seg, off, length = by_digest[header['digest']]
+                    entries.append({
+                        'url': header['url'], 'fetched_at': header['fetched_at'], 'status': header['status'],
+                        'digest': header['digest'], 'segment': seg, 'offset': off, 'length': length,
+                        'codec': header['codec'], 'content_type': header['headers'].get('Content-Type', header['headers'].get('content-type', '')),
+                        'final_url': header.get('final_url', ''),
+                    })
+        with self._lock:
+            pd.DataFrame(entries, columns=INDEX_COLUMNS).to_csv(self.index_path, index=False)
+            self._by_url = None
+            self._load_index()
+        print(f"✅ Rebuilt index with {len(entries)} entries")
+        return len(entries)
+
+    # ---- replay ----------------------------------------------------------------
+
+    @contextmanager
+    def offline(self):
+        """
+        Serve requests.get / Session.get from the archive and block the network
+
+        URLs that are not archived raise requests.ConnectionError.
+        """
+        import requests
+
+        def archived_get(url, *args, **kwargs):
+            response = self.get(url)
+            if response is None:
+                raise requests.ConnectionError(f"Offline replay: {url} is not in the archive")
+            return response
+
+        def archived_session_get(session, url, *args, **kwargs):
+            return archived_get(url)
+
+        original_get, original_session_get = requests.get, requests.Session.get
+        requests.get, requests.Session.get = archived_get, archived_session_get
+        try:
+            yield self
+        finally:
+            requests.get, requests.Session.get = original_get, original_session_get
+
+
+def _replay_chunk(directory, extractor, urls, latest_only):
+    archive = PageArchive(directory)
+    rows = []
+    try:
+        for url, response in archive.iter_pages(urls, latest_only=latest_only):
+            try:
+                result = extractor(response.text, url)
+            except Exception as e:
+                rows.append({'url': url, 'fetched_at': response.fetched_at, 'replay_error': f"{type(e).__name__}: {e}"})
+                continue
+            for item in (result if isinstance(result, list) else [result] if result else []):
+                rows.append({'url': url, 'fetched_at': response.fetched_at, **item})
+    finally:
+        archive.close()
+    return rows
+
+
+def replay(directory, extractor, urls=None, url_prefix=None, workers=None, chunk_size=500, latest_only=True):
+    """
+    Run an extractor over archived pages with no network access
+
+    Args:
+        directory: PageArchive folder
+        extractor: Callable (html, url) -> dict, list of dicts or None
+        urls: Only these URLs (default: every archived URL)
+        url_prefix: Only URLs starting with this prefix
+        workers: Processes to use (default: CPU count; 1 runs inline)
+        chunk_size: URLs per worker task
+        latest_only: Only the newest fetch of each URL
+
+    Returns:
+        DataFrame with url, fetched_at, the extracted fields and replay_error
+    """
+    archive = PageArchive(directory)
+    urls = [u for u in (urls if urls is not None else archive.urls()) if not url_prefix or u.startswith(url_prefix)]
+    chunks = [urls[i:i + chunk_size] for i in range(0, len(urls), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    print(f"🔁 Replaying {len(urls)} archived URLs with {min(workers, max(len(chunks), 1))} worker(s)")
+
+    rows = []
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            rows.extend(_replay_chunk(directory, extractor, chunk, latest_only))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_replay_chunk, directory, extractor, chunk, latest_only) for chunk in chunks]
+            for future in futures:
+                rows.extend(future.result())
+
+    df = pd.DataFrame(rows)
+    if 'replay_error' in df.columns:
+        print(f"⚠️  {df['replay_error'].notna().sum()} pages raised during extraction")
+    print(f"✅ Replay produced {len(df)} rows")
+    return df
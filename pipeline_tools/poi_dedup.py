@@ -0,0 +1,238 @@
+"""
+Cross-source deduplication of truck stop POIs into golden records.
+
+The same stop is listed on truckstopsandservices and rvandtravelers
+(Web_Scraping/2.ipynb -> 2.csv), in yellowpages_robust_scraped_data.csv and in
+yelp_businesses_all.csv, each with its own columns and ids, and each source is
+matched against the directory separately.  dedupe_sources maps every source
+onto one canonical schema, blocks records by phone, geohash cell and ZIP,
+scores candidate pairs in batches (entity_clusters.score_pairs) and merges
+them best-first with union-find, never putting two records from the same
+source into one POI.  A page scraped twice (same source and URL) is one
+listing: its repeats join the first copy's POI instead of being scored.  Each
+golden record takes every field from the best source that has it and records
+which source that was.
+
+    sources = {
+        'truckstops': pd.read_csv(r'...\\Matching_WebScrape\\2.csv'),
+        'yellowpages': pd.read_csv(r'...\\YellowPages_scraper\\yellowpages_robust_scraped_data.csv'),
+        'yelp': pd.read_csv(r'...\\Yelp_Lookup\\yelp_businesses_all.csv'),
+    }
+    golden, members = dedupe_sources(sources)
+    df2 = to_reference_table(golden)     # drop-in reference table for the matchers
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from .entity_clusters import UnionFind, blocking_keys, candidate_pairs, score_pairs
+from .matching import clean_phone_number, clean_zip_code
+
+CANONICAL_COLUMNS = ['name', 'chain', 'street', 'city', 'state', 'zip', 'phone', 'latitude', 'longitude',
+                     'highway', 'exit', 'url']
+
+# Source column -> canonical column, per source kind
+SOURCE_SCHEMAS = {
+    'truckstops': {
+        'name': 'name', 'Chain': 'chain', 'Street Address': 'street', 'City': 'city', 'State': 'state',
+        'Postal Code': 'zip', 'Phone': 'phone', 'Latitude': 'latitude', 'Longitude': 'longitude',
+        'Highway': 'highway', 'Exit': 'exit', 'full_url': 'url',
+    },
+    'yellowpages': {
+        'BUSINESS_NAME': 'name', 'JSONLD_STREET_1': 'street', 'JSONLD_CITY_1': 'city', 'JSONLD_STATE_1': 'state',
+        'JSONLD_ZIP_1': 'zip', 'JSONLD_PHONE_1': 'phone', 'JSONLD_LAT_1': 'latitude', 'JSONLD_LNG_1': 'longitude',
+        'BUSINESS_URL': 'url',
+    },
+    'yelp': {
+        'Name': 'name', 'Address': 'street', 'City': 'city', 'State': 'state', 'Zip_Code': 'zip', 'Phone': 'phone',
+        'Latitude': 'latitude', 'Longitude': 'longitude', 'URL': 'url',
+    },
+}
+
+# truckstops rows are split by stop_type into the two listing sites
+STOP_TYPE_SOURCES = {'Trucker': 'truckstopsandservices', 'RVer': 'rvandtravelers'}
+
+# Which source wins each golden field (first source with a value)
+FIELD_PRIORITY = {
+    'default': ['truckstopsandservices', 'rvandtravelers', 'yellowpages', 'yelp'],
+    'latitude': ['yelp', 'yellowpages', 'truckstopsandservices', 'rvandtravelers'],
+    'longitude': ['yelp', 'yellowpages', 'truckstopsandservices', 'rvandtravelers'],
+    'street': ['yellowpages', 'truckstopsandservices', 'rvandtravelers', 'yelp'],
+}
+
+DEDUP_WEIGHTS = {
+    'label_similarity': 0.4,
+    'phone_match': 0.25,
+    'zip_match': 0.1,
+    'exit_match': 0.0,
+    'chain_match': 0.05,
+    'near': 0.2,
+}
+
+
+def to_canonical(df, kind, source=None):
+    """
+    One source table mapped onto CANONICAL_COLUMNS
+
+    Args:
+        df: Source table as read from its CSV
+        kind: Key of SOURCE_SCHEMAS
+        source: Source name (defaults to kind; truckstops rows use STOP_TYPE_SOURCES)
+
+    Returns:
+        DataFrame with source, source_row and CANONICAL_COLUMNS
+    """
+    schema = SOURCE_SCHEMAS[kind]
+    canonical = pd.DataFrame({target: df[col] if col in df.columns else None for col, target in schema.items()},
+                             index=df.index)
+    for col in CANONICAL_COLUMNS:
+        if col not in canonical.columns:
+            canonical[col] = None
+    canonical = canonical[CANONICAL_COLUMNS]
+
+    if kind == 'yelp':
+        # "500 Usa Pkwy, Sparks, NV 89434" -> "500 Usa Pkwy"
+        canonical['street'] = canonical['street'].astype('string').str.split(',').str[0]
+    if kind == 'truckstops' and 'stop_type' in df.columns:
+        sources = df['stop_type'].map(STOP_TYPE_SOURCES).fillna(source or kind)
+    else:
+        sources = pd.Series(source or kind, index=df.index)
+
+    canonical.insert(0, 'source', sources.to_numpy())
+    canonical.insert(1, 'source_row', np.arange(len(df)))
+    canonical['phone'] = canonical['phone'].map(clean_phone_number).str[-10:]
+    canonical['zip'] = canonical['zip'].map(clean_zip_code)
+    canonical['state'] = canonical['state'].astype('string').str.upper().str.strip()
+    for col in ['latitude', 'longitude']:
+        canonical[col] = pd.to_numeric(canonical[col], errors='coerce')
+    return canonical.reset_index(drop=True)
+
+
+def _member_keys(records):
+    """source:url, or source:source_row for records without a URL"""
+    return records['source'] + ':' + records['url'].astype(str).where(records['url'].notna(),
+                                                                     records['source_row'].astype(str))
+
+
+def _golden_ids(records, labels):
+    """
+    'POI' + hash of each cluster's smallest member key, stable across re-runs
+
+    Member keys are unique per cluster once same-source URL repeats share their
+    first copy's label (dedupe_sources), so no two clusters get the same id.
+    """
+    first_key = _member_keys(records).groupby(labels).transform('min')
+    return first_key.map(lambda k: 'POI' + hashlib.sha1(k.encode('utf-8')).hexdigest()[:12]).to_numpy()
+
+
+def golden_records(records):
+    """
+    One row per golden_id with every field taken from its highest-priority source
+
+    Returns:
+        DataFrame with golden_id, CANONICAL_COLUMNS, <field>_source provenance
+        columns, sources, member_count and phones (all distinct phones)
+    """
+    golden = pd.DataFrame({'golden_id': pd.unique(records['golden_id'])})
+    for field in CANONICAL_COLUMNS:
+        priority = FIELD_PRIORITY.get(field, FIELD_PRIORITY['default'])
+        rank = records['source'].map({s: i for i, s in enumerate(priority)}).fillna(len(priority))
+        values = records[field]
+        present = values.notna() & (values.astype(str).str.strip() != '')
+        best = (records.loc[present, ['golden_id', 'source']].assign(_rank=rank[present], _value=values[present])
+                .sort_values(['golden_id', '_rank'], kind='stable').drop_duplicates('golden_id'))
+        golden = golden.merge(best.rename(columns={'_value': field, 'source': f'{field}_source'})
+                              [['golden_id', field, f'{field}_source']], on='golden_id', how='left')
+
+    grouped = records.groupby('golden_id', sort=False)
+    golden = golden.merge(grouped.agg(
+        sources=('source', lambda s: '|'.join(sorted(set(s)))),
+        member_count=('source', 'size'),
+        phones=('phone', lambda p: '|'.join(sorted({x for x in p if x}))),
+    ).reset_index(), on='golden_id', how='left')
+    return golden
+
+
+def dedupe_sources(sources, threshold=0.5, geohash_precision=6, max_block_size=200):
+    """
+    Deduplicate POIs across sources into golden records
+
+    Args:
+        sources: dict of SOURCE_SCHEMAS kind -> source DataFrame
+        threshold: Minimum pair score to merge two records
+        geohash_precision: Geohash cell size for spatial blocking
+        max_block_size: Skip larger blocks (shared corporate phones, dense ZIPs)
+
+    Returns:
+        tuple: (golden DataFrame, member DataFrame with source, source_row,
+        golden_id and the canonical fields of every input record)
+    """
+    records = pd.concat([to_canonical(df, kind) for kind, df in sources.items()], ignore_index=True)
+    records['name_address'] = records['name'].fillna('').astype(str) + ' ' + records['street'].fillna('').astype(str)
+    print(f"📥 {len(records)} records from {records['source'].nunique()} sources: "
+          + ", ".join(f"{s} {n}" for s, n in records['source'].value_counts().items()))
+
+    # Blocks: phone and geohash cell (entity_clusters), plus ZIP
+    blocks = blocking_keys(records, phone_column='phone', zip_column=None, exit_column=None,
+                           lat_column='latitude', lon_column='longitude', geohash_precision=geohash_precision)
+    has_zip = records['zip'].str.len().eq(5).to_numpy()
+    zip_blocks = pd.DataFrame({'row': np.flatnonzero(has_zip), 'key': ('zip:' + records.loc[has_zip, 'zip']).to_numpy()})
+    blocks = pd.concat([blocks, zip_blocks], ignore_index=True)
+
+    # The same page scraped twice can never merge with itself (one record per source),
+    # so keep repeats out of scoring and give them their first copy's golden id below
+    keys = _member_keys(records)
+    repeat = (records['url'].notna() & keys.duplicated()).to_numpy()
+    first_copy = keys.map(pd.Series(np.arange(len(keys)), index=keys).groupby(level=0).first()).to_numpy()
+    if repeat.any():
+        print(f"♻️  {int(repeat.sum())} records repeat a page already scraped from the same source")
+        blocks = blocks[~repeat[blocks['row'].to_numpy()]]
+
+    source_codes = pd.factorize(records['source'])[0]
+    first, second = candidate_pairs(blocks, source_codes, max_block_size=max_block_size, cross_year_only=True)
+    print(f"🔗 {blocks['key'].nunique()} blocks, {len(first)} cross-source candidate pairs")
+
+    pairs = score_pairs(records, first, second, label_column='name_address', phone_column='phone', zip_column='zip',
+                        exit_column=None, chain_column='chain', lat_column='latitude', lon_column='longitude',
+                        weights=DEDUP_WEIGHTS)
+    pairs = pairs.sort_values('score', ascending=False, kind='stable')
+
+    # At most one record per source in each golden record
+    union_find = UnionFind(len(records), source_codes)
+    merged = 0
+    for i, j, score in zip(pairs['i'].to_numpy(), pairs['j'].to_numpy(), pairs['score'].to_numpy()):
+        if score < threshold:
+            break
+        merged += union_find.union(i, j)
+
+    labels = union_find.labels()
+    labels[repeat] = labels[first_copy[repeat]]
+    records['golden_id'] = _golden_ids(records, labels)
+    golden = golden_records(records)
+    print(f"✅ {merged} merges: {len(records)} records -> {len(golden)} golden POIs "
+          f"({(golden['member_count'] > 1).sum()} seen in more than one source)")
+    return golden, records.drop(columns=['name_address'])
+
+
+def to_reference_table(golden):
+    """
+    Golden POIs in the scraped reference layout (2.csv) the matchers read
+
+    Extra phones go to Phone 2..Phone 5 so phone matching sees every source's number.
+    """
+    reference = pd.DataFrame({
+        'name': golden['name'], 'Chain': golden['chain'], 'Street Address': golden['street'],
+        'City': golden['city'], 'State': golden['state'], 'Postal Code': golden['zip'],
+        'Latitude': golden['latitude'], 'Longitude': golden['longitude'],
+        'Highway': golden['highway'], 'Exit': golden['exit'], 'full_url': golden['url'],
+        'golden_id': golden['golden_id'], 'sources': golden['sources'],
+    })
+    phones = golden['phones'].fillna('').str.split('|')
+    primary = golden['phone'].fillna('')
+    others = [[p for p in row if p and p != first] for row, first in zip(phones, primary)]
+    reference.insert(6, 'Phone', primary.replace('', None))
+    for n in range(2, 6):
+        reference.insert(5 + n, f'Phone {n}', [row[n - 2] if len(row) > n - 2 else None for row in others])
+    return reference
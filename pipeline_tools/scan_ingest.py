@@ -0,0 +1,245 @@
+"""
+Streaming ingest of raw OCR scan pages into a Parquet dataset partitioned by year.
+
+cleanPage (API_Attempt/GeocodeScans.ipynb) parses one pages-not-clean text file
+into a DataFrame, and the notebook loops over one edition and concatenates the
+pages at the end.  ingest_scan_pages runs the same parsing over every page of
+every edition in a process pool, consumes the results as they complete and
+appends them to <out_dir>/year=YYYY/part-NNNNN.parquet in bounded batches, so
+memory stays flat however many editions there are.  A page that fails to parse
+is recorded in _pages.parquet with its error instead of stopping the run, and
+re-running skips pages that were already ingested.
+
+    ingest_scan_pages("../../scans/_processed/pages-not-clean/*.txt", "../../scans/_processed/pages_parquet")
+    pa2016 = pd.read_parquet("../../scans/_processed/pages_parquet", filters=[('year', '=', 2016)])
+"""
+
+import glob
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+PAGE_COLUMNS = ['city', 'zip', 'name', 'phone', 'addr']
+ROW_COLUMNS = ['source_file', 'page', 'line'] + PAGE_COLUMNS
+# Every part file gets this schema, so a part whose phone/addr are all missing
+# is not written with a null column that conflicts with the other parts
+ROW_SCHEMA = pa.schema([('source_file', pa.string()), ('page', pa.int32()), ('line', pa.int32())]
+                       + [(name, pa.string()) for name in PAGE_COLUMNS])
+PAGE_LOG_COLUMNS = ['source_file', 'year', 'page', 'rows', 'parse_error']
+
+# "2016-12.txt", "2006-185.txt"
+PAGE_NAME_PATTERN = re.compile(r'^(\d{4})\D*?(\d+)?\D*$')
+
+
+def page_year_and_number(path):
+    """(year, page number) from a pages-not-clean file name; page is None when absent"""
+    match = PAGE_NAME_PATTERN.match(os.path.splitext(os.path.basename(path))[0])
+    if not match:
+        raise ValueError(f"No year in scan page name: {path}")
+    return int(match.group(1)), int(match.group(2)) if match.group(2) else None
+
+
+def clean_scan_address(addr):
+    """cleanPage's address fixups: floating '-' and leading '1-' become 'I-', an unclosed '(' is closed"""
+    addr = addr.replace(' -', ' I-')
+    if addr.startswith('-'):
+        addr = addr.replace('-', 'I-')
+    if addr.startswith('1'):
+        addr = addr.replace('1-', 'I-')
+    if addr.count('(') > addr.count(')'):
+        addr += ')'
+    return addr
+
+
+def parse_scan_page(lines):
+    """
+    Rows of one OCR page, with the same layout rules as cleanPage
+
+    Non-empty lines alternate "CITY ZIP NAME..." and "PHONE ADDRESS...".  A
+    trailing name line without its phone line gives a row with no phone/addr.
+
+    Returns:
+        list of (city, zip, name, phone, addr) tuples
+
+    Raises:
+        ValueError: A name line has no ZIP token
+    """
+    lines = [line for line in lines if line != '\n']
+    rows = []
+    for i in range(0, len(lines), 2):
+        parts = lines[i].strip().split(' ')
+        if len(parts) < 2:
+            raise ValueError(f"line {i + 1}: expected 'CITY ZIP NAME', got {lines[i].strip()!r}")
+        phone = addr = None
+        if i + 1 < len(lines):
+            phone_parts = lines[i + 1].strip().split(' ')
+            phone, addr = phone_parts[0], clean_scan_address(' '.join(phone_parts[1:]))
+        rows.append((parts[0], parts[1], ' '.join(parts[2:]), phone, addr))
+    return rows
+
+
+def _parse_page_file(path):
+    """Worker: (path, rows, error) for one page file"""
+    try:
+        with open(path, 'r') as f:
+            return path, parse_scan_page(f.readlines()), None
+    except Exception as e:
+        return path, [], f"{type(e).__name__}: {e}"
+
+
+def iter_parsed_pages(paths, workers=None, max_pending=None):
+    """
+    Parse page files in a process pool, yielding (path, rows, error) as pages finish
+
+    Args:
+        paths: Page files
+        workers: Processes to use (default: CPU count; 1 runs inline)
+        max_pending: Pages submitted ahead of the consumer (default: 4 per worker)
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for path in paths:
+            yield _parse_page_file(path)
+        return
+
+    max_pending = max_pending or workers * 4
+    paths = iter(paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for path in paths:
+            pending.add(pool.submit(_parse_page_file, path))
+            if len(pending) >= max_pending:
+                break
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                next_path = next(paths, None)
+                if next_path is not None:
+                    pending.add(pool.submit(_parse_page_file, next_path))
+
+
+class _YearPartitionWriter:
+    """
+    Buffers rows per year and writes each full buffer as a new part file
+
+    Every page whose rows go into a part file is handed to on_flush right after
+    that file is written, so the page log never lags behind the dataset.
+    """
+
+    def __init__(self, out_dir, rows_per_file, on_flush=None):
+        self.out_dir = out_dir
+        self.rows_per_file = rows_per_file
+        self.on_flush = on_flush
+        self.buffers = {}
+        self.pages = {}
+        self.files_written = 0
+
+    def add(self, year, rows, page_entry=None):
+        buffer = self.buffers.setdefault(year, [])
+        buffer.extend(rows)
+        if page_entry is not None:
+            self.pages.setdefault(year, []).append(page_entry)
+        if len(buffer) >= self.rows_per_file:
+            self.flush(year)
+
+    def flush(self, year):
+        rows = self.buffers.pop(year, [])
+        pages = self.pages.pop(year, [])
+        if rows:
+            year_dir = os.path.join(self.out_dir, f'year={year}')
+            os.makedirs(year_dir, exist_ok=True)
+            part = len([f for f in os.listdir(year_dir) if f.endswith('.parquet')])
+            df = pd.DataFrame(rows, columns=ROW_COLUMNS).astype({'page': 'Int32', 'line': 'int32'})
+            table = pa.Table.from_pandas(df, schema=ROW_SCHEMA, preserve_index=False)
+            pq.write_table(table, os.path.join(year_dir, f'part-{part:05d}.parquet'))
+            self.files_written += 1
+        if pages and self.on_flush is not None:
+            self.on_flush(pages)
+
+    def close(self):
+        for year in list(self.buffers):
+            self.flush(year)
+
+
+def _read_page_log(path):
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+    return pd.DataFrame(columns=PAGE_LOG_COLUMNS)
+
+
+def ingest_scan_pages(pattern, out_dir, workers=None, rows_per_file=100_000, retry_errors=True):
+    """
+    Parse every matching OCR page into <out_dir>/year=YYYY/*.parquet
+
+    Args:
+        pattern: Glob of pages-not-clean files (or a list of paths)
+        out_dir: Dataset directory; _pages.parquet in it logs every page ingested
+            (the leading underscore keeps it out of pd.read_parquet(out_dir))
+        workers: Parser processes (default: CPU count; 1 runs inline)
+        rows_per_file: Rows buffered per year before a part file is written
+        retry_errors: Re-parse pages whose previous attempt failed
+
+    Returns:
+        DataFrame: the page log (source_file, year, page, rows, parse_error)
+    """
+    start = time.perf_counter()
+    paths = sorted(glob.glob(pattern) if isinstance(pattern, str) else pattern)
+    os.makedirs(out_dir, exist_ok=True)
+    log_path = os.path.join(out_dir, '_pages.parquet')
+    page_log = _read_page_log(log_path)
+
+    done = page_log if not retry_errors else page_log[page_log['parse_error'].isna()]
+    skip = set(done['source_file'])
+    todo = [p for p in paths if os.path.basename(p) not in skip]
+    print(f"📄 {len(paths)} scan pages, {len(paths) - len(todo)} already ingested, parsing {len(todo)}")
+
+    log_rows = []
+    unwritten = []
+
+    def record(entries):
+        # Rewrite the log with this flush's pages (plus any row-less pages seen so far) in one step
+        nonlocal page_log
+        entries = unwritten + entries
+        unwritten.clear()
+        new_log = pd.DataFrame(entries, columns=PAGE_LOG_COLUMNS)
+        page_log = pd.concat([page_log[~page_log['source_file'].isin(new_log['source_file'])], new_log],
+                             ignore_index=True)
+        page_log = page_log.astype({'year': 'Int32', 'page': 'Int32', 'rows': 'int64'})
+        tmp_path = log_path + '.tmp'
+        page_log.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, log_path)
+
+    writer = _YearPartitionWriter(out_dir, rows_per_file, on_flush=record)
+    total_rows = 0
+    try:
+        for path, rows, error in iter_parsed_pages(todo, workers=workers):
+            name = os.path.basename(path)
+            try:
+                year, page = page_year_and_number(path)
+            except ValueError as e:
+                year, page, error, rows = None, None, f"ValueError: {e}", []
+            entry = (name, year, page, len(rows), error)
+            log_rows.append(entry)
+            if rows:
+                writer.add(year, [(name, page, line) + row for line, row in enumerate(rows)], page_entry=entry)
+            else:
+                unwritten.append(entry)
+            total_rows += len(rows)
+    finally:
+        # Buffered pages are logged as their part files land; failed and empty pages go with the last write
+        writer.close()
+        if unwritten:
+            record([])
+
+    errors = sum(e is not None for *_, e in log_rows)
+    print(f"✅ {total_rows} rows from {len(log_rows) - errors} pages in {writer.files_written} part files "
+          f"({time.perf_counter() - start:.1f}s)")
+    if errors:
+        print(f"⚠️ {errors} pages failed to parse; see parse_error in {log_path}")
+    return page_log
@@ -0,0 +1,441 @@
+"""
+Parallel Selenium browser pool for the Google dorking searches in Web_Scraping/1.ipynb.
+
+`automated_google_search_and_click` drives one Chrome window serially and writes
+batch_NNN_results.csv files that have to be stitched back together.  Here N isolated
+browser sessions pull queries from a shared work queue, each with its own pacing,
+and every query that found a result is appended straight to one output CSV.  That
+CSV doubles as the checkpoint: rerunning the pool skips any row key already written
+to it, so resuming after a crash or CAPTCHA stop is automatic.  Queries that failed
+or found nothing go to a separate *_failed.csv and are searched again on the next run.
+"""
+
+import csv
+import os
+import queue
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+DORKING_PREFIX = "site:rvandtravelers.com OR site:truckstopsandservices.com"
+GOOGLE_SEARCH_URL = "https://www.google.com/search?q="
+
+# Multiple strategies to find the first search result (same order as 1.ipynb)
+RESULT_SELECTORS = [
+    'div[data-sokoban-container] a h3',
+    'div.g a h3',
+    'h3.LC20lb',
+    'h3[class*="DKV0Md"]',
+    'div[class*="yuRUbf"] a',
+    'div[class*="tF2Cxc"] a h3'
+]
+
+RESULT_COLUMNS = ['row_key', 'dorking_search_links', 'first_result_links', 'worker_id']
+FAILED_COLUMNS = RESULT_COLUMNS + ['error']
+
+
+def build_chrome_driver(headless=False):
+    """
+    Create a Chrome WebDriver with the anti-detection setup used in 1.ipynb
+
+    Args:
+        headless: Run Chrome without a window (useful against the local stub)
+
+    Returns:
+        selenium.webdriver.Chrome instance
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    chrome_options = Options()
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-plugins-discovery")
+    chrome_options.add_argument("--no-first-run")
+    chrome_options.add_argument("--no-service-autorun")
+    chrome_options.add_argument("--password-store=basic")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    if headless:
+        chrome_options.add_argument("--headless=new")
+
+    service = Service(ChromeDriverManager().install())
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    driver.execute_script("Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']})")
+    driver.set_window_size(1920, 1080)
+    return driver
+
+
+class SessionPacing:
+    """
+    Per-session random delays, mirroring the sleeps in automated_google_search_and_click.
+
+    Every session gets its own random generator so workers do not fire in lockstep.
+    Set scale=0 to disable all waiting (e.g. against the local stub).
+    """
+
+    def __init__(self, seed=None, scale=1.0, before_search=(3, 7), between_searches=(8, 15),
+                 rest_every=10, rest=(15, 25), click_settle=(4, 8), captcha=(10, 20)):
+        self.rng = random.Random(seed)
+        self.scale = scale
+        self.before_search = before_search
+        self.between_searches = between_searches
+        self.rest_every = rest_every
+        self.rest = rest
+        self.click_settle = click_settle
+        self.captcha = captcha
+        self.queries_done = 0
+
+    def _sleep(self, bounds):
+        delay = self.rng.uniform(*bounds) * self.scale
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def wait_before_search(self):
+        return self._sleep(self.before_search)
+
+    def wait_after_click(self):
+        return self._sleep(self.click_settle)
+
+    def wait_after_captcha(self):
+        """Longer back-off when the search page shows the unusual-traffic/CAPTCHA notice"""
+        return self._sleep(self.captcha)
+
+    def wait_after_search(self):
+        """Short pause after every query, plus a long rest every `rest_every` queries"""
+        self.queries_done += 1
+        if self.rest_every and self.queries_done % self.rest_every == 0:
+            return self._sleep(self.rest)
+        return self._sleep(self.between_searches)
+
+
+def search_first_result(driver, query, search_url_base=GOOGLE_SEARCH_URL, pacing=None,
+                        dorking_prefix=DORKING_PREFIX, click=True):
+    """
+    Run one dorked search and return the first organic result
+
+    Args:
+        driver: Selenium WebDriver for this session
+        query: Search query (without the site: prefix)
+        search_url_base: Search endpoint, the query is appended URL-encoded
+        pacing: SessionPacing for this session (None = no waiting)
+        dorking_prefix: Prefix added in front of the query
+        click: Click through to the first result like the notebook does
+
+    Returns:
+        tuple: (search_url, first_result_link or None)
+    """
+    from selenium.webdriver.common.by import By
+
+    full_query = f"{dorking_prefix} {query}".strip()
+    search_url = search_url_base + urllib.parse.quote_plus(full_query)
+
+    if pacing:
+        pacing.wait_before_search()
+    driver.get(search_url)
+
+    page_source = driver.page_source.lower()
+    if "unusual traffic" in page_source or "captcha" in page_source:
+        print("⚠️  Google detected unusual traffic. Waiting longer and trying again...")
+        if pacing:
+            pacing.wait_after_captcha()
+        driver.refresh()
+
+    for selector in RESULT_SELECTORS:
+        try:
+            elements = driver.find_elements(By.CSS_SELECTOR, selector)
+            if not elements:
+                continue
+            element = elements[0]
+
+            # Find parent anchor tag
+            while element is not None and element.tag_name != 'a':
+                try:
+                    element = element.find_element(By.XPATH, '..')
+                except Exception:
+                    element = None
+            if element is None:
+                continue
+
+            first_result_link = element.get_attribute('href')
+            if not first_result_link:
+                continue
+
+            if click:
+                driver.execute_script("arguments[0].click();", element)
+                if pacing:
+                    pacing.wait_after_click()
+            return search_url, first_result_link
+
+        except Exception as e:
+            print(f"Error with selector {selector}: {e}")
+            continue
+
+    return search_url, None
+
+
+def failed_path_for(path):
+    """Where a pool writes the queries that failed: 1_pool_results.csv -> 1_pool_results_failed.csv"""
+    root, ext = os.path.splitext(path)
+    return f"{root}_failed{ext or '.csv'}"
+
+
+class ResultsTable:
+    """
+    Append-only CSV that holds every query with a result and acts as the pool checkpoint.
+
+    Each row is flushed and fsynced as soon as it is written, so a killed process
+    loses at most the query that was in flight.  Failed queries (an error, or no
+    result link) are logged to failed_path instead and never count as completed.
+    """
+
+    def __init__(self, path, input_columns, failed_path=None):
+        self.path = path
+        self.failed_path = failed_path or failed_path_for(path)
+        self.columns = list(input_columns) + [c for c in RESULT_COLUMNS if c not in input_columns]
+        self.failed_columns = list(input_columns) + [c for c in FAILED_COLUMNS if c not in input_columns]
+        self._lock = threading.Lock()
+        self.completed = self._load_completed()
+
+    def _load_completed(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return set()
+        existing = pd.read_csv(self.path, usecols=['row_key', 'first_result_links'], dtype={'row_key': str})
+        # Files written before failures were split out can hold rows without a link
+        return set(existing.loc[existing['first_result_links'].notna(), 'row_key'])
+
+    def _write(self, path, columns, record):
+        write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+            if write_header:
+                writer.writeheader()
+            writer.writerow(record)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, record):
+        """Record a query that found its first result; it is skipped from now on"""
+        with self._lock:
+            self._write(self.path, self.columns, record)
+            self.completed.add(str(record['row_key']))
+
+    def append_failure(self, record, error):
+        """Log a failed query to failed_path; it stays pending and is retried on the next run"""
+        with self._lock:
+            self._write(self.failed_path, self.failed_columns, dict(record, error=error))
+
+    def read(self):
+        """Completed rows, one per row key"""
+        if not os.path.exists(self.path):
+            return pd.DataFrame(columns=self.columns)
+        existing = pd.read_csv(self.path, dtype={'row_key': str})
+        existing = existing[existing['first_result_links'].notna()]
+        return existing.drop_duplicates('row_key', keep='last')
+
+    def read_failures(self):
+        """Every logged failure (a row key can appear once per failed run)"""
+        if not os.path.exists(self.failed_path):
+            return pd.DataFrame(columns=self.failed_columns)
+        return pd.read_csv(self.failed_path, dtype={'row_key': str})
+
+
+class SearchBrowserPool:
+    """
+    Pool of N browser sessions fed from a shared queue of search queries
+
+    Usage:
+        pool = SearchBrowserPool(n_workers=3, output_path='1_pool_results.csv')
+        result_df = pool.run(df)          # rerun the same line to resume
+    """
+
+    def __init__(self, n_workers=3, output_path='1_pool_results.csv', driver_factory=build_chrome_driver,
+                 search_url_base=GOOGLE_SEARCH_URL, pacing_factory=None, dorking_prefix=DORKING_PREFIX,
+                 click=True):
+        """
+        Args:
+            n_workers: Number of isolated browser sessions
+            output_path: Combined output CSV (also the checkpoint)
+            driver_factory: Callable returning a new WebDriver, called once per worker
+            search_url_base: Search endpoint (point at serve_search_stub for testing)
+            pacing_factory: Callable(worker_id) -> SessionPacing; defaults to seeded random pacing
+            dorking_prefix: site: prefix added to every query
+            click: Click through to the first result after finding it
+        """
+        self.n_workers = n_workers
+        self.output_path = output_path
+        self.driver_factory = driver_factory
+        self.search_url_base = search_url_base
+        self.pacing_factory = pacing_factory or (lambda worker_id: SessionPacing(seed=None))
+        self.dorking_prefix = dorking_prefix
+        self.click = click
+
+    def _worker(self, worker_id, work_queue, table, progress):
+        pacing = self.pacing_factory(worker_id)
+        try:
+            driver = self.driver_factory()
+        except Exception as e:
+            print(f"❌ Worker {worker_id}: could not start browser: {e}")
+            return
+
+        try:
+            while True:
+                try:
+                    row_key, row = work_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                error = None
+                try:
+                    search_url, first_link = search_first_result(
+                        driver, row['__query'], search_url_base=self.search_url_base,
+                        pacing=pacing, dorking_prefix=self.dorking_prefix, click=self.click)
+                except Exception as e:
+                    print(f"❌ Worker {worker_id}: error processing search: {e}")
+                    search_url, first_link = None, None
+                    error = f"{type(e).__name__}: {e}"
+
+                record = {k: v for k, v in row.items() if k != '__query'}
+                record.update({
+                    'row_key': row_key,
+                    'dorking_search_links': search_url,
+                    'first_result_links': first_link,
+                    'worker_id': worker_id,
+                })
+                if first_link:
+                    table.append(record)
+                else:
+                    table.append_failure(record, error or 'No result link found')
+
+                with progress['lock']:
+                    progress['done'] += 1
+                    done = progress['done']
+                status = '✓' if first_link else '❌'
+                print(f"{status} [worker {worker_id}] {done}/{progress['total']}: {first_link}")
+
+                work_queue.task_done()
+                if not work_queue.empty():
+                    pacing.wait_after_search()
+        finally:
+            print(f"Closing browser for worker {worker_id}...")
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def run(self, df, column_name='places_search_query', key_column=None):
+        """
+        Search every row of df that is not already in the output CSV
+
+        Args:
+            df: DataFrame containing search queries
+            column_name: Name of the column containing search queries
+            key_column: Column that identifies a row across runs (default: the index)
+
+        Returns:
+            DataFrame with all rows that found a result, in the original row order;
+            the rest are listed in the *_failed.csv next to output_path and are
+            searched again when run is called again
+        """
+        keys = df[key_column].astype(str) if key_column else df.index.astype(str)
+        table = ResultsTable(self.output_path, [c for c in df.columns])
+
+        work_queue = queue.Queue()
+        for row_key, (_, row) in zip(keys, df.iterrows()):
+            if row_key in table.completed:
+                continue
+            payload = row.to_dict()
+            payload['__query'] = row[column_name]
+            work_queue.put((row_key, payload))
+
+        total = work_queue.qsize()
+        skipped = len(df) - total
+        print(f"Processing {total} rows with {self.n_workers} browser sessions "
+              f"({skipped} already completed in {self.output_path})")
+
+        if total:
+            progress = {'done': 0, 'total': total, 'lock': threading.Lock()}
+            threads = [
+                threading.Thread(target=self._worker, args=(worker_id, work_queue, table, progress), daemon=True)
+                for worker_id in range(min(self.n_workers, total))
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        result_df = table.read()
+        order = {k: i for i, k in enumerate(keys)}
+        result_df = result_df[result_df['row_key'].isin(order)]
+        result_df = result_df.sort_values('row_key', key=lambda s: s.map(order)).reset_index(drop=True)
+        print(f"\n🎉 {len(result_df)}/{len(df)} rows completed, results in: {self.output_path}")
+        if len(result_df) < len(df):
+            print(f"⚠️  {len(df) - len(result_df)} rows still pending (failures logged in {table.failed_path}); "
+                  f"rerun to retry them")
+        return result_df
+
+
+def serve_search_stub(results=None, host='127.0.0.1', port=0):
+    """
+    Serve a static Google-like results page on localhost for testing the pool
+
+    Every /search request returns a page whose first organic result (div.g a h3)
+    points at results[query] if given, else at /result/<n>.  /result/... pages
+    return a plain body so the click-through has somewhere to land.
+
+    Args:
+        results: Optional dict mapping full query text to the first result URL
+        host: Interface to bind
+        port: Port to bind (0 = pick a free port)
+
+    Returns:
+        tuple: (server, search_url_base); call server.shutdown() when done
+    """
+    results = results or {}
+    counter = {'n': 0}
+    lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parsed = urllib.parse.urlparse(self.path)
+            if parsed.path == '/search':
+                query = urllib.parse.parse_qs(parsed.query).get('q', [''])[0]
+                with lock:
+                    counter['n'] += 1
+                    n = counter['n']
+                link = results.get(query, f"http://{self.headers['Host']}/result/{n}")
+                body = (
+                    "<html><body><div id='search'>"
+                    f"<div class='g'><a href='{link}'><h3>First result for {query}</h3></a></div>"
+                    f"<div class='g'><a href='{link}?second'><h3>Second result</h3></a></div>"
+                    "</div></body></html>"
+                )
+            else:
+                body = f"<html><body>Result page {parsed.path}</body></html>"
+
+            encoded = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    search_url_base = f"http://{host}:{server.server_address[1]}/search?q="
+    return server, search_url_base
@@ -0,0 +1,284 @@
+"""
+Radius candidate generation between geocoded OCR rows and scraped POIs.
+
+Candidate generation is attribute-only: comprehensive_matching_logic gates on
+ZIP, state, exit and highway strings and Add_3 on token sets, so a geocoded row
+(API_Attempt/2.ipynb latitude/longitude, GeocodeScans createAddressedGDF) whose
+ZIP or exit number was misread never meets the truck stop sitting next to it.
+SpatialIndex puts the scraped POIs in a KD-tree over unit-sphere (x, y, z)
+coordinates, where a chord-length radius is exactly a great-circle radius, and
+answers every OCR row's "all POIs within radius_m" in one batched query.  The
+pairs then go through the notebook's name rule (names_match over
+filter_meaningful_words) and phone equality (clean_phone_number), and the best
+match per row is filled in like any other match, marked for verification.
+
+    df = attach_geocodes(df, pd.read_csv(r'...\API_Attempt\2.csv'))
+    index = SpatialIndex(df2)
+    pairs = spatial_candidates(df, index, radius_m=1500)
+    scored = score_spatial_candidates(pairs, df, df2)
+    df = apply_spatial_matches(df, scored, df2)
+"""
+
+import numpy as np
+import pandas as pd
+
+from .geohash import EARTH_RADIUS_M, haversine_m
+from .matching import PHONE_COLUMNS, clean_phone_number, filter_meaningful_words, names_match, normalize_zip_code
+
+SPATIAL_FLAG_REASON = "Spatial Name/Phone Match Found"
+
+# Flag_Reason values left by comprehensive_matching_logic when no reference row got through
+UNMATCHED_REASONS = [
+    "No matches found",
+    "no matching ZIPCODE",
+    "matching ZIPCODE, no matching State",
+    "matching ZIPCODE, matching State, no matching Exit",
+    "matching ZIPCODE, matching State, matching Exit, no matching Highway/Exit/Street Address",
+    "No Phone/Name/ZIP/State/Exit/Highway matches found",
+]
+
+PAIR_COLUMNS = ['df_index', 'ref_index', 'distance_m']
+
+# Directory columns that identify an OCR row; the combined frame carries them with an OCR_ prefix
+GEOCODE_KEY_COLUMNS = ['year', 'state', 'zip_code', 'city', 'label', 'address']
+
+
+def unit_vectors(lat, lon):
+    """(n, 3) unit-sphere coordinates of lat/lon degrees"""
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def _key_text(values, column):
+    if column == 'zip_code':
+        return values.map(normalize_zip_code).fillna('')
+    if column == 'year':
+        return pd.to_numeric(values, errors='coerce').astype('Int64').astype(str).replace('<NA>', '')
+    return values.astype(object).where(values.notna(), '').astype(str).str.upper().str.split().str.join(' ')
+
+
+def attach_geocodes(df, geocoded, key_columns=GEOCODE_KEY_COLUMNS, prefix='OCR_',
+                    lat_column='latitude', lon_column='longitude'):
+    """
+    Join geocoded coordinates (API_Attempt/2.ipynb output) onto the combined frame by OCR row key
+
+    Args:
+        df: Combined frame with OCR_-prefixed directory columns
+        geocoded: Geocoded directory rows with the unprefixed columns and lat/lon
+        key_columns: Directory columns that identify a row; those missing on either side are skipped
+        prefix: Prefix of the directory columns in df
+        lat_column, lon_column: Coordinate columns in geocoded, written to df under the same names
+
+    Returns:
+        DataFrame: copy of df with lat_column/lon_column (NaN where no geocode matched)
+
+    Raises:
+        ValueError: No key column is present in both frames
+    """
+    keys = [c for c in key_columns if prefix + c in df.columns and c in geocoded.columns]
+    if not keys:
+        raise ValueError(f"No shared key columns among {list(key_columns)}")
+    located = geocoded[pd.to_numeric(geocoded[lat_column], errors='coerce').notna()
+                       & pd.to_numeric(geocoded[lon_column], errors='coerce').notna()]
+    right = pd.DataFrame({c: _key_text(located[c], c) for c in keys})
+    right[lat_column] = pd.to_numeric(located[lat_column]).to_numpy()
+    right[lon_column] = pd.to_numeric(located[lon_column]).to_numpy()
+    right = right.drop_duplicates(subset=keys)
+    left = pd.DataFrame({c: _key_text(df[prefix + c], c) for c in keys}, index=df.index)
+    joined = left.merge(right, on=keys, how='left')
+
+    result_df = df.copy()
+    result_df[lat_column] = joined[lat_column].to_numpy()
+    result_df[lon_column] = joined[lon_column].to_numpy()
+    print(f"📍 Joined coordinates onto {int(result_df[lat_column].notna().sum())} of {len(df)} rows "
+          f"(key: {', '.join(keys)}; {len(located)} geocoded rows)")
+    return result_df
+
+
+def chord_radius(radius_m):
+    """Straight-line distance on the unit sphere for a great-circle distance in meters"""
+    return 2 * np.sin(min(radius_m / EARTH_RADIUS_M, np.pi) / 2)
+
+
+class SpatialIndex:
+    """KD-tree over the scraped POIs' coordinates for batched radius queries"""
+
+    def __init__(self, reference, lat_column='Latitude', lon_column='Longitude', verbose=True):
+        """
+        Args:
+            reference: Scraped reference table (df2)
+            lat_column, lon_column: Coordinate columns; rows without both are not indexed
+            verbose: Print the index summary
+        """
+        from scipy.spatial import cKDTree
+
+        self.reference = reference
+        lat = pd.to_numeric(reference[lat_column], errors='coerce').to_numpy(dtype=float)
+        lon = pd.to_numeric(reference[lon_column], errors='coerce').to_numpy(dtype=float)
+        self.rows = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+        self.lat, self.lon = lat[self.rows], lon[self.rows]
+        self.tree = cKDTree(unit_vectors(self.lat, self.lon))
+        if verbose:
+            print(f"✅ Spatial index over {len(self.rows)} scraped POIs "
+                  f"({len(reference) - len(self.rows)} without coordinates)")
+
+    def query_radius(self, lat, lon, radius_m=1500, max_candidates=None):
+        """
+        All indexed POIs within radius_m of each query point, in one batched query
+
+        Args:
+            lat, lon: Query coordinates (NaN rows get no candidates)
+            radius_m: Search radius in meters
+            max_candidates: Keep only the nearest this many per query
+
+        Returns:
+            DataFrame with query (position in lat/lon), ref_row (position in the
+            reference), ref_index (its index label) and distance_m, nearest first per query
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        valid = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+        empty = pd.DataFrame({'query': np.array([], dtype=np.int64), 'ref_row': np.array([], dtype=np.int64),
+                              'ref_index': self.reference.index[:0].to_numpy(), 'distance_m': np.array([], dtype=float)})
+        if len(valid) == 0 or len(self.rows) == 0:
+            return empty
+
+        hits = self.tree.query_ball_point(unit_vectors(lat[valid], lon[valid]), r=chord_radius(radius_m))
+        counts = np.fromiter((len(h) for h in hits), dtype=np.int64, count=len(hits))
+        if counts.sum() == 0:
+            return empty
+        query = np.repeat(valid, counts)
+        tree_pos = np.concatenate([np.asarray(h, dtype=np.int64) for h in hits if h])
+        distance = haversine_m(lat[query], lon[query], self.lat[tree_pos], self.lon[tree_pos])
+
+        order = np.lexsort((distance, query))
+        query, tree_pos, distance = query[order], tree_pos[order], distance[order]
+        if max_candidates is not None:
+            starts = np.r_[0, np.flatnonzero(np.diff(query)) + 1]
+            rank = np.arange(len(query)) - np.repeat(starts, np.diff(np.r_[starts, len(query)]))
+            keep = rank < max_candidates
+            query, tree_pos, distance = query[keep], tree_pos[keep], distance[keep]
+
+        ref_row = self.rows[tree_pos]
+        return pd.DataFrame({
+            'query': query,
+            'ref_row': ref_row,
+            'ref_index': self.reference.index.to_numpy()[ref_row],
+            'distance_m': np.round(distance, 1),
+        })
+
+
+def spatial_candidates(df, index, radius_m=1500, lat_column='latitude', lon_column='longitude',
+                       reasons=UNMATCHED_REASONS, max_candidates=20):
+    """
+    Scraped POIs within radius_m of every geocoded row that is still unmatched
+
+    Args:
+        df: Combined frame after comprehensive_matching_logic, with geocoded coordinates
+        index: SpatialIndex over the scraped table
+        radius_m: Search radius in meters
+        lat_column, lon_column: The rows' geocoded coordinates
+        reasons: Flag_Reason values to retry (None for every row)
+        max_candidates: Nearest POIs kept per row
+
+    Returns:
+        DataFrame with df_index, ref_index and distance_m, nearest first per row
+    """
+    rows = df if reasons is None or 'Flag_Reason' not in df.columns else df[df['Flag_Reason'].isin(reasons)]
+    lat = pd.to_numeric(rows[lat_column], errors='coerce').to_numpy(dtype=float)
+    lon = pd.to_numeric(rows[lon_column], errors='coerce').to_numpy(dtype=float)
+    print(f"📍 Searching {radius_m:g} m around {int((~(np.isnan(lat) | np.isnan(lon))).sum())} geocoded rows "
+          f"of {len(rows)} unmatched")
+    hits = index.query_radius(lat, lon, radius_m=radius_m, max_candidates=max_candidates)
+    pairs = pd.DataFrame({
+        'df_index': rows.index.to_numpy()[hits['query'].to_numpy()],
+        'ref_index': hits['ref_index'].to_numpy(),
+        'distance_m': hits['distance_m'].to_numpy(),
+    })
+    print(f"✅ {len(pairs)} candidate pairs for {pairs['df_index'].nunique()} rows")
+    return pairs
+
+
+def _reference_phones(reference):
+    columns = [c for c in PHONE_COLUMNS if c in reference.columns]
+    phones = pd.Series([set() for _ in range(len(reference))], index=reference.index, dtype=object)
+    for col in columns:
+        for phones_of_row, phone in zip(phones, reference[col].map(clean_phone_number)):
+            if phone:
+                phones_of_row.add(phone)
+    return phones
+
+
+def score_spatial_candidates(pairs, df, reference, label_column='OCR_label', phone_column='OCR_phone',
+                             name_columns=('name', 'Chain')):
+    """
+    Name and phone agreement for every candidate pair
+
+    name_match uses the matcher's rule (any meaningful OCR word contained in, or
+    containing, a meaningful word of the scraped name/chain); phone_match compares
+    clean_phone_number against every scraped phone column.
+
+    Returns:
+        pairs with name_match (the matched words or None), phone_match, score
+        and rank (0 = best per row: phone, then name, then nearest)
+    """
+    scored = pairs.copy()
+    if scored.empty:
+        for col, empty in [('name_match', None), ('phone_match', False), ('score', 0.0), ('rank', 0)]:
+            scored[col] = pd.Series(dtype=object if empty is None else type(empty))
+        return scored
+
+    ocr_words = df[label_column].map(filter_meaningful_words) if label_column in df.columns else None
+    ocr_phones = df[phone_column].map(clean_phone_number) if phone_column in df.columns else None
+    name_columns = [c for c in name_columns if c in reference.columns]
+    ref_words = (reference[name_columns].astype(object).where(reference[name_columns].notna(), '')
+                 .astype(str).agg(' '.join, axis=1).map(filter_meaningful_words))
+    ref_phones = _reference_phones(reference)
+
+    name_match, phone_match = [], []
+    for df_index, ref_index in zip(scored['df_index'], scored['ref_index']):
+        name_match.append(names_match(ocr_words[df_index], ref_words[ref_index]) if ocr_words is not None else None)
+        phone = ocr_phones[df_index] if ocr_phones is not None else None
+        phone_match.append(bool(phone) and phone in ref_phones[ref_index])
+    scored['name_match'] = name_match
+    scored['phone_match'] = phone_match
+    scored['score'] = (scored['phone_match'].astype(float) * 2 + scored['name_match'].notna().astype(float)).round(1)
+    scored = scored.sort_values(['df_index', 'score', 'distance_m'], ascending=[True, False, True], kind='stable')
+    scored['rank'] = scored.groupby('df_index', sort=False).cumcount()
+    return scored.reset_index(drop=True)
+
+
+def apply_spatial_matches(df, scored, reference, require_name=False):
+    """
+    Fill the best spatial candidate into rows whose name or phone agrees with it
+
+    Args:
+        df: Combined frame the pairs came from
+        scored: Output of score_spatial_candidates
+        reference: Scraped reference table (df2)
+        require_name: Only apply candidates whose name matches (a phone match alone is not enough)
+
+    Returns:
+        DataFrame: copy of df with Scraped_ columns, Flagged, Flag_Reason and
+        Manually Verified? updated
+    """
+    result_df = df.copy()
+    if 'Manually Verified?' not in result_df.columns:
+        result_df['Manually Verified?'] = "No"
+    best = scored[scored['rank'] == 0]
+    best = best[best['name_match'].notna() if require_name else (best['name_match'].notna() | best['phone_match'])]
+    scraped_map = [(col, f"Scraped_{col}") for col in reference.columns if f"Scraped_{col}" in result_df.columns]
+
+    for df_index, ref_index in zip(best['df_index'], best['ref_index']):
+        match_row = reference.loc[ref_index]
+        result_df.loc[df_index, 'Flagged'] = False
+        result_df.loc[df_index, 'Flag_Reason'] = SPATIAL_FLAG_REASON
+        result_df.loc[df_index, 'Manually Verified?'] = "Please Verify This"
+        for df2_col, scraped_col in scraped_map:
+            result_df.loc[df_index, scraped_col] = match_row[df2_col]
+
+    print(f"🎉 Applied {len(best)} spatial matches "
+          f"({int(best['phone_match'].sum())} by phone, {int(best['name_match'].notna().sum())} by name)")
+    return result_df
@@ -0,0 +1,334 @@
+"""
+Synthetic OCR-directory and scraped-reference tables for benchmarking.
+
+The committed sample CSVs (Cleaned_Code/Add_2*.csv, Web_Scraping/4_batch_*.csv) only
+have a few thousand rows.  These generators produce tables with the same column
+layout at any size, with distributions modelled on those samples:
+
+    - ZIPs drawn per state from real 3-digit prefixes with a skewed (Zipf-like)
+      popularity, so a few ZIPs along busy corridors hold many stops
+    - exits mostly 1-450 on the state's interstates, with "128-B" suffixes and
+      "160 EB/164 WB" compound forms
+    - chain shares close to Add_2.csv (Shell, Chevron, Pilot, Flying J, Love's, ...)
+      and the scraped logo-style chain strings ("loves travel stops country stores 416x416")
+    - phones on the state's area codes, with OCR digit errors and missing values
+
+Directory rows are mostly noisy re-observations of reference stops across several
+edition years, so the matching stages find realistic numbers of candidates.
+"""
+
+import numpy as np
+import pandas as pd
+
+# abbr, name, 3-digit ZIP prefixes, area codes, interstates, share of stops
+STATES = [
+    ('AL', 'Alabama', range(350, 370), [205, 251, 256, 334], ['I-10', 'I-20', 'I-59', 'I-65', 'I-85'], 2),
+    ('AZ', 'Arizona', range(850, 866), [480, 520, 602, 623, 928], ['I-8', 'I-10', 'I-17', 'I-19', 'I-40'], 3),
+    ('AR', 'Arkansas', range(716, 730), [479, 501, 870], ['I-30', 'I-40', 'I-55'], 2),
+    ('CA', 'California', range(900, 962), [209, 559, 619, 661, 760, 909, 916], ['I-5', 'I-8', 'I-10', 'I-15', 'I-40', 'I-80'], 8),
+    ('CO', 'Colorado', range(800, 817), [303, 719, 970], ['I-25', 'I-70', 'I-76'], 2),
+    ('FL', 'Florida', range(320, 350), [239, 305, 352, 407, 813, 850, 904], ['I-4', 'I-10', 'I-75', 'I-95'], 5),
+    ('GA', 'Georgia', range(300, 320), [229, 404, 478, 706, 912], ['I-16', 'I-20', 'I-75', 'I-85', 'I-95'], 4),
+    ('IL', 'Illinois', range(600, 630), [217, 309, 618, 630, 815], ['I-55', 'I-57', 'I-70', 'I-74', 'I-80', 'I-90'], 4),
+    ('IN', 'Indiana', range(460, 480), [219, 260, 317, 574, 812], ['I-64', 'I-65', 'I-69', 'I-70', 'I-74', 'I-94'], 3),
+    ('KS', 'Kansas', range(660, 680), [316, 620, 785, 913], ['I-35', 'I-70', 'I-135'], 2),
+    ('KY', 'Kentucky', range(400, 428), [270, 502, 606, 859], ['I-64', 'I-65', 'I-71', 'I-75'], 2),
+    ('LA', 'Louisiana', range(700, 715), [225, 318, 337, 504, 985], ['I-10', 'I-12', 'I-20', 'I-49', 'I-55'], 2),
+    ('MO', 'Missouri', range(630, 659), [314, 417, 573, 636, 816], ['I-35', 'I-44', 'I-55', 'I-70'], 3),
+    ('MS', 'Mississippi', range(386, 398), [228, 601, 662], ['I-10', 'I-20', 'I-55', 'I-59'], 2),
+    ('NM', 'New Mexico', range(870, 885), [505, 575], ['I-10', 'I-25', 'I-40'], 2),
+    ('NV', 'Nevada', range(889, 899), [702, 725, 775], ['I-15', 'I-80'], 2),
+    ('OH', 'Ohio', range(430, 459), [216, 330, 419, 513, 614, 740], ['I-70', 'I-71', 'I-75', 'I-77', 'I-80', 'I-90'], 4),
+    ('OK', 'Oklahoma', range(730, 750), [405, 580, 918], ['I-35', 'I-40', 'I-44'], 2),
+    ('PA', 'Pennsylvania', range(150, 197), [215, 412, 570, 717, 814], ['I-76', 'I-78', 'I-80', 'I-81', 'I-83'], 4),
+    ('TN', 'Tennessee', range(370, 386), [423, 615, 731, 865, 901, 931], ['I-24', 'I-40', 'I-65', 'I-75', 'I-81'], 3),
+    ('TX', 'Texas', range(750, 800), [210, 254, 325, 432, 512, 806, 817, 903, 915, 956], ['I-10', 'I-20', 'I-27', 'I-30', 'I-35', 'I-40', 'I-45'], 9),
+    ('UT', 'Utah', range(840, 848), [385, 435, 801], ['I-15', 'I-70', 'I-80', 'I-84'], 2),
+    ('VA', 'Virginia', range(220, 247), [276, 434, 540, 757, 804], ['I-64', 'I-77', 'I-81', 'I-85', 'I-95'], 3),
+    ('WY', 'Wyoming', range(820, 832), [307], ['I-25', 'I-80', 'I-90'], 1),
+]
+
+STATE_CENTERS = {
+    'AL': (32.8, -86.8), 'AZ': (34.2, -111.7), 'AR': (34.9, -92.4), 'CA': (36.8, -119.4),
+    'CO': (39.0, -105.5), 'FL': (28.6, -82.4), 'GA': (32.7, -83.4), 'IL': (40.0, -89.2),
+    'IN': (39.9, -86.3), 'KS': (38.5, -98.4), 'KY': (37.5, -85.3), 'LA': (31.0, -92.0),
+    'MO': (38.4, -92.5), 'MS': (32.7, -89.7), 'NM': (34.4, -106.1), 'NV': (39.3, -116.6),
+    'OH': (40.3, -82.8), 'OK': (35.6, -97.5), 'PA': (40.9, -77.8), 'TN': (35.9, -86.4),
+    'TX': (31.0, -99.3), 'UT': (39.3, -111.7), 'VA': (37.5, -78.8), 'WY': (43.0, -107.5),
+}
+
+# directory chain name, scraped Chain string, share
+CHAINS = [
+    ('Shell', 'shell', 0.14),
+    ('Chevron', 'chevron', 0.11),
+    ('Flying J', 'flying j', 0.065),
+    ('Pilot', 'pilot', 0.065),
+    ("Love's", 'loves travel stops country stores 416x416', 0.05),
+    ('Sinclair', 'sinclair oil .svg', 0.045),
+    ('Valero', 'valero', 0.045),
+    ('Texaco', 'texaco', 0.03),
+    ('TravelCenters', 'catscale3 + talogo', 0.02),
+    ('Conoco', 'conoco', 0.015),
+    ('Mobil', 'mobil oil type', 0.012),
+    ('Circle K', 'circle k', 0.008),
+    ('Exxon', 'exxon', 0.006),
+    ('Eleven', '7 eleven', 0.006),
+    ('Petro', 'petro', 0.01),
+    ('76', '76', 0.02),
+    ('Arco', 'arco', 0.01),
+    (None, 'ind dealer', 0.338),
+]
+
+NAME_WORDS = ['Holiday', 'Hills', 'Rocky', 'Eagle', 'Desert', 'Pine', 'Valley', 'Summit', 'Junction', 'Prairie',
+              'Red', 'River', 'Canyon', 'Mesa', 'Lone', 'Star', 'Golden', 'Silver', 'Bear', 'Creek', 'Oak',
+              'Cedar', 'Cactus', 'Buffalo', 'Mountain', 'Harvest', 'Liberty', 'Frontier', 'Sunset', 'Midway']
+NAME_SUFFIXES = ['Truck Stop', 'Travel Center', 'Travel Plaza', 'Fuel Stop', 'Auto Truck Plaza', 'Mini Mart',
+                 'Truck Plaza', 'Service Center', 'Fuel Center', 'Gas & Go']
+CITY_SYLLABLES = ['Cole', 'ville', 'Spring', 'field', 'Green', 'wood', 'Ash', 'land', 'Mill', 'ton', 'Brook',
+                  'dale', 'Fair', 'view', 'Lake', 'side', 'Oak', 'ridge', 'Kings', 'port', 'West', 'bury']
+STREET_NAMES = ['Main', 'Riggles', 'Washington', 'Seminole', 'Minerva', 'Gila Ridge', 'Rasor', 'Pioneer',
+                'Frontage', 'Industrial', 'Commerce', 'Airport', 'Railroad', 'Ranch', 'Depot']
+STREET_TYPES = ['St', 'Ave', 'Rd', 'Blvd', 'Dr', 'Hwy', 'Lane', 'Pkwy']
+
+
+def _zipf_weights(n, a=1.1):
+    w = 1.0 / np.arange(1, n + 1) ** a
+    return w / w.sum()
+
+
+def _format_phone(area, number, style):
+    digits = f"{area:03d}{number:07d}"
+    if style == 0:
+        return f"{digits[:3]}-{digits[3:6]}-{digits[6:]}"
+    if style == 1:
+        return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+    return f"{digits[:3]}.{digits[3:6]}.{digits[6:]}"
+
+
+def _state_places(zips_per_state=60, cities_per_state=40, seed=20250701):
+    """ZIP pool, ZIP popularity and ZIP -> city lookup for every state (same for every table)"""
+    rng = np.random.default_rng(seed)
+    places = {}
+    for abbr, name, prefixes, area_codes, interstates, _ in STATES:
+        prefixes = np.array(list(prefixes))
+        zips = np.unique(rng.choice(prefixes, zips_per_state) * 100 + rng.integers(1, 100, zips_per_state))
+        cities = np.array([
+            ''.join(rng.choice(CITY_SYLLABLES, 2)) for _ in range(cities_per_state)
+        ])
+        places[abbr] = {
+            'name': name,
+            'zips': np.char.zfill(zips.astype(str), 5),
+            'zip_weights': _zipf_weights(len(zips)),
+            'zip_city': rng.choice(cities, len(zips)),
+            'area_codes': np.array(area_codes),
+            'interstates': np.array(interstates),
+        }
+    return places
+
+
+def generate_scraped_reference(n_rows, seed=0):
+    """
+    Scraped truck-stop reference table in the Add_2_scraped.csv / 4_batch_*.csv layout
+
+    Args:
+        n_rows: Number of reference stops
+        seed: Random seed
+
+    Returns:
+        DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    places = _state_places()
+
+    abbrs = np.array([s[0] for s in STATES])
+    state_w = np.array([s[5] for s in STATES], dtype=float)
+    state = rng.choice(abbrs, n_rows, p=state_w / state_w.sum())
+
+    postal = np.empty(n_rows, dtype=object)
+    city = np.empty(n_rows, dtype=object)
+    highway = np.empty(n_rows, dtype=object)
+    area = np.empty(n_rows, dtype=np.int64)
+    for abbr in abbrs:
+        mask = state == abbr
+        k = int(mask.sum())
+        if not k:
+            continue
+        p = places[abbr]
+        zi = rng.choice(len(p['zips']), k, p=p['zip_weights'])
+        postal[mask] = p['zips'][zi]
+        city[mask] = np.char.upper(p['zip_city'][zi].astype(str))
+        highway[mask] = rng.choice(p['interstates'], k)
+        area[mask] = rng.choice(p['area_codes'], k)
+
+    # Exits: mostly plain numbers, some with letter suffixes, some on US/state highways without an exit
+    exit_num = np.minimum(rng.lognormal(4.3, 0.9, n_rows).astype(int) + 1, 450)
+    exit_str = exit_num.astype(str).astype(object)
+    suffix = rng.random(n_rows)
+    exit_str[suffix < 0.06] = exit_str[suffix < 0.06] + '-B'
+    exit_str[(suffix >= 0.06) & (suffix < 0.10)] = exit_str[(suffix >= 0.06) & (suffix < 0.10)] + '-A'
+    no_exit = rng.random(n_rows) < 0.2
+    exit_str[no_exit] = None
+    highway[no_exit] = 'US ' + rng.integers(2, 400, int(no_exit.sum())).astype(str).astype(object)
+
+    chain_w = np.array([c[2] for c in CHAINS])
+    chain_idx = rng.choice(len(CHAINS), n_rows, p=chain_w / chain_w.sum())
+    chain_label = np.array([c[0] or '' for c in CHAINS], dtype=object)[chain_idx]
+    chain_scraped = np.array([c[1] for c in CHAINS], dtype=object)[chain_idx]
+
+    words = np.array(NAME_WORDS, dtype=object)
+    suffixes = np.array(NAME_SUFFIXES, dtype=object)
+    indep_name = words[rng.integers(0, len(words), n_rows)] + ' ' + suffixes[rng.integers(0, len(suffixes), n_rows)]
+    chain_name = chain_label + ' ' + np.array(['TRAVEL CENTER', '#', 'TRAVEL PLAZA', ''], dtype=object)[rng.integers(0, 4, n_rows)]
+    chain_name = np.where(chain_name.astype(str) == chain_label.astype(str) + ' #', chain_label + ' #' + rng.integers(1, 999, n_rows).astype(str), chain_name)
+    name = np.where(chain_label == '', indep_name, chain_name)
+    name = pd.Series(name).str.strip().str.upper()
+
+    numbers = rng.integers(2_000_000, 9_999_999, n_rows)
+    phone = [f"{_format_phone(a, n, 0)} (TRAVEL CENTER)" for a, n in zip(area, numbers)]
+    fax = [_format_phone(a, n + 1, 0) if r < 0.5 else None for a, n, r in zip(area, numbers, rng.random(n_rows))]
+
+    street = (rng.integers(10, 99999, n_rows).astype(str).astype(object) + ' '
+              + np.array(STREET_NAMES, dtype=object)[rng.integers(0, len(STREET_NAMES), n_rows)] + ' '
+              + np.array(STREET_TYPES, dtype=object)[rng.integers(0, len(STREET_TYPES), n_rows)])
+
+    centers = np.array([STATE_CENTERS[s] for s in state])
+    lat = np.round(centers[:, 0] + rng.normal(0, 1.2, n_rows), 6)
+    lon = np.round(centers[:, 1] + rng.normal(0, 1.6, n_rows), 6)
+
+    state_ids = {s[0]: i + 1 for i, s in enumerate(STATES)}
+    location_ids = rng.permutation(n_rows) + 100
+
+    return pd.DataFrame({
+        'state_id': [state_ids[s] for s in state],
+        'state': [places[s]['name'] for s in state],
+        'name': name,
+        'full_url': [f"https://www.truckstopsandservices.com/location_details.php?id={i}" for i in location_ids],
+        'stop_type': np.where(rng.random(n_rows) < 0.8, 'Trucker', 'RVer'),
+        'Chain': chain_scraped,
+        'Latitude': lat,
+        'Longitude': lon,
+        'Highway': highway,
+        'Exit': exit_str,
+        'Street Address': pd.Series(street).str.upper(),
+        'City': city,
+        'State': state,
+        'Postal Code': postal,
+        'Phone': phone,
+        'Phone 2': None,
+        'Fax': fax,
+        '_chain_label': chain_label,
+    })
+
+
+def _typo_digits(values, rate, rng):
+    """Replace one digit in a fraction of the strings (OCR misreads)"""
+    values = values.copy()
+    hit = np.flatnonzero(rng.random(len(values)) < rate)
+    for i in hit:
+        s = values[i]
+        if not isinstance(s, str) or not s:
+            continue
+        digit_pos = [j for j, ch in enumerate(s) if ch.isdigit()]
+        if digit_pos:
+            j = digit_pos[rng.integers(0, len(digit_pos))]
+            values[i] = s[:j] + str(rng.integers(0, 10)) + s[j + 1:]
+    return values
+
+
+def generate_ocr_directory(n_rows, reference=None, seed=0, match_share=0.75, zip_typo_rate=0.05,
+                           phone_typo_rate=0.03, years=(2006, 2007, 2008, 2014, 2015, 2016)):
+    """
+    OCR directory table in the Add_2.csv layout
+
+    Args:
+        n_rows: Number of directory rows
+        reference: Output of generate_scraped_reference (generated at n_rows // 10 if None)
+        seed: Random seed
+        match_share: Share of rows that are noisy copies of a reference stop
+        zip_typo_rate: Share of ZIP codes with one misread digit
+        phone_typo_rate: Share of phone numbers with one misread digit
+        years: Directory editions to spread rows over
+
+    Returns:
+        DataFrame
+    """
+    rng = np.random.default_rng(seed + 7)
+    if reference is None:
+        reference = generate_scraped_reference(max(1000, n_rows // 10), seed=seed)
+
+    from_ref = rng.random(n_rows) < match_share
+    src = reference.iloc[rng.integers(0, len(reference), n_rows)].reset_index(drop=True)
+    # Non-matching rows still look like real stops: take them from a second, unseen reference
+    n_fresh = int((~from_ref).sum())
+    if n_fresh:
+        fresh = generate_scraped_reference(n_fresh, seed=seed + 99)
+        src.loc[~from_ref, :] = fresh[src.columns].to_numpy()
+
+    zip_code = _typo_digits(src['Postal Code'].to_numpy(dtype=object), zip_typo_rate, rng)
+
+    phone_digits = src['Phone'].str.extract(r'^([\d-]+)')[0].to_numpy(dtype=object)
+    phone = _typo_digits(phone_digits, phone_typo_rate, rng)
+    phone[rng.random(n_rows) < 0.08] = None
+
+    exit_number = src['Exit'].str.extract(r'^(\d+)')[0].to_numpy(dtype=object)
+    compound = (rng.random(n_rows) < 0.04) & pd.notna(exit_number)
+    exit_number_2 = np.full(n_rows, None, dtype=object)
+    exit_number_2[compound] = [str(int(e) + int(d)) for e, d in zip(exit_number[compound], rng.integers(1, 6, int(compound.sum())))]
+
+    address_type = np.where(pd.notna(exit_number), 'Exit', np.where(rng.random(n_rows) < 0.5, 'Proper', 'empty'))
+
+    chain = src['_chain_label'].replace('', None).to_numpy(dtype=object)
+    label = src['name'].str.title().to_numpy(dtype=object)
+    label_variant = rng.random(n_rows)
+    with_chain = (label_variant < 0.3) & pd.notna(chain)
+    label[with_chain] = label[with_chain] + ' ( ' + chain[with_chain] + ' )'
+
+    city = src['City'].str.title().to_numpy(dtype=object)
+    main_road = src['Highway'].to_numpy(dtype=object)
+    exit_text = np.where(pd.notna(exit_number), main_road + ' Exit ' + pd.Series(exit_number).fillna('').to_numpy(dtype=object), src['Street Address'].str.title())
+    exit_text[compound] = (main_road[compound] + ' Exit ' + exit_number[compound] + ' EB/'
+                           + exit_number_2[compound] + ' WB')
+
+    return pd.DataFrame({
+        'clean_line1': city + ' , ' + pd.Series(zip_code).fillna('').to_numpy(dtype=object) + ' ' + label,
+        'clean_line2': pd.Series(phone).fillna('').to_numpy(dtype=object) + ' ' + exit_text,
+        'city': city,
+        'zip_code': zip_code,
+        'label': label,
+        'phone': phone,
+        'year': rng.choice(np.array(years), n_rows),
+        'major_city': city,
+        'state': src['State'].to_numpy(dtype=object),
+        'chain': chain,
+        'address_standardized_OFF_parenthesis': exit_text,
+        'Address_Type': address_type,
+        'Exit_Number': exit_number,
+        'Exit_From_Address': exit_number,
+        'Flagged': False,
+        'Flag_Reason': None,
+        'Main_Road': main_road,
+        'Secondary_Road': None,
+        'Exit_Number_2': exit_number_2,
+        'Tertiary_Road': None,
+    })
+
+
+def to_combined_frame(directory, reference=None):
+    """
+    Shape a directory table like the Matching_WebScrape combined frame before matching:
+    every column prefixed with OCR_, empty Scraped_ columns for the reference fields,
+    and every row still "No matches found"
+    """
+    combined = directory.add_prefix('OCR_')
+    combined = combined.rename(columns={'OCR_Flagged': 'Flagged', 'OCR_Flag_Reason': 'Flag_Reason'})
+    if reference is not None:
+        for col in reference_table(reference).columns:
+            combined[f"Scraped_{col}"] = None
+    combined['Flagged'] = True
+    combined['Flag_Reason'] = "No matches found"
+    return combined
+
+
+def reference_table(reference):
+    """Reference table without the generator's helper columns"""
+    return reference.drop(columns=[c for c in reference.columns if c.startswith('_')])
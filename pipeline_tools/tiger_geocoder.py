@@ -0,0 +1,356 @@
+"""
+Local street-address geocoder built from Census TIGER/Line address ranges.
+
+Every "traditional" street address in Test_Code/API_Attempt/2.ipynb goes to the
+Google Geocoding API.  TIGER/Line ADDRFEAT (or EDGES) files already carry, for
+every street segment, the house-number range on each side, the ZIP on each side
+and the segment geometry.  TigerStore keeps those ranges in a table keyed by
+(normalized street name, ZIP) and places a house number by linear interpolation
+along the segment, which is how Google's RANGE_INTERPOLATED results work too.
+Addresses that miss the local store fall back to the existing Google function.
+The street address and ZIP always come from the row's own address/zip_code
+columns: the build_address_string value starts with the chain and label, and a
+label like "76 Truck Stop" reads as house 76 on TRUCK STOP.
+
+    store = TigerStore.from_shapefiles(glob.glob(r'C:\\...\\tl_2019_*_addrfeat.shp'))
+    store.save(r'C:\\Users\\clint\\Desktop\\Geocoding_Task\\tiger_store')
+
+    store = TigerStore.load(r'C:\\Users\\clint\\Desktop\\Geocoding_Task\\tiger_store')
+    geocode = make_geocoder(store, fallback=geocode_address)      # row -> the geocode_address tuple
+    lat, lng, precision, match_type, formatted_address, place_id = geocode(row)
+
+    results = geocode_frame(df, store, fallback=geocode_address)  # batch version
+"""
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# USPS Publication 28 abbreviations for the tokens that show up in directory addresses
+STREET_ABBREVIATIONS = {
+    'STREET': 'ST', 'AVENUE': 'AVE', 'AV': 'AVE', 'ROAD': 'RD', 'DRIVE': 'DR', 'BOULEVARD': 'BLVD',
+    'HIGHWAY': 'HWY', 'HIWAY': 'HWY', 'PARKWAY': 'PKWY', 'LANE': 'LN', 'COURT': 'CT', 'PLACE': 'PL',
+    'TERRACE': 'TER', 'CIRCLE': 'CIR', 'TRAIL': 'TRL', 'FREEWAY': 'FWY', 'EXPRESSWAY': 'EXPY',
+    'TURNPIKE': 'TPKE', 'PIKE': 'PIKE', 'SQUARE': 'SQ', 'CROSSING': 'XING', 'FRONTAGE': 'FRONTAGE',
+    'NORTH': 'N', 'SOUTH': 'S', 'EAST': 'E', 'WEST': 'W',
+    'NORTHEAST': 'NE', 'NORTHWEST': 'NW', 'SOUTHEAST': 'SE', 'SOUTHWEST': 'SW',
+    'INTERSTATE': 'I', 'ROUTE': 'RTE', 'RT': 'RTE', 'STATE': 'STATE', 'COUNTY': 'CO', 'MOUNT': 'MT',
+    'SAINT': 'ST', 'FORT': 'FT',
+}
+
+UNIT_PATTERN = re.compile(r'\b(?:STE|SUITE|UNIT|APT|BLDG|#)\s*\S*$')
+HOUSE_NUMBER_PATTERN = re.compile(r'^\s*(\d+)[A-Z]?(?:-\d+)?\s+(.+)$')
+
+# TIGER ADDRFEAT / EDGES column names
+TIGER_COLUMNS = {
+    'street': 'FULLNAME',
+    'left_from': 'LFROMHN', 'left_to': 'LTOHN', 'right_from': 'RFROMHN', 'right_to': 'RTOHN',
+    'left_zip': 'ZIPL', 'right_zip': 'ZIPR', 'id': 'TLID',
+}
+
+RESULT_COLUMNS = ['latitude', 'longitude', 'precision_level', 'match_type',
+                  'google_formatted_address', 'place_id', 'geocoding_status', 'geocoder_source']
+
+
+def normalize_street(street):
+    """Uppercase street name with USPS abbreviations, no punctuation or unit designators"""
+    if street is None or (not isinstance(street, str) and pd.isna(street)):
+        return ''
+    text = re.sub(r'[^A-Z0-9# ]', ' ', str(street).upper())
+    text = UNIT_PATTERN.sub('', ' '.join(text.split())).strip()
+    return ' '.join(STREET_ABBREVIATIONS.get(word, word) for word in text.split())
+
+
+def parse_street_address(address):
+    """
+    Split "1234 N Main Street" into (1234, "N MAIN ST")
+
+    Returns:
+        tuple (house_number or None, normalized street)
+    """
+    if address is None or (not isinstance(address, str) and pd.isna(address)):
+        return None, ''
+    match = HOUSE_NUMBER_PATTERN.match(str(address).upper())
+    if not match:
+        return None, normalize_street(address)
+    return int(match.group(1)), normalize_street(match.group(2))
+
+
+def _zip5(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    digits = re.sub(r'\D', '', str(value).split('.')[0])
+    return digits[:5].zfill(5) if digits else None
+
+
+class TigerStore:
+    """Address ranges (one row per segment side) plus segment geometry"""
+
+    def __init__(self, ranges, vertex_offsets, vertices):
+        """
+        Args:
+            ranges: DataFrame with street_key, zip, from_hn, to_hn, parity, segment,
+                street_name and tlid (sorted by street_key, zip)
+            vertex_offsets: int64 array; segment s uses vertices[offsets[s]:offsets[s+1]]
+            vertices: float64 array of shape (n, 2) with (lon, lat)
+        """
+        self.ranges = ranges.sort_values(['street_key', 'zip', 'low_hn']).reset_index(drop=True)
+        self.vertex_offsets = np.asarray(vertex_offsets, dtype=np.int64)
+        self.vertices = np.asarray(vertices, dtype=np.float64)
+        self._cumulative = None
+
+    @classmethod
+    def from_edges(cls, edges, geometry_column='coords', columns=TIGER_COLUMNS):
+        """
+        Build from a table of TIGER segments
+
+        Args:
+            edges: DataFrame with the TIGER range columns and one coordinate list
+                [(lon, lat), ...] per segment in geometry_column
+            geometry_column: Column holding the coordinate lists
+            columns: Mapping of logical names to TIGER column names
+        """
+        offsets = [0]
+        vertex_chunks = []
+        for coords in edges[geometry_column]:
+            points = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+            vertex_chunks.append(points)
+            offsets.append(offsets[-1] + len(points))
+        vertices = np.concatenate(vertex_chunks) if vertex_chunks else np.zeros((0, 2))
+
+        street_keys = edges[columns['street']].map(normalize_street).to_numpy(dtype=object)
+        tlids = edges[columns['id']].to_numpy() if columns['id'] in edges.columns else np.arange(len(edges))
+        sides = []
+        for side in ('left', 'right'):
+            from_hn = pd.to_numeric(edges[columns[f'{side}_from']], errors='coerce').to_numpy()
+            to_hn = pd.to_numeric(edges[columns[f'{side}_to']], errors='coerce').to_numpy()
+            zips = edges[columns[f'{side}_zip']].map(_zip5).to_numpy(dtype=object)
+            valid = ~(np.isnan(from_hn) | np.isnan(to_hn)) & pd.notna(zips) & (street_keys != '')
+            sides.append(pd.DataFrame({
+                'street_key': street_keys[valid],
+                'zip': zips[valid],
+                'from_hn': from_hn[valid].astype(np.int64),
+                'to_hn': to_hn[valid].astype(np.int64),
+                'segment': np.flatnonzero(valid).astype(np.int64),
+                'street_name': edges[columns['street']].to_numpy(dtype=object)[valid],
+                'tlid': tlids[valid],
+                'side': side[0].upper(),
+            }))
+        ranges = pd.concat(sides, ignore_index=True)
+        ranges['low_hn'] = ranges[['from_hn', 'to_hn']].min(axis=1)
+        ranges['high_hn'] = ranges[['from_hn', 'to_hn']].max(axis=1)
+        ranges['parity'] = (ranges['from_hn'] % 2).astype(np.int8)
+        print(f"✅ TIGER store: {len(edges)} segments, {len(ranges)} address ranges, "
+              f"{ranges['street_key'].nunique()} street names")
+        return cls(ranges, offsets, vertices)
+
+    @classmethod
+    def from_shapefiles(cls, paths):
+        """Read TIGER/Line ADDRFEAT or EDGES shapefiles (needs geopandas)"""
+        import geopandas as gpd
+
+        frames = []
+        for path in paths:
+            gdf = gpd.read_file(path)
+            gdf = gdf[gdf.geometry.notna()]
+            gdf['coords'] = [list(geom.coords) if geom.geom_type == 'LineString' else list(geom.geoms[0].coords)
+                             for geom in gdf.geometry]
+            frames.append(pd.DataFrame(gdf.drop(columns='geometry')))
+            print(f"  Loaded {len(gdf)} segments from {os.path.basename(path)}")
+        return cls.from_edges(pd.concat(frames, ignore_index=True))
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.ranges.to_parquet(os.path.join(directory, 'ranges.parquet'), index=False)
+        np.save(os.path.join(directory, 'vertex_offsets.npy'), self.vertex_offsets)
+        np.save(os.path.join(directory, 'vertices.npy'), self.vertices)
+        print(f"💾 TIGER store saved to: {directory}")
+
+    @classmethod
+    def load(cls, directory):
+        return cls(pd.read_parquet(os.path.join(directory, 'ranges.parquet')),
+                   np.load(os.path.join(directory, 'vertex_offsets.npy')),
+                   np.load(os.path.join(directory, 'vertices.npy')))
+
+    def _cumulative_lengths(self):
+        """Running planar length over all vertices; flat across segment boundaries"""
+        if self._cumulative is None:
+            points = self.vertices
+            if len(points) < 2:
+                self._cumulative = np.zeros(len(points))
+                return self._cumulative
+            # Longitude scaled by cos(latitude) is plenty for one street segment
+            scale = np.cos(np.radians((points[1:, 1] + points[:-1, 1]) / 2))
+            steps = np.hypot(np.diff(points[:, 0]) * scale, np.diff(points[:, 1]))
+            steps[self.vertex_offsets[1:-1] - 1] = 0.0
+            self._cumulative = np.concatenate([[0.0], np.cumsum(steps)])
+        return self._cumulative
+
+    def interpolate(self, segments, fractions):
+        """
+        Points at the given fraction (0-1) of each segment's length
+
+        Returns:
+            tuple of arrays (lat, lon)
+        """
+        segments = np.asarray(segments, dtype=np.int64)
+        fractions = np.clip(np.asarray(fractions, dtype=float), 0, 1)
+        cumulative = self._cumulative_lengths()
+        first = self.vertex_offsets[segments]
+        last = self.vertex_offsets[segments + 1] - 1
+        start, end = cumulative[first], cumulative[last]
+        target = start + fractions * (end - start)
+
+        i = np.searchsorted(cumulative, target, side='right') - 1
+        i = np.clip(i, first, np.maximum(last - 1, first))
+        j = np.minimum(i + 1, last)
+        step = cumulative[j] - cumulative[i]
+        t = np.divide(target - cumulative[i], step, out=np.zeros_like(target), where=step > 0)
+        lon = self.vertices[i, 0] + t * (self.vertices[j, 0] - self.vertices[i, 0])
+        lat = self.vertices[i, 1] + t * (self.vertices[j, 1] - self.vertices[i, 1])
+        return lat, lon
+
+    def geocode_batch(self, house_numbers, streets, zips):
+        """
+        Interpolate many addresses at once
+
+        Args:
+            house_numbers: Ints (None/NaN for no number)
+            streets: Normalized street names (normalize_street output)
+            zips: 5-digit ZIP strings
+
+        Returns:
+            DataFrame aligned with the inputs: latitude, longitude, formatted_address, tlid
+            (NaN where no range contains the address)
+        """
+        queries = pd.DataFrame({
+            'query': np.arange(len(streets)),
+            'house_number': pd.to_numeric(pd.Series(list(house_numbers)), errors='coerce'),
+            'street_key': list(streets),
+            'zip': [_zip5(z) for z in zips],
+        })
+        out = pd.DataFrame({'latitude': np.nan, 'longitude': np.nan, 'formatted_address': None, 'tlid': None},
+                           index=np.arange(len(queries)))
+        queries = queries.dropna(subset=['house_number', 'zip'])
+        queries = queries[queries['street_key'] != '']
+        if queries.empty:
+            return out
+        queries['house_number'] = queries['house_number'].astype(np.int64)
+
+        candidates = queries.merge(self.ranges, on=['street_key', 'zip'], how='inner')
+        candidates = candidates[
+            (candidates['house_number'] >= candidates['low_hn'])
+            & (candidates['house_number'] <= candidates['high_hn'])
+            & ((candidates['house_number'] % 2) == candidates['parity'])
+        ]
+        # Narrowest containing range wins
+        candidates = candidates.assign(width=candidates['high_hn'] - candidates['low_hn'])
+        best = candidates.sort_values(['query', 'width']).drop_duplicates('query')
+
+        span = (best['to_hn'] - best['from_hn']).to_numpy(dtype=float)
+        fraction = np.where(span == 0, 0.5, (best['house_number'] - best['from_hn']).to_numpy(dtype=float) / np.where(span == 0, 1, span))
+        lat, lon = self.interpolate(best['segment'].to_numpy(), fraction)
+        rows = best['query'].to_numpy()
+        out.loc[rows, 'latitude'] = lat
+        out.loc[rows, 'longitude'] = lon
+        out.loc[rows, 'formatted_address'] = (best['house_number'].astype(str) + ' ' + best['street_name'].astype(str)
+                                              + ', ' + best['zip'].astype(str)).to_numpy()
+        out.loc[rows, 'tlid'] = best['tlid'].to_numpy()
+        return out
+
+    def geocode(self, address, zip_code):
+        """
+        Single-address version with the geocode_address return tuple
+
+        Args:
+            address: Street address ("1234 N Main St"), not the build_address_string value
+            zip_code: ZIP
+        """
+        house_number, street = parse_street_address(address)
+        zip_code = _zip5(zip_code)
+        if house_number is None or not zip_code:
+            return None, None, None, "TIGER: no house number or ZIP", None, None
+        row = self.geocode_batch([house_number], [street], [zip_code]).iloc[0]
+        if pd.isna(row['latitude']):
+            return None, None, None, "TIGER: no matching address range", None, None
+        return row['latitude'], row['longitude'], 'RANGE_INTERPOLATED', 'TIGER', row['formatted_address'], f"tiger:{row['tlid']}"
+
+
+def make_geocoder(store, fallback=None, address_column='address', zip_column='zip_code',
+                  fallback_column='address_for_geocoding'):
+    """
+    geocode_address replacement for a row: TIGER first, then fallback on a miss
+
+    Args:
+        store: TigerStore
+        fallback: Google function with the geocode_address signature, or None
+        address_column: Street address column read by TIGER
+        zip_column: ZIP column read by TIGER
+        fallback_column: Column of address strings passed to fallback (build_address_string output)
+
+    Returns:
+        function(row) -> (lat, lng, precision, match_type, formatted_address, place_id)
+    """
+    def geocode(row):
+        result = store.geocode(row.get(address_column), row.get(zip_column))
+        if result[0] is not None or fallback is None:
+            return result
+        return fallback(row.get(fallback_column))
+    return geocode
+
+
+def geocode_frame(df, store, address_column='address', zip_column='zip_code', fallback=None,
+                  fallback_column='address_for_geocoding', delay=0.2):
+    """
+    Batch geocode a frame: every parsable street address is interpolated locally in
+    one pass; only the misses are sent to fallback (e.g. geocode_address), one by one
+
+    The street address and ZIP are read from their own columns rather than picked
+    out of the build_address_string value, where a label such as "76 Truck Stop"
+    would be taken for the house number and street.
+
+    Args:
+        df: Rows with street address and ZIP columns
+        store: TigerStore
+        address_column: Street address column ("1234 N Main St")
+        zip_column: ZIP column
+        fallback: Google function with the geocode_address signature, or None
+        fallback_column: Column of address strings passed to fallback (build_address_string output)
+        delay: Seconds between fallback calls
+
+    Returns:
+        DataFrame indexed like df with RESULT_COLUMNS
+    """
+    import time
+
+    parsed = [parse_street_address(a) for a in df[address_column]]
+    local = store.geocode_batch([p[0] for p in parsed], [p[1] for p in parsed], df[zip_column].tolist())
+    local.index = df.index
+
+    results = pd.DataFrame(index=df.index, columns=RESULT_COLUMNS, dtype=object)
+    hit = local['latitude'].notna()
+    results.loc[hit, 'latitude'] = local.loc[hit, 'latitude']
+    results.loc[hit, 'longitude'] = local.loc[hit, 'longitude']
+    results.loc[hit, 'precision_level'] = 'RANGE_INTERPOLATED'
+    results.loc[hit, 'match_type'] = 'TIGER'
+    results.loc[hit, 'google_formatted_address'] = local.loc[hit, 'formatted_address']
+    results.loc[hit, 'place_id'] = 'tiger:' + local.loc[hit, 'tlid'].astype(str)
+    results.loc[hit, 'geocoding_status'] = 'SUCCESS'
+    results.loc[hit, 'geocoder_source'] = 'tiger'
+    print(f"✅ TIGER geocoded {hit.sum()} of {len(df)} addresses locally")
+
+    misses = df.index[~hit]
+    if fallback is None:
+        results.loc[misses, 'geocoding_status'] = 'FAILED'
+        return results
+
+    print(f"🌐 Sending {len(misses)} misses to the fallback geocoder")
+    for idx in misses:
+        lat, lng, precision, match_type, formatted_address, place_id = fallback(df.at[idx, fallback_column])
+        results.loc[idx, RESULT_COLUMNS] = [lat, lng, precision, match_type, formatted_address, place_id,
+                                            'SUCCESS' if lat is not None and lng is not None else 'FAILED', 'google']
+        if delay:
+            time.sleep(delay)
+    return results
@@ -0,0 +1,318 @@
+"""
+State-partitioned Parquet store behind Manual_Verifier.py.
+
+The verifier used to read all of 8.csv / Manual_Verified.csv with pd.read_csv
+before the window appeared, then throw away every state but four.  The store
+converts the CSV once (streamed in blocks, every column as a string, so nothing
+has to fit in memory) into a hive-partitioned dataset, one directory per
+OCR_state, with a _row_id column (CSV row position), a _record_key column
+(hash of the row's OCR_/Scraped_ columns) and a manifest of per-state
+Flag_Category / Flag_Reason counts.  Opening the verifier then reads only the
+selected states and the few columns the lists and filters need; the comparison
+columns of a record are fetched when that record is shown.  Verification
+results are saved to a small verifications.parquet instead of rewriting the CSV,
+keyed by _record_key so a rebuild from an edited CSV (rows inserted, removed or
+re-sorted) keeps every verdict on its own record.
+
+    store = VerifierStore.open(csv_path, store_dir)          # rebuilds when the CSV is newer
+    df = store.load(states=['CA', 'UT', 'NV', 'AZ'])          # _row_id index, eager columns only
+    record = store.record(df.index[0], df['OCR_state'].iloc[0])
+    store.save_verifications(df)
+"""
+
+import json
+import os
+import shutil
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+VERIFICATION_COLUMNS = ['Manually_Verified', 'Manual_Verification_Result', 'Manual_Verification_Reason']
+VERIFICATION_DEFAULTS = {'Manually_Verified': 'no', 'Manual_Verification_Result': '', 'Manual_Verification_Reason': ''}
+
+# Columns the verifier filters, lists and summarizes on; everything else is loaded per record
+EAGER_COLUMNS = ['OCR_state', 'Flag_Category', 'Flag_Reason', 'OCR_label', 'Scraped_name'] + VERIFICATION_COLUMNS
+
+PARTITION_COLUMN = 'OCR_state'
+ROW_ID = '_row_id'
+RECORD_KEY = '_record_key'
+KEY_PREFIXES = ('OCR_', 'Scraped_')
+ROWS_PER_GROUP = 2_000
+
+
+def key_columns(header):
+    """Columns that identify a record: its OCR_ and Scraped_ fields (every other non-verification column if none)"""
+    columns = [c for c in header if c.startswith(KEY_PREFIXES) and c not in VERIFICATION_COLUMNS]
+    return columns or [c for c in header if c not in VERIFICATION_COLUMNS and c not in (ROW_ID, RECORD_KEY)]
+
+
+def record_keys(frame, columns, seen):
+    """
+    Content-derived keys for the rows of frame, in file order
+
+    Identical rows get the same hash, so the n-th occurrence is suffixed with n;
+    seen carries the occurrence counts across batches.
+    """
+    present = [c for c in columns if c in frame.columns]
+    values = frame[present].astype(object).where(frame[present].notna(), '').astype(str)
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+    keys = []
+    for h in hashes:
+        n = seen.get(h, 0)
+        seen[h] = n + 1
+        keys.append(f"{int(h):016x}-{n}")
+    return keys
+
+
+class VerifierStore:
+    """Hive-partitioned Parquet copy of the verifier's CSV plus a verification side file"""
+
+    def __init__(self, store_dir, cache_size=256):
+        import pyarrow.dataset as ds
+
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, 'manifest.json'), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.dataset = ds.dataset(os.path.join(store_dir, 'data'), format='parquet', partitioning='hive')
+        self.columns = self.manifest['columns']
+        self._records = OrderedDict()
+        self._cache_size = cache_size
+        self._keys = {}
+
+    @classmethod
+    def open(cls, csv_path, store_dir, partition_column=PARTITION_COLUMN):
+        """Open the store for csv_path, building it first if missing, older than the CSV or without record keys"""
+        manifest_path = os.path.join(store_dir, 'manifest.json')
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            if (manifest.get('source') == os.path.abspath(csv_path) and 'key_columns' in manifest
+                    and manifest.get('source_mtime', 0) >= os.path.getmtime(csv_path)):
+                return cls(store_dir)
+        build_store(csv_path, store_dir, partition_column)
+        return cls(store_dir)
+
+    @property
+    def verifications_path(self):
+        return os.path.join(self.store_dir, 'verifications.parquet')
+
+    def states(self):
+        return sorted(self.manifest['partitions'])
+
+    def counts(self, column, states=None):
+        """Value counts of Flag_Category / Flag_Reason from the manifest, without reading data"""
+        totals = {}
+        for state, stats in self.manifest['partitions'].items():
+            if states is None or state in states:
+                for value, n in stats.get(column, {}).items():
+                    totals[value] = totals.get(value, 0) + n
+        return totals
+
+    def load(self, states=None, columns=EAGER_COLUMNS):
+        """
+        Rows of the given states with only the given columns
+
+        Returns:
+            DataFrame indexed by _row_id in CSV row order; verification columns are plain
+            object columns (with any saved verifications applied), the rest categorical
+        """
+        import pyarrow.dataset as ds
+
+        partition = self.manifest['partition_column']
+        available = [c for c in dict.fromkeys([partition] + list(columns)) if c in self.columns or c == partition]
+        row_filter = ds.field(partition).isin(list(states)) if states is not None else None
+        table = self.dataset.to_table(columns=[ROW_ID, RECORD_KEY] + available, filter=row_filter)
+        # Partitions come back in directory order, not CSV order
+        df = table.to_pandas().set_index(ROW_ID).sort_index(kind='stable')
+        df.index.name = None
+        keys = df.pop(RECORD_KEY)
+        self._keys.update(zip(keys.index, keys.to_numpy()))
+
+        for col in df.columns:
+            if col not in VERIFICATION_COLUMNS:
+                df[col] = df[col].astype('category')
+        for col in VERIFICATION_COLUMNS:
+            if col in columns:
+                df[col] = df[col].astype(object).where(df[col].notna(), VERIFICATION_DEFAULTS[col]) if col in df else VERIFICATION_DEFAULTS[col]
+
+        if os.path.exists(self.verifications_path):
+            saved = pd.read_parquet(self.verifications_path).drop_duplicates(RECORD_KEY, keep='last').set_index(RECORD_KEY)
+            row_ids = pd.Series(keys.index, index=keys.to_numpy())
+            saved = saved[saved.index.isin(row_ids.index)]
+            targets = row_ids.loc[saved.index].to_numpy()
+            for col in VERIFICATION_COLUMNS:
+                if col in df.columns and col in saved.columns:
+                    df.loc[targets, col] = saved[col].to_numpy()
+        return df
+
+    def record(self, row_id, state=None):
+        """
+        Every column of one row (cached), read from that row's partition only
+
+        Returns:
+            dict of column -> value (None for empty cells)
+        """
+        import pyarrow.dataset as ds
+
+        if row_id in self._records:
+            self._records.move_to_end(row_id)
+            return self._records[row_id]
+        row_filter = ds.field(ROW_ID) == int(row_id)
+        if state is not None:
+            row_filter = (ds.field(self.manifest['partition_column']) == state) & row_filter
+        rows = self.dataset.to_table(filter=row_filter).to_pylist()
+        record = rows[0] if rows else {}
+        self._records[row_id] = record
+        if len(self._records) > self._cache_size:
+            self._records.popitem(last=False)
+        return record
+
+    def save_verifications(self, df):
+        """
+        Write the verification columns of df (indexed by _row_id, as returned by load),
+        keyed by record so they survive rebuilds; saved rows of other states are kept
+        """
+        current = df[VERIFICATION_COLUMNS].copy()
+        current.index.name = ROW_ID
+        current = current.reset_index()
+        current.insert(0, RECORD_KEY, [self._keys[row_id] for row_id in current[ROW_ID]])
+        if os.path.exists(self.verifications_path):
+            previous = pd.read_parquet(self.verifications_path)
+            current = pd.concat([previous[~previous[RECORD_KEY].isin(current[RECORD_KEY])], current], ignore_index=True)
+        current = current.astype({col: str for col in VERIFICATION_COLUMNS})
+        tmp_path = self.verifications_path + '.tmp'
+        current.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.verifications_path)
+
+    def export_csv(self, path):
+        """Full table with the saved verifications applied, in the CSV layout the verifier used to write"""
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+
+        table = self.dataset.to_table().sort_by(ROW_ID)
+        verified = self.load(states=None, columns=VERIFICATION_COLUMNS).sort_index()
+        header = [c for c in self.columns if c not in (ROW_ID, RECORD_KEY)]
+        for col in VERIFICATION_COLUMNS:
+            values = pa.array(verified[col].astype(object).tolist(), pa.string())
+            if col in table.column_names:
+                table = table.set_column(table.column_names.index(col), col, values)
+            else:
+                table = table.append_column(col, values)
+                header.append(col)
+        pacsv.write_csv(table.select(header), path)
+        print(f"💾 Exported {table.num_rows} rows to {path}")
+
+
+def build_store(csv_path, store_dir, partition_column=PARTITION_COLUMN, block_size=1 << 24):
+    """
+    Convert the verifier CSV into a state-partitioned Parquet dataset
+
+    Args:
+        csv_path: 8.csv or Manual_Verified.csv
+        store_dir: Output directory (data/ partitions, manifest.json)
+        partition_column: Column to partition by
+        block_size: CSV bytes parsed per streamed block
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+    import pyarrow.dataset as ds
+
+    start = time.perf_counter()
+    header = list(pd.read_csv(csv_path, nrows=0).columns)
+    reader = pacsv.open_csv(
+        csv_path,
+        read_options=pacsv.ReadOptions(block_size=block_size),
+        convert_options=pacsv.ConvertOptions(column_types={c: pa.string() for c in header}, strings_can_be_null=True),
+    )
+    partitions = {}
+    offset = 0
+    identity = key_columns(header)
+    seen = {}
+
+    def batches():
+        nonlocal offset
+        for batch in reader:
+            keys = record_keys(batch.select(identity).to_pandas(), identity, seen)
+            batch = pa.RecordBatch.from_arrays(
+                list(batch.columns) + [pa.array(range(offset, offset + batch.num_rows), pa.int64()),
+                                       pa.array(keys, pa.string())],
+                names=list(batch.schema.names) + [ROW_ID, RECORD_KEY])
+            offset += batch.num_rows
+            summary_columns = [c for c in (partition_column, 'Flag_Category', 'Flag_Reason') if c in batch.schema.names]
+            summary = batch.select(summary_columns).to_pandas()
+            for state, group in summary.groupby(partition_column, dropna=False):
+                stats = partitions.setdefault('' if pd.isna(state) else str(state), {'rows': 0})
+                stats['rows'] += len(group)
+                for col in summary_columns[1:]:
+                    counts = stats.setdefault(col, {})
+                    for value, n in group[col].value_counts().items():
+                        counts[value] = counts.get(value, 0) + int(n)
+            # Empty states would become __HIVE_DEFAULT_PARTITION__; give them a readable name
+            states = pc.fill_null(batch.column(partition_column), '')
+            yield batch.set_column(batch.schema.get_field_index(partition_column), partition_column, states)
+
+    schema = pa.schema([(c, pa.string()) for c in header] + [(ROW_ID, pa.int64()), (RECORD_KEY, pa.string())])
+    tmp_dir = store_dir + '.building'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    ds.write_dataset(
+        batches(), os.path.join(tmp_dir, 'data'), schema=schema, format='parquet',
+        partitioning=ds.partitioning(pa.schema([(partition_column, pa.string())]), flavor='hive'),
+        max_rows_per_group=ROWS_PER_GROUP, min_rows_per_group=ROWS_PER_GROUP,
+    )
+    manifest = {
+        'source': os.path.abspath(csv_path),
+        'source_mtime': os.path.getmtime(csv_path),
+        'columns': header + [ROW_ID, RECORD_KEY],
+        'key_columns': identity,
+        'partition_column': partition_column,
+        'rows': offset,
+        'partitions': partitions,
+    }
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+    _carry_verifications(store_dir, tmp_dir, identity)
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.replace(tmp_dir, store_dir)
+    print(f"✅ Built verifier store: {offset} rows, {len(partitions)} {partition_column} partitions "
+          f"in {time.perf_counter() - start:.1f}s -> {store_dir}")
+
+
+def _carry_verifications(store_dir, tmp_dir, identity):
+    """
+    Move saved verifications into a rebuilt store, matched by record key
+
+    Verifications saved before record keys existed are keyed by _row_id of the
+    old store; their keys are recomputed from that store's data, which still
+    describes the CSV they were made against.  Verdicts whose record is no longer
+    in the CSV stay in the file (unused) and are reported.
+    """
+    import pyarrow.dataset as ds
+
+    old_path = os.path.join(store_dir, 'verifications.parquet')
+    if not os.path.exists(old_path):
+        return
+    saved = pd.read_parquet(old_path)
+
+    if RECORD_KEY not in saved.columns:
+        old_data = os.path.join(store_dir, 'data')
+        if not os.path.isdir(old_data):
+            shutil.copyfile(old_path, os.path.join(tmp_dir, 'verifications_unkeyed.parquet'))
+            print(f"⚠️ {len(saved)} saved verifications have no record key and the store they belong to is gone; "
+                  f"set aside as verifications_unkeyed.parquet instead of guessing their rows")
+            return
+        old_table = ds.dataset(old_data, format='parquet', partitioning='hive')
+        old_columns = [c for c in identity if c in old_table.schema.names]
+        old_rows = old_table.to_table(columns=[ROW_ID] + old_columns).to_pandas().sort_values(ROW_ID)
+        old_keys = pd.Series(record_keys(old_rows, identity, {}), index=old_rows[ROW_ID].to_numpy())
+        saved = saved[saved[ROW_ID].isin(old_keys.index)]
+        saved.insert(0, RECORD_KEY, old_keys.loc[saved[ROW_ID]].to_numpy())
+
+    new_keys = ds.dataset(os.path.join(tmp_dir, 'data'), format='parquet', partitioning='hive').to_table(
+        columns=[RECORD_KEY]).column(RECORD_KEY).to_pylist()
+    orphaned = int((~saved[RECORD_KEY].isin(set(new_keys))).sum())
+    saved.to_parquet(os.path.join(tmp_dir, 'verifications.parquet'), index=False)
+    if orphaned:
+        print(f"⚠️ {orphaned} saved verifications no longer match a row of the CSV (record changed or removed)")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# pipeline_tools is imported from the repository root, as the notebooks do via sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
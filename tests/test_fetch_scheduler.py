@@ -0,0 +1,60 @@
+"""FetchScheduler against serve_throttling_stub: AIMD backoff and Retry-After"""
+
+import time
+from email.utils import formatdate
+
+import pytest
+
+pytest.importorskip('requests')
+
+from pipeline_tools.fetch_scheduler import FetchScheduler, parse_retry_after, serve_throttling_stub
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('5') == 5.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    now = time.time()
+    assert parse_retry_after(formatdate(now + 30, usegmt=True), now=now) == pytest.approx(30, abs=1)
+    assert parse_retry_after(formatdate(now - 30, usegmt=True), now=now) == 0.0
+
+
+def test_concurrency_backs_off_to_what_the_host_allows():
+    # The server answers 503 above two requests in flight; a fixed window of 8 would
+    # see most requests rejected
+    server, base_url, hits = serve_throttling_stub(rate_limit=1000, max_concurrent=2, latency=0.05, retry_after=0)
+    try:
+        with FetchScheduler(initial_concurrency=1, max_concurrency=8) as scheduler:
+            responses = scheduler.map([f"{base_url}page/{i}" for i in range(60)])
+            stats = scheduler.host_stats().iloc[0]
+    finally:
+        server.shutdown()
+
+    assert [r.status_code for r in responses] == [200] * 60
+    # Typically 3-8; the margin absorbs scheduling jitter on a loaded machine
+    assert 0 < hits.get(503, 0) <= len(responses) // 3
+    # Every throttled request was retried rather than returned
+    assert stats['retries'] == stats['throttled'] == hits[503]
+    # The window grew past the server's limit and never reached the cap (the 503s above
+    # show it was cut back; by the last response it may have regrown to its old peak)
+    assert 2 < stats['peak_concurrency'] < 5
+    assert stats['concurrency'] <= stats['peak_concurrency']
+
+
+def test_retry_after_holds_the_host():
+    server, base_url, hits = serve_throttling_stub(rate_limit=2, max_concurrent=10, latency=0.01, retry_after=1)
+    try:
+        with FetchScheduler(initial_concurrency=4, max_concurrency=8) as scheduler:
+            start = time.monotonic()
+            responses = scheduler.map([f"{base_url}page/{i}" for i in range(6)])
+            elapsed = time.monotonic() - start
+            stats = scheduler.host_stats().iloc[0]
+    finally:
+        server.shutdown()
+
+    assert [r.status_code for r in responses] == [200] * 6
+    assert hits.get(429, 0) >= 1
+    assert stats['retries'] == stats['throttled'] == hits[429]
+    # Nothing was sent while the Retry-After hold lasted, so there was no second wave of 429s
+    assert elapsed >= 1.0
+    assert hits[429] <= 4
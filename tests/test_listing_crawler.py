@@ -0,0 +1,72 @@
+"""ListingCrawler against serve_listing_stub: conditional GETs, 304 carry-over and the listing diff"""
+
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('bs4')
+
+from pipeline_tools.listing_crawler import ListingCrawler, serve_listing_stub
+
+
+def listing_page(state, stops):
+    rows = ''.join(f"<tr><td><a href='location_details.php?id={stop_id}'>{name}</a></td></tr>"
+                   for stop_id, name in stops)
+    return (f"<html><body><h1 class='h2'>Truck Stops in {state}</h1>"
+            f"<table><tbody class='nohover'>{rows}</tbody></table></body></html>")
+
+
+@pytest.fixture
+def listing_stub():
+    pages = {
+        1: listing_page('Nevada', [(101, 'Pilot Travel Center'), (102, "Love's Travel Stop")]),
+        2: listing_page('Utah', [(201, 'Flying J')]),
+    }
+    server, base_url, hits = serve_listing_stub(pages)
+    yield pages, base_url, hits
+    server.shutdown()
+
+
+def make_crawler(tmp_path, base_url):
+    return ListingCrawler(state_path=str(tmp_path / '2_crawl_state.json'), listings_path=str(tmp_path / '2.csv'),
+                          sites={'Trucker': base_url}, state_ids=[1, 2], per_host=2, delay=0)
+
+
+def test_first_crawl_parses_every_page(tmp_path, listing_stub):
+    pages, base_url, hits = listing_stub
+    result = make_crawler(tmp_path, base_url).refresh()
+
+    assert result.stats['parsed'] == 2
+    assert sorted(result.listings['name']) == ["Flying J", "Love's Travel Stop", 'Pilot Travel Center']
+    assert set(result.listings['state']) == {'Nevada', 'Utah'}
+    assert len(result.added) == 3 and result.removed.empty and result.changed.empty
+    assert hits == {200: 2}
+
+
+def test_unchanged_pages_come_back_304_and_keep_their_listings(tmp_path, listing_stub):
+    pages, base_url, hits = listing_stub
+    first = make_crawler(tmp_path, base_url).refresh()
+    second = make_crawler(tmp_path, base_url).refresh()
+
+    assert second.stats['not_modified'] == 2 and second.stats['parsed'] == 0
+    assert hits[304] == 2
+    assert sorted(second.listings['full_url']) == sorted(first.listings['full_url'])
+    assert second.added.empty and second.removed.empty and second.changed.empty
+    assert second.detail_urls() == []
+
+
+def test_changed_page_is_reparsed_and_diffed(tmp_path, listing_stub):
+    pages, base_url, hits = listing_stub
+    make_crawler(tmp_path, base_url).refresh()
+
+    # Nevada: one stop renamed, one closed, one opened; Utah untouched
+    pages[1] = listing_page('Nevada', [(101, 'Pilot Travel Center #12'), (103, 'TA Express')])
+    result = make_crawler(tmp_path, base_url).refresh()
+
+    assert result.stats == {'requests': 2, 'not_modified': 1, 'same_content': 0, 'parsed': 1, 'errors': 0}
+    assert result.added['name'].tolist() == ['TA Express']
+    assert result.removed['name'].tolist() == ["Love's Travel Stop"]
+    assert result.changed['name'].tolist() == ['Pilot Travel Center #12']
+    assert sorted(result.detail_urls()) == [base_url + 'location_details.php?id=101',
+                                            base_url + 'location_details.php?id=103']
+    # Utah's listing was carried over from the snapshot without re-parsing
+    assert 'Flying J' in result.listings['name'].tolist()
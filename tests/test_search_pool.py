@@ -0,0 +1,95 @@
+"""SearchBrowserPool against serve_search_stub, with a requests-backed stand-in for Chrome"""
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('selenium')
+requests = pytest.importorskip('requests')
+BeautifulSoup = pytest.importorskip('bs4').BeautifulSoup
+
+from pipeline_tools.search_pool import SearchBrowserPool, SessionPacing, failed_path_for, serve_search_stub
+
+
+class StubElement:
+    def __init__(self, node):
+        self.node = node
+        self.tag_name = node.name
+
+    def find_element(self, by, xpath):
+        parent = self.node.parent
+        if parent is None or parent.name == '[document]':
+            raise LookupError('no parent element')
+        return StubElement(parent)
+
+    def get_attribute(self, name):
+        return self.node.get(name)
+
+
+class StubDriver:
+    """The few WebDriver calls search_first_result makes, served with requests + BeautifulSoup"""
+
+    def __init__(self, failing_queries=()):
+        self.failing_queries = failing_queries
+        self.page_source = ''
+        self.url = None
+
+    def get(self, url):
+        if any(query in url for query in self.failing_queries):
+            raise ConnectionError('browser lost the connection')
+        self.url = url
+        self.page_source = requests.get(url, timeout=5).text
+
+    def refresh(self):
+        self.get(self.url)
+
+    def find_elements(self, by, selector):
+        return [StubElement(node) for node in BeautifulSoup(self.page_source, 'html.parser').select(selector)]
+
+    def execute_script(self, *args):
+        pass
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def search_stub():
+    server, search_url_base = serve_search_stub()
+    yield search_url_base
+    server.shutdown()
+
+
+def make_pool(output_path, search_url_base, failing_queries=()):
+    return SearchBrowserPool(n_workers=2, output_path=output_path,
+                             driver_factory=lambda: StubDriver(failing_queries),
+                             search_url_base=search_url_base,
+                             pacing_factory=lambda worker_id: SessionPacing(scale=0), click=False)
+
+
+def test_failed_search_is_not_checkpointed_and_is_retried(tmp_path, search_stub):
+    output_path = str(tmp_path / '1_pool_results.csv')
+    df = pd.DataFrame({'places_search_query': ['pilot reno nv', 'loves sparks nv', 'ta wells nv']})
+
+    first = make_pool(output_path, search_stub, failing_queries=('sparks',)).run(df)
+    assert first['row_key'].tolist() == ['0', '2']
+    assert first['first_result_links'].notna().all()
+    failures = pd.read_csv(failed_path_for(output_path), dtype={'row_key': str})
+    assert failures['row_key'].tolist() == ['1']
+    assert failures['error'].str.startswith('ConnectionError').all()
+
+    resumed = make_pool(output_path, search_stub).run(df)
+    assert resumed['row_key'].tolist() == ['0', '1', '2']
+    assert resumed['first_result_links'].notna().all()
+    # Only the failed row was searched again
+    assert resumed.set_index('row_key').loc[['0', '2'], 'first_result_links'].tolist() == \
+        first.set_index('row_key').loc[['0', '2'], 'first_result_links'].tolist()
+
+
+def test_search_without_result_link_stays_pending(tmp_path, search_stub):
+    output_path = str(tmp_path / 'pool.csv')
+    df = pd.DataFrame({'places_search_query': ['pilot reno nv']})
+    pool = make_pool(output_path, search_stub.replace('/search?q=', '/empty?q='))
+
+    result = pool.run(df)
+    assert result.empty
+    assert pd.read_csv(failed_path_for(output_path))['error'].tolist() == ['No result link found']